@@ -0,0 +1,255 @@
+"""Draining the bulk job queue (parser/jobs.py) into the worker pool, for
+POST /jobs.
+
+JobRunner is an asyncio task in the API process. It claims a chunk of a
+job's items at a time from the store, parses it in the shared ParsePool with
+parse_chunk (so one bad resume fails only its own item) and writes the
+outcomes back. At most max_chunks chunks run at once, which leaves the rest
+of the pool's admission queue to interactive requests; a chunk refused with
+PoolSaturated goes back to the queue and is retried. A chunk lost to the
+pool itself (a worker died, the pool shut down) is retried after a growing
+delay, and its items fail only after max_attempts tries; an error parsing
+one document fails just that item, at once. Near-duplicates of
+the tenant's recent resumes are re-parsed only where they differ
+(parser/dedup.py). When a job finishes and
+has a callback URL, the job's status is POSTed there as JSON; callback URLs
+must pass check_callback_url().
+"""
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import urllib.parse
+import urllib.request
+
+from parser.batch import parse_chunk
+from parser.pool import PoolSaturated, WorkerLost
+
+logger = logging.getLogger(__name__)
+
+# Retry delays for a callback that fails; after the last it is given up
+CALLBACK_RETRY_SECONDS = (1, 5, 30)
+CALLBACK_TIMEOUT_SECONDS = 10
+# Delay before the first retry of a chunk lost to the pool; doubles each time
+JOB_RETRY_SECONDS = 2
+
+
+def job_chunk_size():
+    # PARSER_JOB_CHUNK is how many items of a job go to a worker at once
+    return max(1, int(os.environ.get("PARSER_JOB_CHUNK", "8")))
+
+
+def max_job_items():
+    # PARSER_JOB_MAX_ITEMS caps the resumes in one job (413 above it)
+    return int(os.environ.get("PARSER_JOB_MAX_ITEMS", "10000"))
+
+
+def job_max_attempts():
+    # PARSER_JOB_MAX_ATTEMPTS is how many times an item is tried before a
+    # failing pool (not its document) fails it
+    return max(1, int(os.environ.get("PARSER_JOB_MAX_ATTEMPTS", "5")))
+
+
+class CallbackURLError(ValueError):
+    """A callback_url the service will not POST to."""
+
+
+def callback_hosts():
+    # PARSER_CALLBACK_HOSTS, if set, is a comma-separated allowlist of
+    # callback hosts; ".example.com" allows example.com's subdomains
+    return [host.strip().lower() for host in os.environ.get("PARSER_CALLBACK_HOSTS", "").split(",") if host.strip()]
+
+
+def check_callback_url(url):
+    """Raise CallbackURLError unless url is an http(s) URL the service may
+    POST to. Without an allowlist that is any host whose addresses are all
+    public, so a callback cannot reach loopback, private or link-local
+    services (cloud metadata endpoints among them). A listed host is trusted
+    wherever it points. Resolves the host, so it blocks."""
+    try:
+        parts = urllib.parse.urlsplit(url)
+        parts.port  # raises on a malformed port
+    except ValueError as exc:
+        raise CallbackURLError(f"callback_url is malformed: {exc}") from exc
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise CallbackURLError("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    allowed = callback_hosts()
+    if allowed:
+        if not any(host == entry or (entry.startswith(".") and host.endswith(entry)) for entry in allowed):
+            raise CallbackURLError(f"callback host {host} is not in PARSER_CALLBACK_HOSTS")
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)}
+    except (OSError, UnicodeError) as exc:
+        raise CallbackURLError(f"callback host {host} does not resolve") from exc
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            raise CallbackURLError(f"callback host {host} resolves to a non-public address ({address})")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect could lead a checked callback to any address
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _post_json(url, payload):
+    # Checked again on each delivery: the host may resolve elsewhere by now
+    check_callback_url(url)
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), method="POST",
+        headers={"Content-Type": "application/json"},
+    )
+    with _opener.open(request, timeout=CALLBACK_TIMEOUT_SECONDS) as response:
+        response.read()
+
+
+class JobRunner:
+
+    def __init__(self, store, pool, chunk_size=None, max_chunks=None, poll_seconds=1.0, index=None, dedup=None,
+                 max_attempts=None, retry_seconds=JOB_RETRY_SECONDS):
+        self.store = store
+        self.pool = pool
+        # A CandidateIndex (parser/index.py) that results are added to
+        self.index = index
+        # A DuplicateDetector (parser/dedup.py), for jobs without a field selection
+        self.dedup = dedup
+        self.chunk_size = chunk_size or job_chunk_size()
+        self.max_chunks = max_chunks or pool.max_workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts or job_max_attempts()
+        self.retry_seconds = retry_seconds
+        self._task = None
+        self._wake = None
+        self._chunks = set()
+        self._callbacks = set()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start draining on the running event loop. Items a previous process
+        left running are queued again first, and callbacks it didn't get to
+        deliver are sent."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._chunks, *self._callbacks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._chunks.clear()
+        self._callbacks.clear()
+
+    def notify(self):
+        # New work was queued; don't wait for the next poll
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        requeued = await asyncio.to_thread(self.store.recover)
+        if requeued:
+            logger.info("Requeued %d job items left running by the previous process", requeued)
+        for job_id, url in await asyncio.to_thread(self.store.pending_callbacks):
+            self._send_callback(job_id, url)
+
+        while True:
+            while len(self._chunks) < self.max_chunks:
+                chunk = await asyncio.to_thread(self.store.claim, self.chunk_size)
+                if chunk is None:
+                    break
+                task = asyncio.create_task(self._parse(chunk))
+                self._chunks.add(task)
+                task.add_done_callback(self._chunk_done)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _chunk_done(self, task):
+        self._chunks.discard(task)
+        self.notify()
+
+    async def _parse(self, chunk):
+        job_id = chunk["job_id"]
+        indexes = [index for index, _ in chunk["items"]]
+        texts = [text for _, text in chunk["items"]]
+        matches = [None] * len(texts)
+        if self.dedup is not None and chunk["fields"] is None:
+            matches = await asyncio.to_thread(self.dedup.check_many, texts, chunk["tenant"])
+        bases = [match and self.dedup.parse_base(match) for match in matches]
+        try:
+            outcomes = await self.pool.run(parse_chunk, texts, True, False, chunk["fields"], bases)
+        except WorkerLost as exc:
+            logger.warning("Job %s: lost a chunk of %d items to a dead worker", job_id, len(indexes))
+            await self._retry(job_id, indexes, exc)
+            return
+        except PoolSaturated:
+            await asyncio.to_thread(self.store.release, job_id, indexes)
+            await asyncio.sleep(self.poll_seconds)
+            return
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.release, job_id, indexes)
+            raise
+        except Exception as exc:  # the pool failed, not a parse (parse_chunk catches those)
+            logger.exception("Job %s: chunk of %d items failed", job_id, len(indexes))
+            await self._retry(job_id, indexes, exc)
+            return
+        for text, match, outcome in zip(texts, matches, outcomes):
+            if outcome["result"] is not None and match is not None:
+                report = self.dedup.record(text, match, outcome["result"])
+                if report is not None:
+                    outcome["result"]["duplicate"] = report
+
+        finished = await asyncio.to_thread(self.store.complete, job_id, dict(zip(indexes, outcomes)))
+        if self.index is not None:
+            await asyncio.to_thread(lambda: [self.index.add_result(outcome["result"]) for outcome in outcomes if outcome["result"]])
+        if finished:
+            await self._finished(job_id)
+
+    async def _retry(self, job_id, indexes, exc):
+        error = f"{type(exc).__name__}: {exc}"
+        finished = await asyncio.to_thread(self.store.retry, job_id, indexes, error, self.max_attempts, self.retry_seconds)
+        if finished:
+            await self._finished(job_id)
+
+    async def _finished(self, job_id):
+        for pending_id, url in await asyncio.to_thread(self.store.pending_callbacks):
+            if pending_id == job_id:
+                self._send_callback(job_id, url)
+
+    def _send_callback(self, job_id, url):
+        task = asyncio.create_task(self._deliver(job_id, url))
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def _deliver(self, job_id, url):
+        payload = await asyncio.to_thread(self.store.get, job_id)
+        for delay in (0, *CALLBACK_RETRY_SECONDS):
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(_post_json, url, payload)
+            except Exception as exc:
+                logger.warning("Job %s: callback to %s failed: %s", job_id, url, exc)
+            else:
+                await asyncio.to_thread(self.store.set_callback, job_id, "sent")
+                return
+        await asyncio.to_thread(self.store.set_callback, job_id, "failed")
+
+    def stats(self):
+        return {"running": self.running, "chunks_in_flight": len(self._chunks), "chunk_size": self.chunk_size}
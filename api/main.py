@@ -1,22 +1,523 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from pydantic import BaseModel
+from typing import List, Optional
 import sys
 import os
+import time
 
 # Add the parent directory to the path to import the parser module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from parser.resume_parser import ResumeParser
+from api.jobs import CallbackURLError, JobRunner, check_callback_url, max_job_items
+from api.uploads import UploadError, receive_upload
+from parser.batch import parse_chunk, parse_file, parse_incremental_text, parse_text
+from parser.documents import DocumentError, UnsupportedDocument
+from parser.index import QueryError, get_index
+from parser.jobs import get_job_store
+from parser.cache import get_cache, cache_key
+from parser.dedup import get_detector
+from parser.metrics import CallbackCounter, Counter, Gauge, Histogram, Registry
+from parser.models import BatchItem, ParseResult
+from parser.pool import ParsePool, PoolSaturated
+from parser.resume_parser import select_fields, select_result
+from parser.serialization import dumps
+from parser.versions import get_version_store
 
-app = FastAPI()
+# Parsing is CPU-bound, so it runs in its own process pool instead of on the
+# event loop. PARSER_WORKERS sizes the pool, PARSER_MAX_QUEUE bounds how many
+# requests may wait for a worker before we start answering 503.
+pool = ParsePool()
+RETRY_AFTER_SECONDS = os.environ.get("PARSER_RETRY_AFTER", "1")
+logger = logging.getLogger(__name__)
+
+# Startup only imports code; the NLP model and taxonomy are loaded by warming
+# the pool in the background, and GET /ready answers 503 until that is done.
+# PARSER_WARMUP=0 skips it (workers then load on their first request).
+WARM_UP = os.environ.get("PARSER_WARMUP", "1").lower() not in ("0", "false", "no", "off")
+warm_up_state = {"started": None, "seconds": None, "workers": [], "error": None}
+
+async def _warm_up_pool():
+    warm_up_state["started"] = time.perf_counter()
+    try:
+        warm_up_state["workers"] = await asyncio.to_thread(pool.warm_up)
+    except Exception as exc:
+        logger.exception("Worker pool warm-up failed")
+        warm_up_state["error"] = f"{type(exc).__name__}: {exc}"
+    else:
+        warm_up_state["seconds"] = round(time.perf_counter() - warm_up_state["started"], 3)
+
+# With PARSER_INDEX_PATH set, every freshly parsed complete result goes into
+# the candidate index behind /search (parser/index.py), which is saved there
+# every PARSER_INDEX_SAVE_EVERY changes, in a thread, and on shutdown. The
+# index belongs to this process: it holds what this process parsed.
+index = get_index()
+INDEX_SAVE_EVERY = int(os.environ.get("PARSER_INDEX_SAVE_EVERY", "1000"))
+index_state = {"saving": None}
+
+# Bulk jobs (POST /jobs) wait in a SQLite file (PARSER_JOBS_PATH) and are
+# drained into the same pool by a background task; see api/jobs.py
+job_store = get_job_store()
+job_runner = JobRunner(job_store, pool, index=index, dedup=get_detector()) if job_store else None
+
+@asynccontextmanager
+async def lifespan(app):
+    warm_up = asyncio.create_task(_warm_up_pool()) if WARM_UP else None
+    if job_runner:
+        job_runner.start()
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    if job_runner:
+        await job_runner.stop()
+    if index is not None and index.path and index.unsaved:
+        await asyncio.to_thread(index.save)
+    pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 class ResumeRequest(BaseModel):
     resume_text: str
 
-@app.post("/parse-resume")
-async def parse_resume(request: ResumeRequest):
-    parser = ResumeParser(request.resume_text)
-    return parser.parse()
+class BatchResumeRequest(BaseModel):
+    resume_texts: List[str]
+
+class IncrementalResumeRequest(BaseModel):
+    resume_text: str
+    base_version_id: Optional[str] = None
+
+class JobRequest(BaseModel):
+    resume_texts: List[str]
+    callback_url: Optional[str] = None
+
+# Response models document the endpoints (OpenAPI). The endpoints return a
+# JSONBytesResponse themselves, so FastAPI neither validates nor re-encodes
+# the result; parser.models and its tests keep parse() output in this shape.
+class BatchResponse(BaseModel):
+    results: List[BatchItem]
+
+class IncrementalResponse(BaseModel):
+    version_id: Optional[str] = None
+    base_version_id: Optional[str] = None
+    reused: List[str]
+    result: ParseResult
+
+class SearchHit(BaseModel):
+    candidate_id: str
+    score: int
+    total_experience_years: float
+
+class SearchResponse(BaseModel):
+    total: int
+    results: List[SearchHit]
+
+class JobResponse(BaseModel):
+    job_id: str
+    tenant: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    progress: float
+    created: float
+    finished: Optional[float] = None
+    callback: Optional[str] = None
+    results: Optional[List[BatchItem]] = None
+    next_offset: Optional[int] = None
+
+class JSONBytesResponse(Response):
+    # Encodes straight to bytes (orjson when installed) instead of walking the
+    # result with jsonable_encoder first; ready-made bytes, such as a cached
+    # payload, are sent as they are
+    media_type = "application/json"
+
+    def render(self, content):
+        return content if isinstance(content, bytes) else dumps(content)
+
+def _overloaded(exc):
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": RETRY_AFTER_SECONDS})
+
+# Repeat submissions are answered from the parse cache in this process and
+# never reach the pool; workers are told to skip it so nothing is stored twice.
+cache = get_cache()
+# Recent versions of resumes being edited, for /parse-resume/incremental
+versions = get_version_store()
+# Near-duplicates of recent resumes are re-parsed only where they differ;
+# see parser/dedup.py. Full-result parses only.
+dedup = get_detector()
+
+# Prometheus metrics, served from /metrics. Stage timings are measured inside
+# the worker processes and shipped back with each result (as its profile), so
+# they are recorded here whether or not the client asked to see them.
+registry = Registry()
+REQUESTS = registry.register(Counter("resume_parser_requests_total", "HTTP requests handled.", ["endpoint", "method", "status"]))
+REQUEST_SECONDS = registry.register(Histogram("resume_parser_request_seconds", "HTTP request latency in seconds.", ["endpoint"]))
+PARSE_SECONDS = registry.register(Histogram("resume_parser_parse_seconds", "Time to parse one resume in a worker, in seconds."))
+STAGE_SECONDS = registry.register(Histogram("resume_parser_stage_seconds", "Time spent in each parse stage, in seconds.", ["stage"]))
+INPUT_CHARS = registry.register(Histogram(
+    "resume_parser_input_chars", "Length of submitted resume text in characters.",
+    buckets=(1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000),
+))
+UPLOAD_BYTES = registry.register(Histogram(
+    "resume_parser_upload_bytes", "Size of uploaded resume files in bytes.",
+    buckets=(10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000),
+))
+registry.register(Gauge("resume_parser_pool_in_flight", "Parses currently running in the worker pool.", lambda: pool.in_flight))
+registry.register(Gauge("resume_parser_pool_queue_depth", "Parses waiting for a free worker.", lambda: pool.queue_depth))
+registry.register(Gauge("resume_parser_pool_ready", "1 once every worker has loaded its models.", lambda: int(pool.ready)))
+for _field in ("hits", "disk_hits", "misses", "evictions"):
+    registry.register(CallbackCounter(
+        f"resume_parser_cache_{_field}_total", f"Parse cache {_field.replace('_', ' ')}.",
+        lambda field=_field: cache.stats()[field] if cache else 0,
+    ))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+
+def _requested_fields(fields):
+    # ?fields=personal_info,skills limits the parse to those fields (and
+    # whatever they depend on); omitted means the full result
+    if fields is None:
+        return None
+    try:
+        return list(select_fields([name.strip() for name in fields.split(",") if name.strip()]))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+# Hashing a long text and reading or writing a disk-backed cache block, so
+# these run in a thread, one hop per request however many texts it has
+def _from_cache(key, fields):
+    # The cache only holds complete results; a field selection gets a slice
+    cached = cache.get(key)
+    if cached is not None and fields is not None:
+        cached = select_result(cached, fields)
+    return cached
+
+def _lookup_cached(resume_texts, fields):
+    # ([key], [cached result or None]) per text
+    keys = [cache_key(text) for text in resume_texts]
+    return keys, [_from_cache(key, fields) for key in keys]
+
+def _store_cached(entries):
+    for key, result in entries:
+        cache.put(key, result)
+
+def _wants_profile(header_value):
+    return header_value is not None and header_value.lower() in ("1", "true", "yes", "on")
+
+def _record_profile(result):
+    profile = result.pop("profile", None)
+    if profile:
+        PARSE_SECONDS.observe(profile["total_ms"] / 1000)
+        for stage, ms in profile["stages"].items():
+            STAGE_SECONDS.observe(ms / 1000, stage=stage)
+    return profile
+
+async def _index_results(results, candidate=None):
+    # Runs in a thread: a save in progress holds the index's lock
+    if index is None:
+        return
+    await asyncio.to_thread(lambda: [index.add_result(result, candidate) for result in results])
+    saving = index_state["saving"]
+    if index.path and index.unsaved >= INDEX_SAVE_EVERY and (saving is None or saving.done()):
+        index_state["saving"] = asyncio.create_task(asyncio.to_thread(index.save))
+
+async def _check_duplicates(resume_texts, fields):
+    # A NearDuplicate (or None) per text
+    if dedup is None or fields is not None:
+        return [None] * len(resume_texts)
+    return await asyncio.to_thread(dedup.check_many, resume_texts)
+
+async def _record_duplicates(entries):
+    # Only a near-duplicate gets a "duplicate" block, so a first parse and a
+    # later cache hit of the same text answer the same bytes. Runs in a
+    # thread: the detector keeps results in a ParseCache.
+    def record():
+        for resume_text, match, result in entries:
+            if match is not None:
+                report = dedup.record(resume_text, match, result)
+                if report is not None:
+                    result["duplicate"] = report
+    if any(match is not None for _, match, _ in entries):
+        await asyncio.to_thread(record)
+
+def _cached_profile(started, resume_text):
+    return {
+        "stages": {},
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+        "cache_hit": True,
+        "input_chars": len(resume_text),
+    }
+
+@app.post("/parse-resume", response_model=ParseResult)
+async def parse_resume(
+    request: ResumeRequest, fields: Optional[str] = None,
+    x_parse_profile: Optional[str] = Header(None), x_candidate_id: Optional[str] = Header(None),
+):
+    started = time.perf_counter()
+    fields = _requested_fields(fields)
+    INPUT_CHARS.observe(len(request.resume_text))
+    key = await asyncio.to_thread(cache_key, request.resume_text) if cache else None
+    if cache:
+        if fields is None and not _wants_profile(x_parse_profile):
+            # The stored bytes are the response; nothing to decode
+            payload = await asyncio.to_thread(cache.get_payload, key)
+            if payload is not None:
+                return JSONBytesResponse(payload)
+        else:
+            cached = await asyncio.to_thread(_from_cache, key, fields)
+            if cached is not None:
+                if _wants_profile(x_parse_profile):
+                    cached["profile"] = _cached_profile(started, request.resume_text)
+                return JSONBytesResponse(cached)
+
+    (match,) = await _check_duplicates([request.resume_text], fields)
+    base = dedup.parse_base(match) if match is not None else None
+    try:
+        if base is not None:
+            result = (await pool.run(parse_incremental_text, request.resume_text, base["resume_text"], base["result"], True))["result"]
+        else:
+            result = await pool.run(parse_text, request.resume_text, False, True, fields)
+    except PoolSaturated as exc:
+        raise _overloaded(exc)
+    profile = _record_profile(result)
+    if cache and fields is None and not result["partial"]:
+        await asyncio.to_thread(cache.put, key, result)
+    await _index_results([result], x_candidate_id)
+
+    await _record_duplicates([(request.resume_text, match, result)])
+    if _wants_profile(x_parse_profile):
+        result["profile"] = profile
+    headers = {"X-Duplicate-Cluster": str(match.cluster_id)} if match is not None else None
+    return JSONBytesResponse(result, headers=headers)
+
+# Documents the multipart body, which receive_upload() reads itself
+UPLOAD_REQUEST_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}},
+}}}}}
+
+@app.post("/parse-resume/file", response_model=ParseResult, openapi_extra=UPLOAD_REQUEST_BODY)
+async def parse_resume_file(
+    request: Request, fields: Optional[str] = None,
+    x_parse_profile: Optional[str] = Header(None), x_candidate_id: Optional[str] = Header(None),
+):
+    # A PDF, DOCX or plain-text resume as the "file" part of a multipart form.
+    # It is streamed to a temp file (see api/uploads.py) and extracted and
+    # parsed in the worker pool (see parser/documents.py).
+    fields = _requested_fields(fields)
+    try:
+        upload = await receive_upload(request)
+    except UploadError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    try:
+        UPLOAD_BYTES.observe(upload.size)
+        result = await pool.run(parse_file, upload.path, upload.filename, upload.content_type, True, fields)
+    except PoolSaturated as exc:
+        raise _overloaded(exc)
+    except UnsupportedDocument as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+    except DocumentError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    finally:
+        upload.remove()
+
+    profile = _record_profile(result)
+    INPUT_CHARS.observe(profile["input_chars"])
+    await _index_results([result], x_candidate_id)
+    if _wants_profile(x_parse_profile):
+        result["profile"] = profile
+    return JSONBytesResponse(result)
+
+@app.post("/parse-resumes/batch", response_model=BatchResponse)
+async def parse_resumes_batch(request: BatchResumeRequest, fields: Optional[str] = None, x_parse_profile: Optional[str] = Header(None)):
+    started = time.perf_counter()
+    fields = _requested_fields(fields)
+    want_profile = _wants_profile(x_parse_profile)
+    texts = request.resume_texts
+    for text in texts:
+        INPUT_CHARS.observe(len(text))
+
+    outcomes = [None] * len(texts)
+    keys = [None] * len(texts)
+    if cache:
+        keys, hits = await asyncio.to_thread(_lookup_cached, texts, fields)
+        for i, cached in enumerate(hits):
+            if cached is not None:
+                if want_profile:
+                    cached["profile"] = _cached_profile(started, texts[i])
+                outcomes[i] = {"result": cached, "error": None}
+    todo = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    matches = dict(zip(todo, await _check_duplicates([texts[i] for i in todo], fields)))
+
+    if todo:
+        # One chunk per worker keeps the whole batch admissible on an idle pool
+        chunk_count = min(pool.max_workers, len(todo))
+        chunk_size = -(-len(todo) // chunk_count)
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        try:
+            chunk_results = await pool.run_many(parse_chunk, [
+                ([texts[i] for i in chunk], False, True, fields, [matches[i] and dedup.parse_base(matches[i]) for i in chunk])
+                for chunk in chunks
+            ])
+        except PoolSaturated as exc:
+            raise _overloaded(exc)
+
+        profiles = {}
+        for chunk, results in zip(chunks, chunk_results):
+            for i, outcome in zip(chunk, results):
+                outcomes[i] = outcome
+                if outcome["error"] is None:
+                    profiles[i] = _record_profile(outcome["result"])
+        if cache and fields is None:
+            await asyncio.to_thread(_store_cached, [
+                (keys[i], outcomes[i]["result"]) for i in profiles if not outcomes[i]["result"]["partial"]
+            ])
+        if want_profile:
+            for i, profile in profiles.items():
+                outcomes[i]["result"]["profile"] = profile
+        await _index_results([outcomes[i]["result"] for i in profiles])
+
+    await _record_duplicates([(texts[i], match, outcomes[i]["result"]) for i, match in matches.items() if outcomes[i]["error"] is None])
+    return JSONBytesResponse({"results": [dict(index=i, **outcome) for i, outcome in enumerate(outcomes)]})
+
+@app.post("/parse-resume/incremental", response_model=IncrementalResponse)
+async def parse_resume_incremental(request: IncrementalResumeRequest, x_parse_profile: Optional[str] = Header(None)):
+    # For editors that re-parse on every save. Each response carries a
+    # version_id; send it back as base_version_id with the next edit and only
+    # the sections that changed since that version are re-extracted. An
+    # unknown or expired base falls back to a full parse.
+    started = time.perf_counter()
+    INPUT_CHARS.observe(len(request.resume_text))
+    base = await asyncio.to_thread(versions.get, request.base_version_id) if versions and request.base_version_id else None
+    key = await asyncio.to_thread(cache_key, request.resume_text) if cache else None
+    result = await asyncio.to_thread(cache.get, key) if cache else None
+    cache_hit = result is not None
+    reused = []
+    if not cache_hit:
+        try:
+            if base is not None:
+                outcome = await pool.run(parse_incremental_text, request.resume_text, base["resume_text"], base["result"], True)
+                result, reused = outcome["result"], outcome["reused"]
+            else:
+                result = await pool.run(parse_text, request.resume_text, False, True)
+        except PoolSaturated as exc:
+            raise _overloaded(exc)
+
+    profile = _cached_profile(started, request.resume_text) if cache_hit else _record_profile(result)
+    if cache and not cache_hit and not result["partial"]:
+        await asyncio.to_thread(cache.put, key, result)
+    version_id = await asyncio.to_thread(versions.put, request.resume_text, result) if versions and not result["partial"] else None
+    if _wants_profile(x_parse_profile):
+        result["profile"] = profile
+    return JSONBytesResponse({
+        "version_id": version_id,
+        "base_version_id": request.base_version_id if base is not None else None,
+        "reused": reused,
+        "result": result,
+    })
+
+def _job_store():
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="the job API is disabled (set PARSER_JOBS_PATH)")
+    return job_store
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobRequest, fields: Optional[str] = None, x_tenant_id: Optional[str] = Header(None)):
+    # A bulk submission: answered at once with a job id, parsed in the
+    # background. Poll GET /jobs/{job_id} or pass a callback_url to be told
+    # when it is done. Jobs are served fairly between X-Tenant-Id values.
+    store = _job_store()
+    fields = _requested_fields(fields)
+    if len(request.resume_texts) > max_job_items():
+        raise HTTPException(status_code=413, detail=f"a job holds at most {max_job_items()} resumes")
+    if request.callback_url is not None:
+        try:
+            await asyncio.to_thread(check_callback_url, request.callback_url)
+        except CallbackURLError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    for text in request.resume_texts:
+        INPUT_CHARS.observe(len(text))
+    job_id = await asyncio.to_thread(
+        store.submit, request.resume_texts, x_tenant_id or "default", fields, request.callback_url,
+    )
+    job_runner.start()  # no-op once the lifespan has started it
+    job_runner.notify()
+    return JSONBytesResponse(await asyncio.to_thread(store.get, job_id), status_code=202)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def read_job(job_id: str, offset: int = 0, limit: int = 100):
+    # Status and progress, plus the finished results with indexes in
+    # [offset, offset + limit); next_offset pages through the rest
+    store = _job_store()
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=422, detail="offset must be >= 0 and limit between 1 and 1000")
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    job["results"] = await asyncio.to_thread(store.results, job_id, offset, limit)
+    job["next_offset"] = offset + limit if offset + limit < job["total"] else None
+    return JSONBytesResponse(job)
+
+@app.get("/search", response_model=SearchResponse)
+async def search(
+    q: Optional[str] = None, min_years: Optional[float] = None, max_years: Optional[float] = None,
+    role: Optional[str] = None, company: Optional[str] = None, k: int = 10,
+):
+    # Candidates from the index, best k first: q is a boolean skill query
+    # ("python AND (kubernetes OR docker) AND NOT php"), the years bound
+    # total_experience_years, and role and company must match exactly
+    if index is None:
+        raise HTTPException(status_code=404, detail="the candidate index is disabled (set PARSER_INDEX_PATH)")
+    if not 1 <= k <= 1000:
+        raise HTTPException(status_code=422, detail="k must be between 1 and 1000")
+    try:
+        found = await asyncio.to_thread(index.search, q, min_years, max_years, role, company, k)
+    except QueryError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return JSONBytesResponse(found)
+
+@app.get("/stats")
+def read_stats():
+    return {
+        "pool": pool.stats(),
+        "cache": cache.stats() if cache else None,
+        "versions": versions.stats() if versions else None,
+        "jobs": dict(job_store.stats(), **job_runner.stats()) if job_store else None,
+        "index": index.stats() if index is not None else None,
+        "dedup": dedup.stats() if dedup is not None else None,
+    }
+
+@app.get("/metrics")
+def read_metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready")
+def read_ready():
+    # Readiness, as opposed to the liveness check at /: 200 once every worker
+    # has loaded the NLP backend and taxonomy (or straight away with
+    # PARSER_WARMUP=0), 503 while they are still loading or if that failed
+    if WARM_UP and not pool.ready:
+        detail = f"warm-up failed: {warm_up_state['error']}" if warm_up_state["error"] else "workers are warming up"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": RETRY_AFTER_SECONDS})
+    return {
+        "ready": True,
+        "workers": len(warm_up_state["workers"]) or pool.max_workers,
+        "preload": pool.preload,
+        "warm_up_seconds": warm_up_state["seconds"],
+    }
 
 @app.get("/")
 def read_root():
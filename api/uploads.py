@@ -0,0 +1,158 @@
+"""Streaming multipart uploads, for POST /parse-resume/file.
+
+The request body is parsed as it arrives, and the file part is written a
+chunk at a time to a named temporary file, so an upload is never held in
+memory whole. (Starlette's own form parsing reads the whole body first, into
+an unnamed spool file a worker process couldn't open.) The worker that
+extracts the text opens the file by path, and the endpoint deletes it
+afterwards. An upload is cut off with 413 as soon as it crosses the size cap.
+Parsing the body and writing the file are blocking, so each chunk is
+handled in a thread, off the event loop.
+"""
+import asyncio
+import os
+import tempfile
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart before 0.0.13
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+# Multipart framing (boundaries, part headers) on top of the file itself
+FORM_OVERHEAD_BYTES = 16 * 1024
+
+
+def max_upload_bytes():
+    # PARSER_MAX_UPLOAD_MB caps the size of one uploaded file
+    return int(float(os.environ.get("PARSER_MAX_UPLOAD_MB", "20")) * 1024 * 1024)
+
+
+def upload_dir():
+    # PARSER_UPLOAD_DIR is where uploads are spooled; it must be readable by
+    # the parse workers (the default temp directory always is)
+    return os.environ.get("PARSER_UPLOAD_DIR") or None
+
+
+class UploadError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Upload:
+    def __init__(self, path, filename, content_type):
+        self.path = path
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _UploadWriter:
+    # python-multipart callbacks: the part named field goes to a temp file,
+    # every other part is skipped without being kept
+    def __init__(self, field, max_bytes, directory):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.upload = None
+        self._file = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.upload is not None or options.get(b"name", b"").decode("latin-1") != self.field:
+            return
+        filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+        suffix = os.path.splitext(filename or "")[1][:16]
+        fd, path = tempfile.mkstemp(prefix="resume-upload-", suffix=suffix, dir=self.directory)
+        self.upload = Upload(path, filename, content_type)
+        self._file = os.fdopen(fd, "wb")
+
+    def on_part_data(self, data, start, end):
+        if self._file is None:
+            return
+        self.upload.size += end - start
+        if self.upload.size > self.max_bytes:
+            raise UploadError(413, f"file is larger than the {self.max_bytes}-byte limit")
+        self._file.write(data[start:end])
+
+    def on_part_end(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.upload is not None:
+            self.upload.remove()
+
+
+async def receive_upload(request, field="file", max_bytes=None, directory=None):
+    """Stream the multipart body of request to disk and return the Upload for
+    its file part. Raises UploadError (with an HTTP status) if there is none,
+    if the body isn't multipart, or if the file is over max_bytes (default
+    PARSER_MAX_UPLOAD_MB)."""
+    max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise UploadError(415, f"expected a multipart/form-data body with a '{field}' file part")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise UploadError(413, f"file is larger than the {max_bytes}-byte limit")
+
+    writer = _UploadWriter(field, max_bytes, directory or upload_dir())
+    parser = multipart.MultipartParser(options[b"boundary"], writer.callbacks())
+    try:
+        async for chunk in request.stream():
+            await asyncio.to_thread(parser.write, chunk)
+        await asyncio.to_thread(parser.finalize)
+    except FormParserError as exc:
+        await asyncio.to_thread(writer.discard)
+        raise UploadError(400, f"malformed multipart body: {exc}") from exc
+    except BaseException:
+        writer.discard()
+        raise
+    await asyncio.to_thread(writer.on_part_end)
+    if writer.upload is None:
+        raise UploadError(422, f"no '{field}' file part in the form")
+    return writer.upload
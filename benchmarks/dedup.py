@@ -0,0 +1,161 @@
+"""Near-duplicate detection: signature cost, index throughput at scale, and
+what a near-duplicate saves over a full parse.
+
+    python -m benchmarks.dedup --documents 2000000 --capacity 1000000
+
+Three parts:
+- signatures: MinHash signatures of synthetic resumes (benchmarks.synthetic),
+  per second;
+- parsing: a full parse of each resume against incremental parses of two
+  kinds of near-duplicate (phone number reformatted, one year changed)
+  against the original's result, which is what DuplicateDetector runs
+  instead;
+- index: a stream of synthetic signatures through a rolling
+  parser.dedup.DuplicateIndex, one query and one insert each, as check()
+  does. A share of the stream are planted near-duplicates of a recent
+  document (a few signature positions changed), so the run also reports how
+  many were found and how many other documents were wrongly matched.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_resume
+from parser.dedup import NUM_PERM, DuplicateIndex, signature
+from parser.resume_parser import ResumeParser
+
+
+def _phone_copy(resume_text):
+    # The phone number written as (512) 555 0100 instead of 512-555-0100
+    for line in resume_text.splitlines()[:4]:
+        for part in line.split(" | "):
+            digits = part.split("-")
+            if len(digits) == 3 and all(d.isdigit() for d in digits):
+                return resume_text.replace(part, f"({digits[0]}) {digits[1]} {digits[2]}", 1)
+    return resume_text + "\n"
+
+
+def _date_copy(resume_text, rng):
+    # The same resume with one four-digit year moved back by one
+    years = [word for word in resume_text.split() if len(word) == 4 and word.isdigit() and word.startswith("20")]
+    if not years:
+        return resume_text + "\n"
+    year = rng.choice(years)
+    return resume_text.replace(year, str(int(year) - 1), 1)
+
+
+def _median_ms(seconds):
+    return statistics.median(seconds) * 1000
+
+
+def run_signatures(resumes, seed=0):
+    rng = random.Random(seed)
+    texts = [generate_resume(seed + i, jobs=rng.randint(1, 6)) for i in range(resumes)]
+
+    started = time.perf_counter()
+    for text in texts:
+        signature(text)
+    signature_seconds = time.perf_counter() - started
+
+    timings = {"full parse": [], "phone changed": [], "date changed": []}
+    for text in texts:
+        result = ResumeParser(text).parse(use_cache=False)
+        started = time.perf_counter()
+        ResumeParser(text).parse(use_cache=False)
+        timings["full parse"].append(time.perf_counter() - started)
+        for name, copy in (("phone changed", _phone_copy(text)), ("date changed", _date_copy(text, rng))):
+            started = time.perf_counter()
+            ResumeParser(copy).parse_incremental(text, result)
+            timings[name].append(time.perf_counter() - started)
+
+    return {
+        "signatures_per_sec": resumes / signature_seconds,
+        "signature_ms": signature_seconds / resumes * 1000,
+        "parse_ms": {name: _median_ms(seconds) for name, seconds in timings.items()},
+    }
+
+
+def synthetic_signatures(count, duplicate_rate, window, seed=0, batch=100_000):
+    """Yields (signature, original position or None). A near-duplicate
+    copies one of the last `window` signatures and changes 2-4 positions."""
+    rng = np.random.default_rng(seed)
+    recent = np.zeros((window, NUM_PERM), dtype=np.uint32)
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        fresh = rng.integers(0, 2**32, (size, NUM_PERM), dtype=np.uint32)
+        planted = rng.random(size) < duplicate_rate
+        back = rng.integers(1, window, size)
+        for i in range(size):
+            position = start + i
+            original = position - back[i] if planted[i] and position >= back[i] else None
+            if original is None:
+                sig = fresh[i]
+            else:
+                sig = recent[original % window].copy()
+                changed = rng.choice(NUM_PERM, rng.integers(2, 5), replace=False)
+                sig[changed] = fresh[i][changed]
+            recent[position % window] = sig
+            yield sig, original
+
+
+def run_index(documents, capacity, duplicate_rate, threshold=0.9, seed=0, window=10_000):
+    index = DuplicateIndex(capacity, threshold)
+    planted = found = wrong = 0
+    latencies = []
+    started = time.perf_counter()
+    for position, (sig, original) in enumerate(synthetic_signatures(documents, duplicate_rate, window, seed)):
+        timed = position % 100 == 0
+        if timed:
+            began = time.perf_counter()
+        match = index.query(sig)
+        index.add(sig, position, None if match is None else int(index.clusters[match[0]]))
+        if timed:
+            latencies.append(time.perf_counter() - began)
+        if original is not None:
+            planted += 1
+            found += match is not None
+        elif match is not None:
+            wrong += 1
+    seconds = time.perf_counter() - started
+
+    memory = index.signatures.nbytes + index.clusters.nbytes + index._positions.nbytes + index._checks.nbytes
+    latencies = sorted(s * 1_000_000 for s in latencies)
+    return {
+        "docs_per_sec": documents / seconds,
+        "p50_us": statistics.median(latencies),
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "recall": found / planted if planted else 1.0,
+        "false_matches": wrong,
+        "memory_mb": memory / 1024 / 1024,
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark near-duplicate detection.")
+    arg_parser.add_argument("--documents", type=int, default=2_000_000, help="signatures streamed through the index")
+    arg_parser.add_argument("--capacity", type=int, default=1_000_000, help="signatures the rolling index holds")
+    arg_parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    arg_parser.add_argument("--resumes", type=int, default=500, help="resumes to sign and parse")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    texts = run_signatures(args.resumes, args.seed)
+    print(f"signatures:            {texts['signatures_per_sec']:,.0f} resumes/s ({texts['signature_ms']:.2f} ms each)")
+    for name, ms in texts["parse_ms"].items():
+        print(f"{name + ':':<23}{ms:.2f} ms (median)")
+
+    results = run_index(args.documents, args.capacity, args.duplicate_rate, seed=args.seed)
+    print(f"\ndocuments:             {args.documents:,} through an index of {args.capacity:,}")
+    print(f"check (query + add):   {results['docs_per_sec']:,.0f} docs/s, p50 {results['p50_us']:.1f} us, p99 {results['p99_us']:.1f} us")
+    print(f"near-duplicates found: {results['recall']:.2%}")
+    print(f"false matches:         {results['false_matches']:,}")
+    print(f"index memory:          {results['memory_mb']:.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
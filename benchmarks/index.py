@@ -0,0 +1,142 @@
+"""Candidate index: build, save, load and query times at scale.
+
+    python -m benchmarks.index --candidates 1000000 --queries 200
+
+Fills a parser.index.CandidateIndex with synthetic candidates. Skills are
+drawn from the taxonomy with a skewed distribution, so a few are common and
+most are rare, as in real resumes. Roles and companies come from
+benchmarks.synthetic, and tenure is spread over 0-40 years. Candidates go in
+through add_terms(), the same incremental path the API uses, without parsing
+any resumes. The run reports:
+- the insert rate;
+- save time and size on disk;
+- load time (memory-mapped);
+- p50/p95 latency for several query shapes against the loaded index;
+- the insert rate on top of a loaded index.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import COMPANIES, ROLES, skill_names
+from parser.index import CandidateIndex, normalize_term
+
+QUERIES = {
+    "one skill": {"query": "{0}"},
+    "two skills AND": {"query": "{0} AND {1}"},
+    "AND + tenure": {"query": "{0} AND {1}", "min_years": 5},
+    "OR + NOT": {"query": "({0} OR {1}) AND NOT {2}"},
+    "rare skill AND": {"query": "{0} AND {3}"},
+    "tenure range only": {"min_years": 10, "max_years": 12},
+    "skill + role": {"query": "{0}", "role": "backend developer", "min_years": 3},
+}
+
+
+def synthetic_candidates(count, seed=0, skills_per_candidate=12):
+    """Yields (candidate_id, skills, roles, companies, years)."""
+    rng = random.Random(seed)
+    skills = [normalize_term(name) for name in skill_names()]
+    # Zipf-like weights: the i-th skill is 1/(i+1) as likely as the first
+    weights = [1 / (rank + 1) for rank in range(len(skills))]
+    roles = [normalize_term(role) for role in ROLES]
+    companies = [normalize_term(company) for company in COMPANIES] + [f"company {i}" for i in range(5000)]
+    for i in range(count):
+        yield (
+            f"candidate-{i}",
+            set(rng.choices(skills, weights, k=skills_per_candidate)),
+            set(rng.sample(roles, rng.randint(1, 3))),
+            set(rng.sample(companies, rng.randint(1, 3))),
+            round(rng.uniform(0, 40), 1),
+        )
+
+
+def _directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _percentiles(seconds):
+    ms = sorted(s * 1000 for s in seconds)
+    return statistics.median(ms), ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+
+
+def run(candidates, queries, seed=0, directory=None):
+    skills = [normalize_term(name) for name in skill_names()]
+    index = CandidateIndex()
+    started = time.perf_counter()
+    for candidate in synthetic_candidates(candidates, seed):
+        index.add_terms(*candidate)
+    build_seconds = time.perf_counter() - started
+
+    path = os.path.join(directory, "index")
+    started = time.perf_counter()
+    index.save(path)
+    save_seconds = time.perf_counter() - started
+    del index
+
+    started = time.perf_counter()
+    loaded = CandidateIndex.load(path)
+    load_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed + 1)
+    latencies = {}
+    for name, shape in QUERIES.items():
+        timings, totals = [], []
+        for _ in range(queries):
+            # {0}-{2} are among the 20 commonest skills, {3} is a rare one
+            picks = rng.sample(skills[:20], 3) + [rng.choice(skills[200:])]
+            kwargs = dict(shape, k=20)
+            if "query" in kwargs:
+                kwargs["query"] = kwargs["query"].format(*picks)
+            started = time.perf_counter()
+            found = loaded.search(**kwargs)
+            timings.append(time.perf_counter() - started)
+            totals.append(found["total"])
+        latencies[name] = (*_percentiles(timings), statistics.median(totals))
+
+    extra = max(1, candidates // 100)
+    started = time.perf_counter()
+    for candidate in synthetic_candidates(extra, seed + 2):
+        loaded.add_terms(f"new-{candidate[0]}", *candidate[1:])
+    insert_seconds = time.perf_counter() - started
+
+    return {
+        "build_per_sec": candidates / build_seconds,
+        "save_seconds": save_seconds,
+        "disk_mb": _directory_size(path) / 1024 / 1024,
+        "load_ms": load_seconds * 1000,
+        "queries": latencies,
+        "inserts_after_load_per_sec": extra / insert_seconds,
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark the candidate index.")
+    arg_parser.add_argument("--candidates", type=int, default=1_000_000)
+    arg_parser.add_argument("--queries", type=int, default=200, help="runs of each query shape")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="index-bench-")
+    try:
+        results = run(args.candidates, args.queries, args.seed, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"candidates:            {args.candidates:,}")
+    print(f"build:                 {results['build_per_sec']:,.0f} inserts/s")
+    print(f"save:                  {results['save_seconds']:.2f} s, {results['disk_mb']:.1f} MB on disk")
+    print(f"load (mmap):           {results['load_ms']:.1f} ms")
+    print(f"inserts after load:    {results['inserts_after_load_per_sec']:,.0f} /s")
+    print(f"\n{'query':<22}{'p50 ms':>10}{'p95 ms':>10}{'matches':>12}")
+    for name, (p50, p95, total) in results["queries"].items():
+        print(f"{name:<22}{p50:>10.2f}{p95:>10.2f}{total:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
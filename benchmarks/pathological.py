@@ -0,0 +1,108 @@
+"""Adversarial inputs for the parser's worst-case behaviour.
+
+    python -m benchmarks.pathological --chars 20000 80000 --max-growth 6
+
+Each input is built around one shape known to make backtracking regexes
+blow up (long runs without the character a pattern is waiting for, long
+whitespace runs between optional groups, endless separators, and so on). The
+same payload is placed in the header, an experience entry and the skills
+section, so every extraction stage sees it. Every input is parsed at each size
+with the parse budgets disabled. The run fails if the time grows faster than
+--max-growth times the growth in size (linear scaling gives 1x) or if any
+parse takes longer than --max-seconds.
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+
+from parser.batch import init_worker
+from parser.resume_parser import ResumeParser
+
+
+def _repeat(unit, chars):
+    return (unit * (chars // len(unit) + 1))[:chars]
+
+
+def _garbage(chars, seed=0):
+    # Roughly what a PDF text layer dump looks like: no newlines, no structure
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,;:|@/-()#+"
+    return "".join(rng.choice(alphabet) for _ in range(chars))
+
+
+PAYLOADS = {
+    "long_token": lambda chars: _repeat("a", chars),
+    "dotted_token": lambda chars: _repeat("a.", chars),
+    "capitalised_words": lambda chars: _repeat("Aa ", chars),
+    "capitalised_commas": lambda chars: _repeat("Aa Bb, ", chars),
+    "initials": lambda chars: "Jane" + _repeat(" Q.", chars),
+    "whitespace_run": lambda chars: "Jan 2020 -" + " " * chars + "x",
+    "role_separators": lambda chars: "Engineer" + _repeat(" at x | y", chars),
+    "pipes": lambda chars: _repeat(" | ", chars),
+    "digits": lambda chars: _repeat("1", chars),
+    "month_soup": lambda chars: _repeat("Jan ", chars),
+    "url": lambda chars: "https://" + _repeat("a", chars),
+    "filler_words": lambda chars: _repeat("and or ", chars),
+    "header_lines": lambda chars: _repeat("Skills\n", chars),
+    "pdf_dump": _garbage,
+}
+
+
+def pathological_resume(name, chars):
+    payload = PAYLOADS[name](chars // 3)
+    return f"{payload}\n\nExperience\nSoftware Engineer at {payload}\n- {payload}\n\nSkills\n{payload}\n"
+
+
+def time_parse(text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        parser = ResumeParser(text, max_chars=0, time_budget=0)
+        started = time.perf_counter()
+        parser.parse(use_cache=False)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(sizes, names=None, repeat=3):
+    """Return {payload name: [(chars, seconds), ...]} for each size."""
+    results = {}
+    for name in names or PAYLOADS:
+        results[name] = [(chars, time_parse(pathological_resume(name, chars), repeat)) for chars in sizes]
+    return results
+
+
+def growth(timings):
+    # How much faster than the input size the parse time grew from the smallest
+    # to the largest size: ~1 for linear, ~size ratio for quadratic
+    (small_chars, small_seconds), (large_chars, large_seconds) = timings[0], timings[-1]
+    return (large_seconds / max(small_seconds, 1e-6)) / (large_chars / small_chars)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Check the parser stays linear on adversarial input.")
+    arg_parser.add_argument("--chars", type=int, nargs="+", default=[20000, 80000], help="input sizes to compare")
+    arg_parser.add_argument("--payload", action="append", choices=sorted(PAYLOADS), help="limit to these payloads")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--max-growth", type=float, default=6.0, help="fail above this time growth per size growth")
+    arg_parser.add_argument("--max-seconds", type=float, default=2.0, help="fail if any single parse takes longer")
+    args = arg_parser.parse_args(argv)
+    logging.getLogger("parser").setLevel(logging.ERROR)  # garbage dates are expected here
+    init_worker()  # load the NLP backend and taxonomy outside the timings
+
+    sizes = sorted(args.chars)
+    failed = False
+    print(f"{'payload':<20}" + "".join(f"{chars:>12,}" for chars in sizes) + f"{'growth':>10}")
+    for name, timings in run(sizes, args.payload, args.repeat).items():
+        ratio = growth(timings)
+        slow = ratio > args.max_growth or max(seconds for _, seconds in timings) > args.max_seconds
+        failed = failed or slow
+        cells = "".join(f"{seconds * 1000:>10.1f}ms" for _, seconds in timings)
+        print(f"{name:<20}{cells}{ratio:>9.2f}x{'  FAIL' if slow else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
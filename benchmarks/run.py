@@ -0,0 +1,210 @@
+"""Per-stage parser benchmarks with regression checks.
+
+    python -m benchmarks.run --docs 50 --jobs 5 --pages 2 --save baseline.json
+    python -m benchmarks.run --docs 50 --jobs 5 --pages 2 --baseline baseline.json --threshold 15
+    python -m benchmarks.run --load-test --requests 500 --concurrency 32
+
+Exits with status 1 when any stage is slower than the baseline by more than
+--threshold percent.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_corpus
+from parser.cache import parser_fingerprint
+from parser.experience_calculator import ExperienceCalculator
+from parser.resume_parser import ResumeParser
+from parser.skill_extractor import SkillExtractor
+from parser.taxonomy import get_matcher
+from parser.utils import split_into_sections
+
+
+def build_stages(corpus):
+    """Return {stage name: callable} where each callable processes the whole
+    corpus once. Inputs for each stage are prepared up front so a stage's
+    timing covers only its own work."""
+    parsers = []
+    for text in corpus:
+        parser = ResumeParser(text)
+        parser.sections  # split ahead of time so extract_experience is measured alone
+        parsers.append(parser)
+    skills_sections = [parser.sections.get("skills", "") for parser in parsers]
+    experiences = [parser.extract_experience() for parser in parsers]
+    calculator = ExperienceCalculator()
+
+    return {
+        "split_into_sections": lambda: [split_into_sections(text) for text in corpus],
+        "extract_personal_info": lambda: [ResumeParser(text).extract_personal_info() for text in corpus],
+        "extract_experience": lambda: [parser.extract_experience() for parser in parsers],
+        "extract_skills": lambda: [SkillExtractor(section).extract_skills() for section in skills_sections],
+        "calculate_total_experience": lambda: [calculator.calculate_total_experience(exp) for exp in experiences],
+        "parse": lambda: [ResumeParser(text).parse(use_cache=False) for text in corpus],
+    }
+
+
+def time_stage(fn, docs, repeat):
+    per_doc_ms = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        per_doc_ms.append((time.perf_counter() - started) * 1000 / docs)
+    median_ms = statistics.median(per_doc_ms)
+    return {
+        "median_ms": round(median_ms, 4),
+        "min_ms": round(min(per_doc_ms), 4),
+        "docs_per_sec": round(1000 / median_ms, 1) if median_ms else None,
+    }
+
+
+def peak_memory_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def run_benchmarks(docs=50, jobs=5, skills=15, pages=1, repeat=5, seed=0):
+    corpus = generate_corpus(docs, seed=seed, jobs=jobs, skills=skills, pages=pages)
+    stages = build_stages(corpus)
+    for fn in stages.values():
+        fn()  # warm-up: compile patterns, load the taxonomy
+
+    results = {name: time_stage(fn, docs, repeat) for name, fn in stages.items()}
+    results["parse"]["peak_memory_kb"] = peak_memory_kb(stages["parse"])
+    return {
+        "params": {"docs": docs, "jobs": jobs, "skills": skills, "pages": pages, "repeat": repeat, "seed": seed},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser_fingerprint": parser_fingerprint(),
+            "taxonomy_version": get_matcher().version,
+            "avg_doc_chars": round(sum(map(len, corpus)) / docs),
+        },
+        "stages": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (stage, baseline ms, current ms, change %, regressed)."""
+    rows = []
+    for stage, base in baseline["stages"].items():
+        if stage not in current["stages"]:
+            continue
+        now = current["stages"][stage]["median_ms"]
+        change = (now - base["median_ms"]) / base["median_ms"] * 100 if base["median_ms"] else 0.0
+        rows.append((stage, base["median_ms"], now, change, change > threshold))
+    return rows
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _load_test(requests, concurrency, corpus):
+    import httpx
+    from api.main import app, pool
+
+    latencies = []
+    statuses = {}
+    limit = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.post("/parse-resume", json={"resume_text": corpus[i % len(corpus)]})
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(i) for i in range(requests)))
+        finally:
+            pool.shutdown()
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 1),
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_load_test(requests=200, concurrency=16, docs=50, seed=0, **kwargs):
+    # Distinct documents so the parse cache doesn't turn this into a cache benchmark
+    corpus = generate_corpus(max(docs, requests), seed=seed, **kwargs)
+    return asyncio.run(_load_test(requests, concurrency, corpus))
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--docs", type=int, default=50, help="resumes in the synthetic corpus")
+    arg_parser.add_argument("--jobs", type=int, default=5, help="jobs per resume")
+    arg_parser.add_argument("--skills", type=int, default=15, help="skills per resume")
+    arg_parser.add_argument("--pages", type=int, default=1, help="approximate pages per resume")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--save", help="write results to this JSON file (use as a future baseline)")
+    arg_parser.add_argument("--baseline", help="compare against this JSON baseline")
+    arg_parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown per stage, in percent")
+    arg_parser.add_argument("--load-test", action="store_true", help="drive the FastAPI app in-process instead")
+    arg_parser.add_argument("--requests", type=int, default=200, help="load test: total requests")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="load test: concurrent requests")
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    shape = {"jobs": args.jobs, "skills": args.skills, "pages": args.pages}
+
+    if args.load_test:
+        results = {"load_test": run_load_test(args.requests, args.concurrency, args.docs, args.seed, **shape)}
+        print(json.dumps(results, indent=2))
+    else:
+        results = run_benchmarks(args.docs, repeat=args.repeat, seed=args.seed, **shape)
+        print(f"{'stage':<28}{'ms/doc':>10}{'docs/s':>12}")
+        for stage, stats in results["stages"].items():
+            print(f"{stage:<28}{stats['median_ms']:>10.3f}{stats['docs_per_sec']:>12.1f}")
+        print(f"peak memory (parse): {results['stages']['parse']['peak_memory_kb']} KiB")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline and not args.load_test:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != results["params"]:
+            print("warning: baseline was recorded with different parameters", file=sys.stderr)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n{'stage':<28}{'baseline':>10}{'now':>10}{'change':>10}")
+        for stage, base, now, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{stage:<28}{base:>10.3f}{now:>10.3f}{change:>+9.1f}%{flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Cold-start cost of the API service: time to ready and memory per worker.
+
+    python -m benchmarks.startup --workers 4
+    python -m benchmarks.startup --workers 4 --mode preload
+
+Each mode starts a fresh interpreter that imports the API app and warms its
+worker pool, which is what GET /ready waits for. It then reads the memory of
+the API process and of every worker from /proc. "default" has every worker
+load the NLP backend and taxonomy itself; "preload" loads them once in the
+API process and forks the workers from it (PARSER_PRELOAD=1).
+
+RSS counts a page in full in every process that maps it, so copy-on-write
+sharing doesn't show up in it; PSS splits each shared page between the
+processes sharing it, and the PSS column summed over all processes is the
+real footprint.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODES = {
+    "default": {"PARSER_PRELOAD": "0"},
+    "preload": {"PARSER_PRELOAD": "1"},
+}
+
+
+def process_memory(pid):
+    """{"rss_kb", "pss_kb"} of a process from /proc, or None where there is
+    no /proc. pss_kb is None on kernels without smaps_rollup."""
+    memory = {"rss_kb": None, "pss_kb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    memory[f"{name.lower()}_kb"] = int(value.split()[0])
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        memory["rss_kb"] = int(line.split()[1])
+        except OSError:
+            return None
+    return memory
+
+
+def measure():
+    # Runs in the fresh interpreter: the environment already holds the mode
+    started = time.perf_counter()
+    from api.main import pool
+    imported = time.perf_counter()
+    workers = pool.warm_up()
+    ready = time.perf_counter()
+    try:
+        return {
+            "import_ms": round((imported - started) * 1000, 1),
+            "ready_ms": round((ready - started) * 1000, 1),
+            "api": process_memory(os.getpid()),
+            "workers": [process_memory(pid) for pid in workers],
+        }
+    finally:
+        pool.shutdown()
+
+
+def run_mode(mode, workers):
+    env = dict(os.environ, PARSER_WORKERS=str(workers), PARSER_WARMUP="0", **MODES[mode])
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--measure"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def _mb(kb):
+    return f"{kb / 1024:>9.1f}" if kb is not None else f"{'n/a':>9}"
+
+
+def report(mode, result):
+    print(f"{mode}: import {result['import_ms']:.0f} ms, ready {result['ready_ms']:.0f} ms")
+    print(f"  {'process':<10}{'RSS MB':>9}{'PSS MB':>9}")
+    processes = [("api", result["api"])] + [(f"worker {i}", memory) for i, memory in enumerate(result["workers"])]
+    for name, memory in processes:
+        memory = memory or {"rss_kb": None, "pss_kb": None}
+        print(f"  {name:<10}{_mb(memory['rss_kb'])}{_mb(memory['pss_kb'])}")
+    pss = [memory["pss_kb"] for _, memory in processes if memory and memory["pss_kb"] is not None]
+    if len(pss) == len(processes):
+        print(f"  {'total':<10}{'':>9}{_mb(sum(pss))}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Measure API time to ready and per-worker memory.")
+    arg_parser.add_argument("--workers", type=int, default=2)
+    arg_parser.add_argument("--mode", action="append", choices=sorted(MODES), help="default: every mode")
+    arg_parser.add_argument("--json", action="store_true", help="print the raw measurements as JSON")
+    arg_parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure()))
+        return 0
+
+    results = {mode: run_mode(mode, args.workers) for mode in args.mode or MODES}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for mode, result in results.items():
+            report(mode, result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
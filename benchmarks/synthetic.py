@@ -0,0 +1,100 @@
+import json
+import random
+
+from parser.taxonomy import DEFAULT_TAXONOMY_PATH
+
+# Roughly one printed page of resume text
+PAGE_CHARS = 3000
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# Fixed so a given seed produces the same resume no matter when it runs
+REFERENCE_YEAR = 2026
+
+FIRST_NAMES = ["John", "Jane", "Priya", "Wei", "Carlos", "Amara", "Lukas", "Sofia", "Omar", "Hannah", "Kenji", "Fatima"]
+LAST_NAMES = ["Doe", "Smith", "Patel", "Chen", "Garcia", "Okafor", "Schmidt", "Rossi", "Haddad", "Kim", "Nakamura", "Novak"]
+CITIES = ["New York, NY", "San Francisco, CA", "Austin, TX", "Seattle, WA", "Chicago, IL", "Boston, MA", "Denver, CO", "Atlanta, GA"]
+COMPANIES = ["Acme Inc.", "Globex Corp.", "Initech LLC", "Umbrella Ltd.", "Hooli", "Stark Industries", "Wayne Enterprises", "Soylent Corp."]
+ROLES = [
+    "Software Engineer", "Senior Software Engineer", "Backend Developer", "Frontend Developer",
+    "Data Analyst", "Engineering Manager", "DevOps Engineer", "Machine Learning Engineer",
+]
+VERBS = ["Developed", "Designed", "Led", "Migrated", "Optimised", "Maintained", "Automated", "Built"]
+OBJECTS = [
+    "a payments service", "the customer dashboard", "an internal data pipeline", "the CI/CD workflow",
+    "a recommendation engine", "the public REST API", "a real-time analytics platform", "the mobile backend",
+]
+OUTCOMES = ["reducing latency by 40%", "serving 2M users", "cutting costs by 25%", "improving uptime to 99.95%"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science", "Bachelor of Engineering in Electronics"]
+SCHOOLS = ["University of Example", "State Technical University", "Northern Institute of Technology"]
+
+_skill_names = None
+
+
+def skill_names():
+    global _skill_names
+    if _skill_names is None:
+        with open(DEFAULT_TAXONOMY_PATH, encoding="utf-8") as f:
+            taxonomy = json.load(f)
+        _skill_names = [
+            entry if isinstance(entry, str) else entry["name"]
+            for entries in taxonomy["categories"].values()
+            for entry in entries
+        ]
+    return _skill_names
+
+
+def _month(rng, year):
+    return f"{rng.choice(MONTHS)} {year}"
+
+
+def generate_resume(seed=0, jobs=3, skills=12, pages=1):
+    """Build a realistic plain-text resume.
+
+    The same arguments always produce the same text. `pages` pads the
+    experience bullets until the resume is about that many pages long.
+    """
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    handle = name.lower().replace(" ", "")
+    chosen_skills = rng.sample(skill_names(), min(skills, len(skill_names())))
+
+    lines = [
+        name,
+        f"{rng.choice(CITIES)} | {rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)} | "
+        f"{handle}@example.com | linkedin.com/in/{handle} | github.com/{handle}",
+        "",
+        "Summary",
+        f"{rng.choice(ROLES)} with {jobs * 2} years of experience building reliable software.",
+        "",
+        "Skills",
+    ]
+    for i in range(0, len(chosen_skills), 5):
+        lines.append("- " + ", ".join(chosen_skills[i:i + 5]))
+
+    # Spread the page budget over the jobs as bullet points (~90 chars each)
+    bullets_per_job = max(2, (pages * PAGE_CHARS) // 90 // max(jobs, 1))
+
+    lines += ["", "Experience"]
+    end_year = REFERENCE_YEAR
+    for i in range(jobs):
+        # Floored so that CVs with hundreds of entries keep plausible dates
+        start_year = max(end_year - rng.randint(1, 3), 1950)
+        end = "Present" if i == 0 and rng.random() < 0.7 else _month(rng, end_year)
+        lines.append(f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)} | {rng.choice(CITIES)} | {_month(rng, start_year)} - {end}")
+        for _ in range(bullets_per_job):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(chosen_skills)}, {rng.choice(OUTCOMES)}.")
+        lines.append("")
+        end_year = start_year
+
+    start_year = end_year - 4
+    lines += [
+        "Education",
+        f"{rng.choice(DEGREES)}, {rng.choice(SCHOOLS)} | Sep {start_year} - May {end_year}",
+        "",
+        "Projects",
+        f"{rng.choice(OBJECTS).capitalize()} - side project using {', '.join(chosen_skills[:3])}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(count, seed=0, **kwargs):
+    return [generate_resume(seed + i, **kwargs) for i in range(count)]
@@ -0,0 +1,228 @@
+"""Upload ingestion: time and peak memory per uploaded file.
+
+    python -m benchmarks.uploads --txt-mb 1 10 --pages 5 50
+
+Builds plain-text files of the given sizes, plus DOCX and PDF resumes of the
+given page counts (PDF only when pypdf is installed). For each file it
+measures the two halves of POST /parse-resume/file separately:
+- receive: the multipart body streamed through api.uploads.receive_upload,
+  chunk by chunk from disk, as the API process does it;
+- extract+parse: parser.documents.extract_text, then ResumeParser.parse, as
+  a worker does it.
+
+Peak memory is the peak of traced Python allocations (tracemalloc) in each
+half. Memory-mapped file pages are not allocations and don't count. The run
+fails if any half of any file peaks above --max-peak-mb; that bound has to
+hold however large the file is.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+from starlette.requests import Request
+
+from api.uploads import receive_upload
+from benchmarks.synthetic import generate_resume
+from parser.batch import init_worker
+from parser.documents import extract_text
+from parser.resume_parser import ResumeParser
+
+CHUNK_BYTES = 64 * 1024
+LINES_PER_PAGE = 50
+BOUNDARY = "resume-upload-benchmark"
+
+
+def build_txt(path, size_bytes):
+    # Resumes back to back until the file is size_bytes long
+    unit = generate_resume(0, jobs=6, pages=2).encode("utf-8") + b"\n\n"
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_bytes:
+            chunk = unit[:size_bytes - written]
+            f.write(chunk)
+            written += len(chunk)
+
+
+def _pages(pages):
+    lines = generate_resume(0, jobs=pages * 2, pages=pages).splitlines()
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def build_docx(path, pages):
+    word = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = []
+    for page in _pages(pages):
+        body.extend(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in page)
+        body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+        ))
+        archive.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/></Relationships>'
+        ))
+        archive.writestr("word/document.xml", f'<w:document xmlns:w="{word}"><w:body>{"".join(body)}</w:body></w:document>')
+
+
+def _pdf_string(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+def build_pdf(path, pages):
+    # A minimal PDF: one Helvetica text page per LINES_PER_PAGE lines
+    objects = {1: b"", 2: b"", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for page in _pages(pages):
+        content = b"BT /F1 10 Tf 14 TL 40 760 Td " + b" ".join(b"(" + _pdf_string(line) + b") Tj T*" for line in page) + b" ET"
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        kids.append(page_id)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for object_id in range(1, len(objects) + 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id]))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def multipart_request(path, filename):
+    # A Starlette request whose body is path wrapped in a multipart form,
+    # delivered in CHUNK_BYTES pieces without a Content-Length, like a
+    # chunked upload
+    head = (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode("utf-8")
+
+    def chunks():
+        yield head
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                yield chunk
+        yield tail
+
+    body = chunks()
+
+    async def receive():
+        chunk = next(body, None)
+        return {"type": "http.request", "body": chunk or b"", "more_body": chunk is not None}
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/parse-resume/file", "query_string": b"",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode("latin-1"))],
+    }
+    return Request(scope, receive)
+
+
+def _traced(fn):
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def measure(path, directory):
+    """{"receive_ms", "receive_peak_kb", "parse_ms", "parse_peak_kb", "chars"}
+    for one file."""
+    filename = os.path.basename(path)
+    upload, receive_seconds, receive_peak = _traced(
+        lambda: asyncio.run(receive_upload(multipart_request(path, filename), max_bytes=1 << 40, directory=directory))
+    )
+    try:
+        result, parse_seconds, parse_peak = _traced(
+            lambda: ResumeParser(extract_text(upload.path, os.path.splitext(filename)[1][1:])).parse(use_cache=False, profile=True)
+        )
+    finally:
+        upload.remove()
+    return {
+        "receive_ms": round(receive_seconds * 1000, 1),
+        "receive_peak_kb": round(receive_peak / 1024, 1),
+        "parse_ms": round(parse_seconds * 1000, 1),
+        "parse_peak_kb": round(parse_peak / 1024, 1),
+        "chars": result["profile"]["input_chars"],
+    }
+
+
+def _has_pypdf():
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Measure upload ingestion time and peak memory per file.")
+    arg_parser.add_argument("--txt-mb", type=float, nargs="+", default=[1, 10], help="plain-text file sizes, in MB")
+    arg_parser.add_argument("--pages", type=int, nargs="+", default=[5, 50], help="DOCX and PDF page counts")
+    arg_parser.add_argument("--max-peak-mb", type=float, default=16.0, help="fail if either half of any file peaks above this")
+    args = arg_parser.parse_args(argv)
+    logging.getLogger("parser").setLevel(logging.ERROR)  # repeated resumes give odd dates
+    init_worker()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for mb in args.txt_mb:
+            path = os.path.join(directory, f"resume-{mb:g}mb.txt")
+            build_txt(path, int(mb * 1024 * 1024))
+            files.append(path)
+        for pages in args.pages:
+            path = os.path.join(directory, f"resume-{pages}p.docx")
+            build_docx(path, pages)
+            files.append(path)
+            if _has_pypdf():
+                path = os.path.join(directory, f"resume-{pages}p.pdf")
+                build_pdf(path, pages)
+                files.append(path)
+        if not _has_pypdf():
+            print("pypdf is not installed; skipping PDF files")
+
+        uploads = os.path.join(directory, "uploads")
+        os.mkdir(uploads)
+        failed = False
+        print(f"{'file':<22}{'size':>10}{'chars':>10}{'receive':>11}{'peak':>11}{'extract+parse':>15}{'peak':>11}")
+        for path in files:
+            row = measure(path, uploads)
+            over = max(row["receive_peak_kb"], row["parse_peak_kb"]) > args.max_peak_mb * 1024
+            failed = failed or over
+            print(
+                f"{os.path.basename(path):<22}{os.path.getsize(path) / 1024:>8.0f}KB{row['chars']:>10,}"
+                f"{row['receive_ms']:>9.1f}ms{row['receive_peak_kb']:>9.0f}KB"
+                f"{row['parse_ms']:>13.1f}ms{row['parse_peak_kb']:>9.0f}KB{'  FAIL' if over else ''}"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ function App() {
   const [parsedData, setParsedData] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Version of the last parse; sent back so the server only re-parses what changed
+  const [versionId, setVersionId] = useState(null);
 
   const handleParse = async () => {
     setLoading(true);
@@ -13,12 +15,12 @@ function App() {
     setParsedData(null);
 
     try {
-      const response = await fetch('http://localhost:8000/parse-resume', {
+      const response = await fetch('http://localhost:8000/parse-resume/incremental', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ resume_text: resumeText }),
+        body: JSON.stringify({ resume_text: resumeText, base_version_id: versionId }),
       });
 
       if (!response.ok) {
@@ -26,7 +28,8 @@ function App() {
       }
 
       const data = await response.json();
-      setParsedData(data);
+      setVersionId(data.version_id);
+      setParsedData(data.result);
     } catch (e) {
       setError('Failed to parse resume. Please ensure the backend is running and accessible at http://localhost:8000. Error: ' + e.message);
       console.error("Error parsing resume:", e);
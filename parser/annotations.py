@@ -0,0 +1,227 @@
+"""Whole-document annotation: one pass that marks every entity the section
+extractors read.
+
+annotate() walks the text once with ANNOTATION_PATTERN. URLs, dates, degrees
+and organisations come out of that scan directly. The plain tokens it passes
+over go through the skill taxonomy's trie (parser.taxonomy) and come out as
+"skill" spans, or as "tool" spans for the tools category (a skill that is
+also an ordinary word, like "Go", only as a list item). Every extractor
+then looks up the spans inside its own section (Annotations.section()), so
+adding an extractor adds no scan of the text.
+
+Spans never cross a line break. A section's spans therefore depend on its own
+lines only, which is what lets parse_incremental() reuse a field whose
+sections didn't change.
+"""
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from operator import attrgetter
+
+from parser.experience_extractor import COMPANY_SUFFIXES, MONTH, PRESENT
+from parser.taxonomy import get_matcher, in_list_context
+from parser.utils import BLOCK_SEPARATOR
+
+KINDS = ("skill", "tool", "date", "org", "degree", "url")
+
+# value is the canonical name for skills and tools and the text as written
+# for everything else. category is the taxonomy category of a skill or tool,
+# and for a date "start" or "end" when it is one side of a range.
+Span = namedtuple("Span", ["kind", "start", "end", "value", "category"])
+
+# Everything below matches within one line ([ \t], never \s) and in linear
+# time: each repetition is bounded or can only match one way.
+_DATE_POINT = r"(?:{month})\.?,?[ \t]*\d{{4}}|\d{{1,2}}/\d{{4}}|(?:19|20)\d{{2}}".format(month=MONTH)
+# A date, or a range when the tail matches too
+_DATE = rf"(?P<start>{_DATE_POINT})(?:[ \t]*(?:-+|–|—|to)[ \t]*(?P<end>{_DATE_POINT}|(?i:{PRESENT})))?(?!\d)"
+_DISCIPLINE = (
+    r"(?:Science|Arts|Engineering|Technology|Business[ \t]+Administration|Fine[ \t]+Arts|Laws"
+    r"|Philosophy|Education|Commerce|Applied[ \t]+Science|Computer[ \t]+Applications)"
+)
+# A degree word on its own ("Master") is too often something else, so it
+# needs "of <discipline>" or a possessive/plural ending
+_DEGREE = (
+    rf"(?:Bachelor|Master|Doctor|Associate)(?:(?:'s|’s|s)(?:[ \t]+(?:of|in)[ \t]+{_DISCIPLINE})?|[ \t]+of[ \t]+{_DISCIPLINE})"
+    r"|Ph\.?D\.?|[BM]\.(?:S|A|E|Sc|Eng|Tech|Com)\.|M\.B\.A\.|J\.D\.|M\.D\."
+    r"|BSc|MSc|BEng|MEng|BTech|MTech|MBA|MPhil|BBA|LLB|LLM"
+    # Bare two-letter forms double as US states ("Boston, MA")
+    r"|(?:BS|BA|MS|MA|BE|ME)(?=[ \t]+(?:in|of)\b|[ \t]*\()"
+    r"|High[ \t]+School[ \t]+Diploma|Diploma"
+)
+# Organisations are matched from their last word back: the scan only looks
+# for the keyword ("University of Example", "Globex Corp"), and the
+# capitalised words before it are taken into the name afterwards
+# (_ORG_PREFIX). Trying a name at every capitalised word would cost several
+# times more on ordinary text.
+_INSTITUTION = (
+    r"(?:University|College|Institute|School|Academy|Polytechnic|Foundation)"
+    r"(?:[ \t]+(?:of|for)(?:[ \t]+(?:(?:the|and|&)[ \t]+)?[A-Z][\w'&.\-]*){1,4})?"
+)
+# Up to four capitalised words ending where the keyword starts; a company's
+# suffix may follow a comma ("Initech, LLC")
+_ORG_PREFIX = re.compile(r"(?:[A-Z][\w'&.\-]*[ \t]+){1,4}\Z")
+_COMPANY_PREFIX = re.compile(r"(?:[A-Z][\w'&.\-]*[ \t]+){0,3}[A-Z][\w'&.\-]*,?[ \t]+\Z")
+# How far back a name is looked for
+_ORG_REACH = 160
+_URL_END = r"[^\s<>()|,\"'.;:!?]"
+_URL = (
+    rf"(?:https?://|www\.)[^\s<>()|,\"']*{_URL_END}"
+    # Bare domains only in lower case, so "Node.js" and "ASP.NET" stay tokens
+    rf"|(?:[a-z\d\-]+\.)+(?:com|org|net|io|dev|app|ai|co|me|edu)\b(?:/(?:[^\s<>()|,\"']*{_URL_END})?)?"
+)
+
+# At each token the first alternative that matches wins. Every match takes
+# the separators in front of it along, so the scan never stops between
+# tokens. A plain lower-case word can start no entity and is taken at once.
+# Every other alternative is guarded by the characters it can start with, so
+# a token only tries the entities it could begin. A date, degree or
+# organisation keyword is taken whole before its words can be read as
+# tokens. "institution" and "company" both come out as "org" spans.
+ANNOTATION_PATTERN = re.compile(rf"""[^\w\n+#]*(?:
+      (?P<word>(?=[a-gi-vx-z])[\w+#]+(?:-[\w+#]+)*)(?![\w.:/@-])
+    | (?P<newline>\n)
+    | (?=[\da-z])(?<![\w@.\-])(?P<url>{_URL})
+    | (?=[\dJFMASONDW])(?<![\w/.\-])(?P<date>{_DATE})
+    | (?=[ABDHJLMP])(?<![\w.])(?P<degree>{_DEGREE})(?!\w)
+    | (?=[ACFGILPSU])(?<![\w.])(?:(?P<institution>{_INSTITUTION})|(?P<company>{COMPANY_SUFFIXES}\.?))(?!\w)
+    | (?P<token>[\w+#]+(?:[.\-][\w+#]+)*)
+)""", re.VERBOSE)
+
+# Stands in the token stream for anything that isn't a token, so no skill is
+# matched across an entity or a line break ("" is never a taxonomy token)
+_BREAK = None
+
+_starts = attrgetter("start")
+
+EMPTY_BRACKETS = re.compile(r"[ \t]*(?:\([ \t]*\)|\[[ \t]*\])")
+
+
+class Annotations:
+    """Typed spans over one text, kept per kind in document order."""
+
+    def __init__(self, spans):
+        # spans: {kind: [Span, ...]} in document order
+        self.spans = {kind: spans.get(kind, []) for kind in KINDS}
+        self._starts = {kind: [span.start for span in items] for kind, items in self.spans.items()}
+
+    def within(self, start, end, *kinds):
+        """Spans of the given kinds (every kind when none are given) lying
+        entirely inside [start, end), in document order."""
+        found = []
+        for kind in kinds or KINDS:
+            starts = self._starts[kind]
+            spans = self.spans[kind]
+            first, stop = bisect_left(starts, start), bisect_left(starts, end)
+            found.extend(span for span in spans[first:stop] if span.end <= end)
+        if len(kinds) != 1:
+            found.sort(key=_starts)
+        return found
+
+    def section(self, sections, key):
+        """The spans inside a section, with offsets into sections[key] (which
+        joins a repeated section's blocks with BLOCK_SEPARATOR)."""
+        blocks = []
+        offset = 0
+        for start, end in sections.spans.get(key, ()):
+            blocks.append((offset, start, end))
+            offset += end - start + len(BLOCK_SEPARATOR)
+        return SectionAnnotations(self, blocks)
+
+    def __repr__(self):
+        return f"Annotations({ {kind: len(spans) for kind, spans in self.spans.items()} })"
+
+
+class SectionAnnotations:
+    """One section's view of a document's Annotations. Offsets are into the
+    section's content; a span is moved there only when it is looked up, so
+    the kinds an extractor never asks for cost nothing."""
+
+    def __init__(self, annotations, blocks):
+        # blocks: [(offset in the content, start, end in the document)]
+        self.annotations = annotations
+        self.blocks = blocks
+
+    def within(self, start, end, *kinds):
+        """Like Annotations.within(), in the section's offsets."""
+        found = []
+        for offset, block_start, block_end in self.blocks:
+            delta = block_start - offset
+            first, last = max(start + delta, block_start), min(end + delta, block_end)
+            if first < last:
+                found.extend(
+                    Span(kind, span_start - delta, span_end - delta, value, category)
+                    for kind, span_start, span_end, value, category in self.annotations.within(first, last, *kinds)
+                )
+        return found
+
+    def __repr__(self):
+        return f"SectionAnnotations({len(self.blocks)} blocks)"
+
+
+def text_without(text, start, end, spans):
+    # text[start:end] with the given spans (in document order) cut out, and
+    # any brackets that held only a span with them
+    pieces = []
+    for span in spans:
+        if span.start >= end:
+            break
+        if span.end > start:
+            pieces.append(text[start:span.start])
+            start = max(start, span.end)
+    pieces.append(text[start:end])
+    return EMPTY_BRACKETS.sub("", "".join(pieces))
+
+
+def annotate(text, matcher=None):
+    """Annotate text in a single scan; returns Annotations."""
+    matcher = matcher or get_matcher()
+    spans = {kind: [] for kind in KINDS}
+    tokens = []
+    dates = spans["date"]
+    # End of the last thing that wasn't a token; no name extends back past it
+    boundary = 0
+
+    # Tokens are kept as their matches; a token's text and offsets are those
+    # of the match's last group, and only a skill's are ever read
+    for match in ANNOTATION_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == "word" or kind == "token":
+            tokens.append(match)
+            continue
+        start = match.start(kind)
+        if kind == "institution" or kind == "company":
+            prefix = (_ORG_PREFIX if kind == "institution" else _COMPANY_PREFIX).search(
+                text, max(boundary, start - _ORG_REACH), start
+            )
+            if prefix is not None:
+                start = prefix.start()
+                # The name's words were read as tokens on the way here
+                while tokens and tokens[-1] is not _BREAK and tokens[-1].start(tokens[-1].lastindex) >= start:
+                    tokens.pop()
+            elif kind == "company":  # a bare "Ltd" names nothing
+                tokens.append(match)
+                continue
+            kind = "org"
+        tokens.append(_BREAK)
+        boundary = match.end()
+        if kind == "newline":
+            continue
+        if kind == "date" and match.group("end") is not None:
+            for side in ("start", "end"):
+                dates.append(Span("date", match.start(side), match.end(side), match.group(side), side))
+            continue
+        spans[kind].append(Span(kind, start, match.end(), text[start:match.end()], None))
+
+    # Lower-casing every token in one call is much cheaper than one call each
+    written = [match[match.lastindex] if match else "" for match in tokens]
+    lowered = "\n".join(written).lower().split("\n")
+    for first, stop, (name, category), ambiguous in matcher.match_tokens(lowered, written):
+        kind = "tool" if category == "tools" else "skill"
+        first, last = tokens[first], tokens[stop - 1]
+        start, end = first.start(first.lastindex), last.end(last.lastindex)
+        # A skill that is also an ordinary word ("C", "Go") counts in running
+        # text only as a list item: "Go, Docker" but not "plan C"
+        if ambiguous and not in_list_context(text, start, end):
+            continue
+        spans[kind].append(Span(kind, start, end, name, category))
+    return Annotations(spans)
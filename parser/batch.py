@@ -0,0 +1,157 @@
+import gc
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from parser.resume_parser import ResumeParser, default_time_budget
+
+
+def default_workers():
+    # PARSER_WORKERS lets deployments pin the pool size; otherwise use every core
+    workers = os.environ.get("PARSER_WORKERS")
+    if workers:
+        return max(1, int(workers))
+    return os.cpu_count() or 1
+
+
+def init_worker():
+    # Runs once in each worker process: load the NLP backend (the spaCy model,
+    # unless PARSER_NLP_BACKEND=rules) and compile the skill taxonomy so every
+    # resume after this reuses them.
+    from parser.nlp import get_backend
+    from parser.taxonomy import get_matcher
+    get_backend().warm_up()
+    get_matcher()
+
+
+def preload():
+    # Preload-then-fork: load everything init_worker() would in this (parent)
+    # process, then move it to the GC's permanent generation. Workers forked
+    # afterwards share those pages copy-on-write; without the freeze, the
+    # first collection in each worker writes to every object header it visits
+    # and copies most of the model back into that worker.
+    init_worker()
+    gc.collect()
+    gc.freeze()
+
+
+def parse_text(resume_text, use_cache=True, profile=False, fields=None):
+    return ResumeParser(resume_text).parse(use_cache=use_cache, profile=profile, fields=fields)
+
+
+def parse_file(path, filename=None, content_type=None, profile=False, fields=None):
+    # An uploaded file, extracted and parsed in the worker. The text only
+    # exists here, so this worker's parse cache is used. filename and
+    # content_type only help detect the format. Extraction and parsing share
+    # one PARSER_TIME_BUDGET_MS: a document that uses it all up in extraction
+    # gets a partial result.
+    from parser.documents import detect_format, extract_text
+    budget = default_time_budget()
+    deadline = time.perf_counter() + budget if budget else None
+    kind = detect_format(path, filename, content_type)
+    text = extract_text(path, kind, deadline=deadline)
+    # What is left of the budget, never 0 (which would mean no budget)
+    remaining = max(deadline - time.perf_counter(), 1e-9) if budget else 0
+    result = ResumeParser(text, time_budget=remaining).parse(use_cache=True, profile=profile, fields=fields)
+    if profile:
+        result["profile"]["document_format"] = kind
+    return result
+
+
+def parse_incremental_text(resume_text, previous_text, previous_result, profile=False):
+    # See ResumeParser.parse_incremental; also reports which fields were reused
+    parser = ResumeParser(resume_text)
+    result = parser.parse_incremental(previous_text, previous_result, profile=profile)
+    return {"result": result, "reused": parser.reused}
+
+
+def parse_incremental_one(resume_text, base, profile=False):
+    # parse_one for a resume with an earlier {"resume_text", "result"} to
+    # re-parse against (see parser/dedup.py)
+    try:
+        return {"result": parse_incremental_text(resume_text, base["resume_text"], base["result"], profile)["result"], "error": None}
+    except Exception as exc:
+        return {"result": None, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def parse_one(resume_text, use_cache=True, profile=False, fields=None, parser=None):
+    # Never let one bad document take the whole batch down: report the error
+    # for this item and keep going. parser, if given, is a ResumeParser
+    # already made for resume_text.
+    try:
+        if parser is None:
+            return {"result": parse_text(resume_text, use_cache, profile, fields), "error": None}
+        return {"result": parser.parse(use_cache=use_cache, profile=profile, fields=fields), "error": None}
+    except Exception as exc:
+        return {"result": None, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def primed_parsers(resume_texts):
+    # A ResumeParser per text (None where one can't be made; parse_one then
+    # reports why), with the Skills sections of all of them extracted in one
+    # batch (ResumeParser.extract_skills_many). A cache hit in parse() leaves
+    # its share unused.
+    parsers = []
+    for text in resume_texts:
+        try:
+            parsers.append(ResumeParser(text))
+        except Exception:
+            parsers.append(None)
+    try:
+        ResumeParser.extract_skills_many([parser for parser in parsers if parser is not None])
+    except Exception:
+        pass  # each parser extracts its own skills, and fails on its own
+    return parsers
+
+
+def parse_chunk(resume_texts, use_cache=True, profile=False, fields=None, bases=None):
+    # bases, if given, holds an earlier {"resume_text", "result"} or None for
+    # each text; texts with one are parsed incrementally against it, the rest
+    # in full with their Skills sections extracted together
+    if bases is None:
+        bases = [None] * len(resume_texts)
+    parsers = iter(primed_parsers([text for text, base in zip(resume_texts, bases) if base is None]))
+    return [
+        parse_one(text, use_cache, profile, fields, next(parsers)) if base is None else parse_incremental_one(text, base, profile)
+        for text, base in zip(resume_texts, bases)
+    ]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(resume_texts, workers=None, chunksize=8, window=None):
+    """Parse an iterable of resume texts across a pool of worker processes.
+
+    Returns one {"index", "result", "error"} dict per input, in input order.
+    Texts go to the workers chunksize at a time (see parse_chunk), with at
+    most `window` chunks (default 2 x workers) in flight, so the iterable is
+    read only as fast as the workers keep up.
+    """
+    if workers is None:
+        workers = default_workers()
+
+    outcomes = []
+    if workers <= 1:
+        init_worker()
+        for chunk in chunked(resume_texts, chunksize):
+            outcomes += parse_chunk(chunk)
+    else:
+        window = window or workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            pending = deque()
+            for chunk in chunked(resume_texts, chunksize):
+                pending.append(executor.submit(parse_chunk, chunk))
+                if len(pending) >= window:
+                    outcomes += pending.popleft().result()
+            while pending:
+                outcomes += pending.popleft().result()
+    return [dict(index=i, **outcome) for i, outcome in enumerate(outcomes)]
@@ -0,0 +1,167 @@
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import date
+
+from parser.serialization import dumps, loads
+from parser.taxonomy import get_matcher
+
+PARSER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_parser_fingerprint = None
+
+
+def parser_fingerprint():
+    # Hash of the parser's own source, so any code change produces new keys
+    # without anyone having to remember to bump a version number.
+    global _parser_fingerprint
+    if _parser_fingerprint is None:
+        digest = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(PARSER_DIR, "*.py"))):
+            with open(path, "rb") as f:
+                digest.update(os.path.basename(path).encode("utf-8"))
+                digest.update(f.read())
+        _parser_fingerprint = digest.hexdigest()[:16]
+    return _parser_fingerprint
+
+
+def normalize_text(resume_text):
+    # Differences that can't change the parse (line endings, trailing spaces,
+    # Unicode composition) shouldn't change the key either.
+    text = unicodedata.normalize("NFC", resume_text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def cache_key(resume_text, current_month=None):
+    # Tenure for "Present" roles grows every month, so the month that
+    # "today" falls in is part of the key too.
+    if current_month is None:
+        today = date.today()
+        current_month = today.year * 12 + today.month - 1
+    matcher = get_matcher()
+    digest = hashlib.sha256()
+    digest.update(parser_fingerprint().encode("utf-8"))
+    digest.update(f"|{matcher.version}|{matcher.fingerprint}|{current_month}|".encode("utf-8"))
+    digest.update(os.environ.get("PARSER_NLP_BACKEND", "auto").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(resume_text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Parse results keyed by cache_key().
+
+    A bounded in-memory LRU sits in front of an optional SQLite file that every
+    worker process can share. Results are stored as JSON, so each get() hands
+    back a fresh copy the caller is free to mutate.
+    """
+
+    def __init__(self, max_entries=1024, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _db(self):
+        # sqlite connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)")
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, key, payload):
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        payload = self.get_payload(key)
+        return loads(payload) if payload is not None else None
+
+    def get_payload(self, key):
+        # The stored result as JSON bytes, for callers that only pass it on
+        # (the API answers a cache hit with them as they are)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+
+            if self.path:
+                row = self._db().execute("SELECT result FROM parse_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    payload = row[0] if isinstance(row[0], bytes) else row[0].encode("utf-8")
+                    if self.max_entries > 0:
+                        self._remember(key, payload)
+                    return payload
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        payload = dumps(result)
+        with self._lock:
+            if self.max_entries > 0:
+                self._remember(key, payload)
+            if self.path:
+                db = self._db()
+                with db:
+                    db.execute("INSERT OR REPLACE INTO parse_cache (key, result, created) VALUES (?, ?, ?)", (key, payload, time.time()))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                db = self._db()
+                with db:
+                    db.execute("DELETE FROM parse_cache")
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_cache = None
+_cache_configured = False
+
+
+def get_cache():
+    # PARSER_CACHE_SIZE bounds the in-memory LRU (0 turns it off) and
+    # PARSER_CACHE_PATH enables the shared SQLite tier. With neither, caching
+    # is disabled and this returns None.
+    global _cache, _cache_configured
+    if not _cache_configured:
+        max_entries = int(os.environ.get("PARSER_CACHE_SIZE", "1024"))
+        path = os.environ.get("PARSER_CACHE_PATH") or None
+        _cache = ParseCache(max_entries, path) if max_entries > 0 or path else None
+        _cache_configured = True
+    return _cache
+
+
+def set_cache(cache):
+    global _cache, _cache_configured
+    _cache, _cache_configured = cache, True
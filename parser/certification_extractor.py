@@ -0,0 +1,94 @@
+import re
+
+from parser.annotations import annotate, text_without
+from parser.utils import BULLET_PATTERN, iter_lines, split_fields
+
+# Between the parts of a certification line: "Name, Issuer, 2022",
+# "Name | Issuer | Mar 2021". Dashes only separate when nothing else does,
+# since names use them too ("Solutions Architect – Associate").
+FIELD_SEPARATOR = re.compile(r"[ \t]*[|,•·][ \t]*")
+DASH_SEPARATOR = re.compile(r"[ \t]+[-–—][ \t]+")
+# Lines that add to the certification above them rather than start one
+CONTINUATION_PATTERN = re.compile(
+    r"[a-z]|(?:Issued|Issuer|Credential|ID|Expires|Expiry|Expiration|Valid|Verify|Verification|License)\b",
+)
+ISSUER_PREFIX = re.compile(r"(?:Issued[ \t]+by|Issuer|by|from)\b[ \t:]*", re.IGNORECASE)
+# Parts that are a detail of the certification, never its issuer
+DETAIL_PATTERN = re.compile(r"(?:Credential|ID|Expires|Expiry|Expiration|Valid|Verify|Verification|License)\b", re.IGNORECASE)
+TRIM = " \t|,;:-–—"
+
+
+class CertificationExtractor:
+    """Reads a Certifications section one certification per line, from the
+    date, URL and organisation spans inside it (parser.annotations). Lines
+    such as "Issued by ..." or "Credential ID ..." fill in the certification
+    above them.
+    """
+
+    def __init__(self, certifications_section_content, annotations=None):
+        self.certifications_section_content = certifications_section_content
+        self.annotations = annotate(certifications_section_content) if annotations is None else annotations
+
+    def extract(self):
+        entries = (self.parse_entry(lines) for lines in self.entries())
+        return [entry for entry in entries if entry["name"]]
+
+    def entries(self):
+        # Yields the (start, end) offsets of the lines of each certification
+        text = self.certifications_section_content
+        lines = []
+        for line_start, line_end, line in iter_lines(text):
+            if not line:
+                continue
+            bullet = BULLET_PATTERN.match(text, line_start, line_end)
+            if bullet:
+                line_start = bullet.end()
+            if lines and self._continues(line_start, line_end):
+                lines.append((line_start, line_end))
+                continue
+            if lines:
+                yield lines
+            lines = [(line_start, line_end)]
+        if lines:
+            yield lines
+
+    def _continues(self, start, end):
+        if CONTINUATION_PATTERN.match(self.certifications_section_content, start, end):
+            return True
+        # A line holding nothing but dates and links
+        spans = self.annotations.within(start, end, "date", "url")
+        return bool(spans) and not text_without(self.certifications_section_content, start, end, spans).strip(TRIM)
+
+    def parse_entry(self, lines):
+        text = self.certifications_section_content
+        start, end = lines[0][0], lines[-1][1]
+        dates = self.annotations.within(start, end, "date")
+        urls = self.annotations.within(start, end, "url")
+        cut = sorted(dates + urls, key=lambda span: span.start)
+
+        parts = []
+        for line_start, line_end in lines:
+            fields = split_fields(text, line_start, line_end, FIELD_SEPARATOR)
+            if len(fields) == 1:
+                fields = split_fields(text, line_start, line_end, DASH_SEPARATOR)
+            parts.extend(fields)
+        values = [(first, last, text_without(text, first, last, cut).strip(TRIM)) for first, last in parts]
+        values = [value for value in values if value[2]]
+        if not values:
+            return {"name": None, "issuer": None, "date": None, "url": None}
+
+        _, name_end, name = values[0]
+        orgs = self.annotations.within(name_end, end, "org")
+        if orgs:
+            issuer = orgs[0].value
+        else:
+            issuer = next((
+                ISSUER_PREFIX.sub("", value, count=1).strip(TRIM) for _, _, value in values[1:]
+                if not DETAIL_PATTERN.match(value)
+            ), None) or None
+        return {
+            "name": name,
+            "issuer": issuer,
+            "date": dates[0].value if dates else None,
+            "url": urls[0].value if urls else None,
+        }
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from parser.batch import chunked, default_workers, init_worker, parse_one
+from parser.serialization import dumps
+
+
+class InvalidRecord(ValueError):
+    """Stands in for the text of an input line that holds no usable record,
+    so the line still gets an output line (with this as its error)."""
+
+
+def iter_jsonl(stream, text_field, id_field, offset=0, line_number=0):
+    # stream is binary, read from byte offset, which is after line line_number
+    for line in stream:
+        line_number += 1
+        offset += len(line)
+        position = {"input_offset": offset, "input_line": line_number}
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, InvalidRecord(f"line {line_number} is not valid JSON: {exc}"), position
+            continue
+        if isinstance(record, str):
+            yield line_number, record, position
+        elif isinstance(record, dict):
+            yield record.get(id_field, line_number), record.get(text_field), position
+        else:
+            yield line_number, InvalidRecord(f"line {line_number} is a JSON {type(record).__name__}, not an object or string"), position
+
+
+def iter_directory(path, start=0):
+    # Sorted so a resumed run sees the files in the same order as the first
+    # one; the first `start` files are skipped without being read
+    index = 0
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".txt"):
+                index += 1
+                if index <= start:
+                    continue
+                file_path = os.path.join(root, name)
+                with open(file_path, encoding="utf-8", errors="replace") as f:
+                    yield os.path.relpath(file_path, path), f.read(), {"input_offset": index}
+
+
+def iter_records(source, text_field="resume_text", id_field="id", resume=None):
+    """Yield (record_id, resume_text, position) from a JSONL file, a
+    directory of .txt files, or stdin when source is "-". position is where
+    the input continues after that record: a byte offset and line number in
+    a JSONL file, a count of files in a directory. Given a checkpoint state
+    as resume, start after its position; stdin, which can't seek, and a
+    checkpoint without a position skip its completed records instead."""
+    resume = resume or {"completed": 0}
+    if source == "-":
+        yield from islice(iter_jsonl(sys.stdin.buffer, text_field, id_field), resume["completed"], None)
+    elif os.path.isdir(source):
+        yield from iter_directory(source, resume.get("input_offset", resume["completed"]))
+    elif "input_offset" in resume:
+        with open(source, "rb") as f:
+            f.seek(resume["input_offset"])
+            yield from iter_jsonl(f, text_field, id_field, resume["input_offset"], resume["input_line"])
+    else:
+        with open(source, "rb") as f:
+            yield from islice(iter_jsonl(f, text_field, id_field), resume["completed"], None)
+
+
+def parse_timed_chunk(records, use_cache=True):
+    outputs = []
+    for record_id, resume_text in records:
+        started = time.perf_counter()
+        if isinstance(resume_text, InvalidRecord):
+            outcome = {"result": None, "error": f"{type(resume_text).__name__}: {resume_text}"}
+        else:
+            outcome = parse_one(resume_text, use_cache)
+        outcome["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        outputs.append(dict(id=record_id, **outcome))
+    return outputs
+
+
+def parse_stream(records, workers=1, window=None, chunksize=16):
+    """Parse (id, text) records in input order.
+
+    At most `window` chunks are in flight at once, so memory stays flat no
+    matter how long the input is.
+    """
+    if workers <= 1:
+        init_worker()
+        for chunk in chunked(records, chunksize):
+            yield from parse_timed_chunk(chunk)
+        return
+
+    window = window or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        pending = deque()
+        for chunk in chunked(records, chunksize):
+            pending.append(executor.submit(parse_timed_chunk, chunk))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {"completed": 0, "output_offset": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _offset(output):
+    # stdout may be a pipe; a resumed run just appends to whatever it is now
+    return 0 if output is sys.stdout else output.tell()
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m parser",
+        description="Parse resumes in bulk and write one NDJSON result per input record.",
+    )
+    arg_parser.add_argument("input", help="JSONL file, directory of .txt files, or - for JSONL on stdin")
+    arg_parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    arg_parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: PARSER_WORKERS or CPU count)")
+    arg_parser.add_argument("--window", type=int, default=None, help="max chunks in flight (default: 2 x workers)")
+    arg_parser.add_argument("--chunksize", type=int, default=16, help="records sent to a worker at a time")
+    arg_parser.add_argument("--checkpoint", default=None, help="checkpoint file; rerun with the same file to resume")
+    arg_parser.add_argument("--checkpoint-every", type=int, default=1000, help="records between checkpoints")
+    arg_parser.add_argument("--text-field", default="resume_text", help="JSONL field holding the resume text")
+    arg_parser.add_argument("--id-field", default="id", help="JSONL field holding the record id")
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    workers = args.workers if args.workers is not None else default_workers()
+
+    state = read_checkpoint(args.checkpoint)
+    skip = state["completed"]
+
+    if args.output == "-":
+        output = sys.stdout
+    else:
+        output = open(args.output, "a+", encoding="utf-8")
+        # Drop anything written after the last checkpoint; those records are
+        # about to be parsed again.
+        output.seek(state["output_offset"] if args.checkpoint else 0)
+        output.truncate()
+
+    # The input position after each record in flight, oldest first; results
+    # come back in input order, so each one written takes the next
+    positions = deque()
+    position = {key: state[key] for key in ("input_offset", "input_line") if key in state}
+
+    def records():
+        for record_id, resume_text, after in iter_records(args.input, args.text_field, args.id_field, state):
+            positions.append(after)
+            yield record_id, resume_text
+
+    completed = skip
+    errors = 0
+    started = time.perf_counter()
+    try:
+        for record in parse_stream(records(), workers=workers, window=args.window, chunksize=args.chunksize):
+            output.write(dumps(record).decode("utf-8") + "\n")
+            completed += 1
+            errors += record["error"] is not None
+            position = positions.popleft()
+            if args.checkpoint and completed % args.checkpoint_every == 0:
+                output.flush()
+                write_checkpoint(args.checkpoint, {"completed": completed, "output_offset": _offset(output), **position})
+    finally:
+        output.flush()
+        if args.checkpoint:
+            write_checkpoint(args.checkpoint, {"completed": completed, "output_offset": _offset(output), **position})
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    parsed = completed - skip
+    rate = parsed / elapsed if elapsed else 0.0
+    print(f"parsed {parsed} records ({errors} errors) in {elapsed:.1f}s, {rate:.1f}/s; {completed} done in total",
+          file=sys.stderr)
+    return 0
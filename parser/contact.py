@@ -0,0 +1,94 @@
+import re
+from collections import namedtuple
+
+# One alternation for every contact field, so the text is walked once instead
+# of once per field. Order matters: at any position the first alternative that
+# matches wins, so specific shapes (email, profile URLs) are tried before the
+# looser ones, and "New York, NY" is claimed as a location before the name
+# pattern can take "New York".
+#
+# Every alternative is linear on any input: the email local part may only
+# start at a token boundary, so a long run of word characters without an "@"
+# is scanned once rather than once from every position in it.
+CONTACT_PATTERN = re.compile(r"""
+      (?P<email>(?<![\w.-])[\w.-]+@[\w.-]+)
+    | (?:https?://)?(?:www\.)?(?P<linkedin>linkedin\.com/in/[\w-]+)
+    | (?:https?://)?(?:www\.)?(?P<github>github\.com/[\w-]+)
+    | (?P<url>https?://[^\s/$.?\#].[^\s]*)
+    | (?P<phone>\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})
+    | (?P<location>[A-Z][a-z]+(?:\ [A-Z][a-z]+)*,\ [A-Z]{2})
+    | (?P<name>[A-Z][a-z]+(?:\ [A-Z]\.?(?=\ ))*(?:\ [A-Z][a-z]+)+)
+""", re.VERBOSE)
+
+Candidate = namedtuple("Candidate", ["field", "value", "start", "end"])
+
+FIELDS = ["full_name", "email", "phone", "location", "linkedin", "github", "portfolio"]
+GROUP_FIELDS = {
+    "name": "full_name",
+    "email": "email",
+    "phone": "phone",
+    "location": "location",
+    "linkedin": "linkedin",
+    "github": "github",
+    "url": "portfolio",
+}
+# Profile links only count when they appear in the header block. Further down
+# the document a URL belongs to a project or an employer, not the candidate.
+HEADER_ONLY_FIELDS = {"linkedin", "github", "portfolio"}
+
+
+def scan_contact_candidates(text, header_end=None):
+    """Walk the text once and collect contact-field candidates with offsets.
+
+    Stops as soon as every field has a candidate, or, once past header_end,
+    as soon as every field that may still come from the body has one.
+    """
+    if header_end is None:
+        header_end = len(text)
+
+    candidates = []
+    found = set()
+    body_fields = set(FIELDS) - HEADER_ONLY_FIELDS
+
+    for match in CONTACT_PATTERN.finditer(text):
+        group = match.lastgroup
+        field = GROUP_FIELDS[group]
+        start = match.start(group)
+
+        if start >= header_end:
+            if body_fields <= found:
+                break
+            if field in HEADER_ONLY_FIELDS:
+                continue
+
+        value = match.group(group)
+        if field == "portfolio" and ("linkedin.com" in value or "github.com" in value):
+            continue
+
+        candidates.append(Candidate(field, value, start, match.end(group)))
+        found.add(field)
+        if len(found) == len(FIELDS):
+            break
+
+    return candidates
+
+
+def header_is_sufficient(header):
+    # True when the header block alone has a candidate for every field that
+    # scan_contact_candidates() would otherwise go on looking for in the body,
+    # i.e. when the contact info depends on nothing but the header.
+    found = {candidate.field for candidate in scan_contact_candidates(header)}
+    return set(FIELDS) - HEADER_ONLY_FIELDS <= found
+
+
+def choose_contact_info(candidates):
+    # Candidates arrive in document order; the earliest one of each field wins
+    info = dict.fromkeys(FIELDS)
+    for candidate in candidates:
+        if info[candidate.field] is None:
+            info[candidate.field] = candidate.value
+    return info
+
+
+def extract_contact_info(text, header_end=None):
+    return choose_contact_info(scan_contact_candidates(text, header_end))
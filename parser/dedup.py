@@ -0,0 +1,340 @@
+"""Near-duplicate detection for resumes, so a copy that differs only by a
+date, a phone format or whitespace isn't parsed from scratch.
+
+A resume is reduced to a set of shingles: every run of SHINGLE_SIZE
+consecutive words inside one section (as split by split_into_sections, after
+normalize_text and lowercasing), hashed together with the section's name. Its
+MinHash signature is NUM_PERM minima of that set under independent hash
+functions; the share of positions where two signatures agree estimates the
+Jaccard similarity of their shingle sets. Punctuation is not a word, so
+"(512) 555-0100" and "512.555.0100" shingle alike.
+
+DuplicateIndex finds similar signatures without comparing against every
+stored one (LSH): a signature is cut into BANDS bands, and each band is
+hashed to a slot of a fixed-size table per band. Documents that agree on a
+whole band land in the same slot, and only those candidates are compared in
+full. The index is rolling: it holds the last `capacity` documents in a ring,
+and the band tables keep only the latest document per slot, so memory is
+fixed however many documents pass through. Each document has an owner (a
+tenant), and a lookup only matches documents of the same owner.
+
+DuplicateDetector puts the index in front of the parser. A resume within the
+threshold of an earlier one joins that one's cluster; if the earlier result
+is still kept, the new resume is parsed incrementally against it: only the
+sections that differ are re-extracted, and nothing else of the earlier
+result is carried over. A resume enters the index only once it has parsed.
+Documents are identified by document_id(), a hash of the normalized text
+alone.
+"""
+import hashlib
+import os
+import string
+import threading
+import zlib
+
+import numpy as np
+
+from parser.cache import ParseCache, normalize_text
+from parser.resume_parser import FIELDS
+from parser.utils import HEADER_SECTION, MAIN_SECTION, split_into_sections
+from parser.versions import VersionStore
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+MODES = ("reparse", "reuse")
+
+# Punctuation separates words; translate() and split() find them several
+# times faster than a \w+ regex
+_PUNCTUATION = str.maketrans(dict.fromkeys(string.punctuation + "\u2022\u00b7\u2013\u2014\u2018\u2019\u201c\u201d\u2026", " "))
+
+# Fixed seeds: signatures must agree between processes and restarts.
+# Each permutation is a multiply-shift hash, (a * x + b) >> 32 mod 2**64.
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_SHINGLE_MULTIPLIERS = _rng.integers(1, 2**63, SHINGLE_SIZE, dtype=np.uint64) | np.uint64(1)
+_BAND_MULTIPLIERS = _rng.integers(1, 2**63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+del _rng
+
+
+def _section_words(resume_text):
+    # (section key, lowercased words) for the header and every section block
+    text = normalize_text(resume_text)
+    sections = split_into_sections(text)
+    spans = [] if MAIN_SECTION in sections else [(HEADER_SECTION, 0, sections.header_end)]
+    spans += [(key, start, end) for key, blocks in sections.spans.items() for start, end in blocks]
+    for key, start, end in spans:
+        words = text[start:end].lower().translate(_PUNCTUATION).split()
+        if words:
+            yield key, words
+
+
+def _shingle_hashes(resume_text):
+    # One 64-bit hash per shingle, duplicates included. All words are hashed
+    # in one array; a shingle never crosses from one section into the next,
+    # and a section shorter than a shingle is one shingle of its own.
+    words, bounds, seeds = [], [0], []
+    for key, found in _section_words(resume_text):
+        words += found
+        bounds.append(len(words))
+        seeds.append(zlib.crc32(key.encode("utf-8")))
+    count = len(words)
+    if not count:
+        return np.zeros(0, dtype=np.uint64)
+    hashed = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=count)
+    bounds = np.array(bounds)
+    owner = np.repeat(np.arange(len(seeds)), np.diff(bounds))
+    ends = bounds[1:][owner]
+    position = np.arange(count)
+    combined = np.array(seeds, dtype=np.uint64)[owner]
+    for offset, multiplier in enumerate(_SHINGLE_MULTIPLIERS):
+        following = np.minimum(position + offset, count - 1)
+        combined += np.where(position + offset < ends, hashed[following], 0) * multiplier
+    return combined[(position + SHINGLE_SIZE <= ends) | (position == bounds[:-1][owner])]
+
+
+def shingles(resume_text):
+    """The sorted, distinct 64-bit shingle hashes of a resume."""
+    return np.unique(_shingle_hashes(resume_text))
+
+
+def signature(resume_text):
+    """The MinHash signature of a resume (NUM_PERM uint32), or None if it has
+    no words at all."""
+    # MinHash takes minima, so repeated shingles need not be removed
+    values = _shingle_hashes(resume_text)
+    if not len(values):
+        return None
+    # In place, wrapping mod 2**64; the shift keeps order, so it can follow the min
+    hashed = np.multiply.outer(_PERM_A, values)
+    hashed += _PERM_B[:, None]
+    return (hashed.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+
+def document_id(resume_text):
+    """A resume's id in the index: the same text is the same document in any
+    month and under any parser version (unlike a VersionStore version id)."""
+    return hashlib.sha256(normalize_text(resume_text).encode("utf-8")).hexdigest()[:32]
+
+
+def similarity(a, b):
+    # Estimated Jaccard similarity of the two shingle sets
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class DuplicateIndex:
+    """The last `capacity` signatures, searchable by similarity.
+
+    Every document gets a sequence number, and its cluster id is the
+    sequence number of the first document of its cluster. Not thread-safe;
+    DuplicateDetector locks around it.
+    """
+
+    def __init__(self, capacity=100_000, threshold=0.9):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.count = 0
+        self.signatures = np.zeros((capacity, NUM_PERM), dtype=np.uint32)
+        self.clusters = np.zeros(capacity, dtype=np.int64)
+        self.documents = [None] * capacity
+        self.owners = [None] * capacity
+        table_size = 1 << max(10, (capacity - 1).bit_length())
+        self._mask = np.uint64(table_size - 1)
+        self._bands = np.arange(BANDS)
+        # Per band and slot: the latest ring position there and a check value
+        # from the rest of the band's hash, to skip most unrelated documents
+        self._positions = np.full((BANDS, table_size), -1, dtype=np.int32)
+        self._checks = np.zeros((BANDS, table_size), dtype=np.uint32)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _band_hashes(self, sig):
+        bands = sig.reshape(BANDS, -1).astype(np.uint64)
+        hashes = (bands * _BAND_MULTIPLIERS).sum(axis=1)
+        return hashes & self._mask, (hashes >> np.uint64(32)).astype(np.uint32)
+
+    def query(self, sig, owner=None):
+        """(ring position, similarity) of owner's most similar stored
+        document at or above the threshold, or None."""
+        slots, checks = self._band_hashes(sig)
+        positions = self._positions[self._bands, slots]
+        candidates = np.unique(positions[(positions >= 0) & (self._checks[self._bands, slots] == checks)])
+        candidates = candidates[np.fromiter((self.owners[c] == owner for c in candidates), dtype=bool, count=len(candidates))]
+        if not len(candidates):
+            return None
+        scores = np.count_nonzero(self.signatures[candidates] == sig, axis=1)
+        best = int(np.argmax(scores))
+        score = scores[best] / NUM_PERM
+        return (int(candidates[best]), float(score)) if score >= self.threshold else None
+
+    def add(self, sig, document, cluster=None, owner=None):
+        """Store a signature, overwriting the oldest once full. Returns the
+        document's cluster id: the one given, or a new one."""
+        sequence = self.count
+        position = sequence % self.capacity
+        self.count += 1
+        cluster = sequence if cluster is None else cluster
+        self.signatures[position] = sig
+        self.clusters[position] = cluster
+        self.documents[position] = document
+        self.owners[position] = owner
+        slots, checks = self._band_hashes(sig)
+        self._positions[self._bands, slots] = position
+        self._checks[self._bands, slots] = checks
+        return cluster
+
+    def stats(self):
+        return {"documents": len(self), "capacity": self.capacity, "inserted": self.count}
+
+
+class NearDuplicate:
+    """What DuplicateDetector.check() found for one resume."""
+
+    __slots__ = ("cluster_id", "duplicate_of", "similarity", "base", "pending")
+
+    def __init__(self, cluster_id, duplicate_of=None, similarity=None, base=None, pending=None):
+        # None for a new resume until record() gives it a cluster of its own
+        self.cluster_id = cluster_id
+        # The document_id() of the most similar earlier resume, or None if
+        # there was none
+        self.duplicate_of = duplicate_of
+        self.similarity = similarity
+        # That resume's {"resume_text", "result"}, if it is still kept
+        self.base = base
+        # (signature, document id, owner) for record() to add to the index,
+        # or None when the resume is there already
+        self.pending = pending
+
+    def __repr__(self):
+        return f"NearDuplicate(cluster_id={self.cluster_id}, duplicate_of={self.duplicate_of!r}, similarity={self.similarity})"
+
+
+def changed_fields(previous, result):
+    # The fields whose values differ between two complete results
+    return [name for name in FIELDS if previous.get(name) != result.get(name)]
+
+
+class DuplicateDetector:
+    """Clusters incoming resumes by near-duplication and keeps recent results
+    to answer later near-duplicates from.
+
+    check() is called before parsing; record() after, with the result, and
+    only if the parse succeeded: that is when the resume enters the index.
+    Resumes are matched only within one tenant, so neither a cluster nor a
+    kept result is ever shared between tenants. The
+    last keep_results results are kept by document id, so a near-duplicate
+    of an older resume still gets its cluster id but is parsed in full, as
+    is one whose earlier result came from another month or parser version.
+    A near-duplicate is parsed incrementally against parse_base(match),
+    which gives exactly the full parse. In "reparse" mode (the default) the
+    earlier personal_info is carried over when the header block is
+    identical; in "reuse" mode it never is, so no contact detail is ever
+    taken from another document.
+    """
+
+    def __init__(self, capacity=100_000, threshold=0.9, keep_results=1024, mode="reparse"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.index = DuplicateIndex(capacity, threshold)
+        self.results = ParseCache(keep_results) if keep_results > 0 else None
+        self.reuse = mode == "reuse"
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.near_duplicates = 0
+
+    def check(self, resume_text, tenant=None):
+        """Look a resume up among tenant's earlier ones. Returns a
+        NearDuplicate, or None for a resume without any words."""
+        sig = signature(resume_text)
+        if sig is None:
+            return None
+        document = document_id(resume_text)
+        with self._lock:
+            self.checked += 1
+            found = self.index.query(sig, tenant)
+            if found is None:
+                return NearDuplicate(None, pending=(sig, document, tenant))
+            position, score = found
+            cluster, earlier = int(self.index.clusters[position]), self.index.documents[position]
+            if earlier == document:
+                # Seen before verbatim; it is in the index already
+                return NearDuplicate(cluster)
+            self.near_duplicates += 1
+        base = self.results.get(earlier) if self.results is not None else None
+        # One parsed in an earlier month or by other parser code may not hold
+        if base is not None and base.pop("version_id") != VersionStore.version_id(base["resume_text"]):
+            base = None
+        return NearDuplicate(cluster, earlier, round(score, 4), base, (sig, document, tenant))
+
+    def check_many(self, resume_texts, tenant=None):
+        return [self.check(text, tenant) for text in resume_texts]
+
+    def parse_base(self, match):
+        """The {"resume_text", "result"} to parse a checked resume
+        incrementally against (see parse_incremental_one), or None for a
+        full parse. In reuse mode it has no personal_info."""
+        if match is None or match.base is None:
+            return None
+        if not self.reuse:
+            return match.base
+        result = {name: value for name, value in match.base["result"].items() if name != "personal_info"}
+        return {"resume_text": match.base["resume_text"], "result": result}
+
+    def record(self, resume_text, match, result):
+        """Add a successfully parsed resume to the index, keep its result
+        for later near-duplicates and return the "duplicate" report to attach
+        to it, or None if the resume was not a near-duplicate of an earlier
+        one."""
+        if match is not None and match.pending is not None:
+            sig, document, tenant = match.pending
+            with self._lock:
+                match.cluster_id = self.index.add(sig, document, match.cluster_id, tenant)
+            match.pending = None
+        if self.results is not None and not result.get("partial"):
+            self.results.put(document_id(resume_text), {
+                "resume_text": resume_text, "result": result, "version_id": VersionStore.version_id(resume_text),
+            })
+        if match is None or match.duplicate_of is None:
+            return None
+        return {
+            "cluster_id": match.cluster_id, "duplicate_of": match.duplicate_of, "similarity": match.similarity,
+            "changed_fields": changed_fields(match.base["result"], result) if match.base is not None else None,
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.index.stats(), checked=self.checked, near_duplicates=self.near_duplicates)
+        stats["results"] = self.results.stats() if self.results is not None else None
+        return stats
+
+
+_detector = None
+_detector_configured = False
+
+
+def get_detector():
+    # PARSER_DEDUP=on turns near-duplicate detection on; until then this
+    # returns None and no index is allocated. PARSER_DEDUP_SIZE is how many signatures the rolling index holds,
+    # PARSER_DEDUP_THRESHOLD the similarity that counts as a near-duplicate,
+    # PARSER_DEDUP_RESULTS how many results are kept to answer them from and
+    # PARSER_DEDUP_MODE "reparse" or "reuse".
+    global _detector, _detector_configured
+    if not _detector_configured:
+        if os.environ.get("PARSER_DEDUP", "off").lower() not in ("1", "on", "true", "yes"):
+            _detector = None
+        else:
+            _detector = DuplicateDetector(
+                capacity=int(os.environ.get("PARSER_DEDUP_SIZE", "100000")),
+                threshold=float(os.environ.get("PARSER_DEDUP_THRESHOLD", "0.9")),
+                keep_results=int(os.environ.get("PARSER_DEDUP_RESULTS", "1024")),
+                mode=os.environ.get("PARSER_DEDUP_MODE", "reparse").lower(),
+            )
+        _detector_configured = True
+    return _detector
+
+
+def set_detector(detector):
+    global _detector, _detector_configured
+    _detector, _detector_configured = detector, True
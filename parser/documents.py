@@ -0,0 +1,164 @@
+"""Text extraction from uploaded resume files: PDF, DOCX and plain text.
+
+Runs in the parse workers, on a file the API has already written to disk.
+Nothing here reads a whole file into memory. Plain text is decoded straight
+out of a memory map. DOCX XML is streamed out of the zip one element at a
+time. PDF pages are extracted one by one through pypdf, which is optional
+(pip install pypdf). Extraction stops once it has max_chars characters (the
+parser's PARSER_MAX_CHARS), since the parser would drop the rest anyway, and,
+given a deadline, once that has passed (checked before each PDF page and
+DOCX paragraph).
+"""
+import mmap
+import os
+import time
+import zipfile
+from xml.etree import ElementTree
+
+FORMATS = ("pdf", "docx", "txt")
+EXTENSIONS = {".pdf": "pdf", ".docx": "docx", ".txt": "txt", ".text": "txt", ".md": "txt"}
+CONTENT_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/plain": "txt",
+    "text/markdown": "txt",
+}
+
+# A DOCX body is XML inside a zip; refuse to inflate one past this, whatever
+# the upload size (a few KB of zip can claim gigabytes)
+MAX_DOCX_XML_BYTES = 64 * 1024 * 1024
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class DocumentError(ValueError):
+    """The file could not be read as a resume."""
+
+
+class UnsupportedDocument(DocumentError):
+    """The file is not a format we extract text from."""
+
+
+def detect_format(path, filename=None, content_type=None):
+    # The file's own signature wins over what the client claims
+    with open(path, "rb") as f:
+        head = f.read(8)
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    claimed = EXTENSIONS.get(os.path.splitext(filename or "")[1].lower()) or CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+    if head.startswith(b"PK\x03\x04"):
+        if claimed in (None, "docx"):
+            return "docx"
+        raise UnsupportedDocument("zip archives other than .docx are not supported")
+    if claimed in (None, "txt"):
+        return "txt"
+    raise UnsupportedDocument(f"file does not look like a {claimed.upper()}")
+
+
+def extract_text(path, kind=None, max_chars=None, deadline=None):
+    """Text of the document at path. kind is one of FORMATS (detected when
+    None); max_chars of 0 means no limit, None means PARSER_MAX_CHARS.
+    deadline, a time.perf_counter() value, ends extraction early with the
+    text read so far."""
+    if max_chars is None:
+        from parser.resume_parser import default_max_chars
+        max_chars = default_max_chars()
+    kind = kind or detect_format(path)
+    if kind == "txt":
+        return _extract_txt(path, max_chars)
+    if kind == "docx":
+        return _extract_docx(path, max_chars, deadline)
+    if kind == "pdf":
+        return _extract_pdf(path, max_chars, deadline)
+    raise UnsupportedDocument(f"unsupported format: {kind}")
+
+
+def _expired(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def _extract_txt(path, max_chars):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                start = 3 if view[:3] == b"\xef\xbb\xbf" else 0
+                # UTF-8 is at most 4 bytes a character, so this many bytes
+                # always holds max_chars characters; only they are decoded
+                end = min(len(view), start + max_chars * 4) if max_chars else len(view)
+                text = str(view[start:end], "utf-8", errors="replace")
+    return text[:max_chars] if max_chars else text
+
+
+def _extract_docx(path, max_chars, deadline=None):
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as exc:
+        raise DocumentError(f"not a valid .docx file: {exc}") from exc
+    with archive:
+        try:
+            info = archive.getinfo("word/document.xml")
+        except KeyError:
+            raise DocumentError("not a .docx file: word/document.xml is missing") from None
+        if info.file_size > MAX_DOCX_XML_BYTES:
+            raise DocumentError(f"document body is too large ({info.file_size} bytes uncompressed)")
+
+        parts = []
+        chars = 0
+        paragraph = []
+        with archive.open(info) as xml:
+            try:
+                for event, element in ElementTree.iterparse(xml, events=("end",)):
+                    tag = element.tag
+                    if tag == _WORD_NS + "t":
+                        paragraph.append(element.text or "")
+                    elif tag == _WORD_NS + "tab":
+                        paragraph.append("\t")
+                    elif tag in (_WORD_NS + "br", _WORD_NS + "cr"):
+                        paragraph.append("\n")
+                    elif tag == _WORD_NS + "p":
+                        line = "".join(paragraph)
+                        paragraph = []
+                        parts.append(line)
+                        chars += len(line) + 1
+                        if (max_chars and chars >= max_chars) or _expired(deadline):
+                            break
+                    else:
+                        continue
+                    # Elements are dropped once read so the tree never grows
+                    element.clear()
+            except ElementTree.ParseError as exc:
+                raise DocumentError(f"not a valid .docx file: {exc}") from exc
+    text = "\n".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def _extract_pdf(path, max_chars, deadline=None):
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError:
+        raise UnsupportedDocument("PDF support needs pypdf; run `pip install pypdf`") from None
+
+    pages = []
+    chars = 0
+    # An open file, not the path: given a path, pypdf reads the whole file
+    # into memory first
+    with open(path, "rb") as f:
+        try:
+            reader = PdfReader(f)
+            if reader.is_encrypted and not reader.decrypt(""):
+                raise DocumentError("PDF is password protected")
+            for page in reader.pages:
+                if _expired(deadline):
+                    break
+                text = page.extract_text() or ""
+                pages.append(text)
+                chars += len(text) + 1
+                if max_chars and chars >= max_chars:
+                    break
+        except PdfReadError as exc:
+            raise DocumentError(f"not a valid PDF: {exc}") from exc
+    text = "\n".join(pages)
+    return text[:max_chars] if max_chars else text
@@ -0,0 +1,117 @@
+import re
+
+from parser.annotations import annotate
+from parser.experience_extractor import PRESENT_PATTERN
+from parser.utils import BULLET_PATTERN, iter_lines, split_fields
+
+# Between the parts of an entry: "Degree, Institution | Dates"
+FIELD_SEPARATOR = re.compile(r"[ \t]*[|,•·\n][ \t]*|[ \t]+[-–—][ \t]+")
+# The field of study straight after a degree: "B.S. in Physics",
+# "Master of Science (Data Science)", "BSc, Computer Science"
+FIELD_OF_STUDY = re.compile(
+    r"[ \t]*(?:degree[ \t]+)?(?:,|:|\(|[-–—]|in\b|of\b)?[ \t]*"
+    r"(?P<field>[A-Z][\w&/'-]*(?:[ \t]+(?:(?:and|&|of)[ \t]+)?[A-Z][\w&/'-]*)*)"
+)
+
+
+class EducationExtractor:
+    """Splits an Education section into entries and reads each one from the
+    degree, organisation and date spans inside it (parser.annotations).
+
+    A new entry starts after a blank line, and at a line naming an
+    institution or a degree once the current entry already has one, so
+    one-line entries and an institution line followed by its degree line
+    both come out right.
+    """
+
+    def __init__(self, education_section_content, annotations=None):
+        self.education_section_content = education_section_content
+        self.annotations = annotate(education_section_content) if annotations is None else annotations
+
+    def extract(self):
+        entries = (self.parse_entry(start, end) for start, end in self.entries())
+        return [entry for entry in entries if entry["institution"] or entry["degree"]]
+
+    def entries(self):
+        # Yields (start, end) offsets of each entry in the section
+        start = end = None
+        seen = set()
+        after_blank = False
+        for line_start, line_end, line in iter_lines(self.education_section_content):
+            if not line:
+                after_blank = True
+                continue
+            kinds = {span.kind for span in self.annotations.within(line_start, line_end, "org", "degree")}
+            if start is not None and (kinds & seen or after_blank and not BULLET_PATTERN.match(line)):
+                yield start, end
+                start, seen = None, set()
+            after_blank = False
+            if start is None:
+                start = line_start
+            end = line_end
+            seen |= kinds
+        if start is not None:
+            yield start, end
+
+    def parse_entry(self, start, end):
+        text = self.education_section_content
+        spans = self.annotations.within(start, end, "org", "degree", "date", "url")
+        degree = next((span for span in spans if span.kind == "degree"), None)
+        org = next((span for span in spans if span.kind == "org"), None)
+
+        field = None
+        taken = [(span.start, span.end) for span in spans]
+        if degree is not None:
+            field = self._field_of_study(degree, spans, end)
+            if field is not None:
+                taken.append(field)
+
+        institution = org.value if org is not None else None
+        if institution is None and degree is not None:
+            # A degree but no recognisable institution name ("MIT"): the first
+            # part of the entry that is none of the other fields
+            institution = next((
+                text[first:last] for first, last in split_fields(text, start, self._header_end(start, end), FIELD_SEPARATOR)
+                if text[first].isupper() and not any(first < taken_end and taken_start < last for taken_start, taken_end in taken)
+            ), None)
+
+        start_date, end_date = self._dates([span for span in spans if span.kind == "date"])
+        return {
+            "institution": institution,
+            "degree": degree.value if degree is not None else None,
+            "field": text[field[0]:field[1]] if field is not None else None,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+
+    def _field_of_study(self, degree, spans, end):
+        # (start, end) of the field named after the degree, cut short where
+        # another entity (the institution, a date) begins
+        match = FIELD_OF_STUDY.match(self.education_section_content, degree.end, end)
+        if match is None:
+            return None
+        first, last = match.span("field")
+        for span in spans:
+            if first <= span.start < last:
+                last = span.start
+                break
+        while last > first and self.education_section_content[last - 1] in " \t,-–—(":
+            last -= 1
+        return (first, last) if last > first else None
+
+    def _header_end(self, start, end):
+        # End of the entry's lines before its first bullet
+        for line_start, line_end, line in iter_lines(self.education_section_content[start:end]):
+            if line and BULLET_PATTERN.match(line):
+                return start + line_start
+        return end
+
+    @staticmethod
+    def _dates(dates):
+        # A range gives both dates (its end span always follows its start);
+        # otherwise a lone date is the graduation date
+        for i, span in enumerate(dates):
+            if span.category == "start":
+                end = dates[i + 1].value
+                return span.value, None if PRESENT_PATTERN.match(end) else end
+        return None, dates[-1].value if dates else None
@@ -1,57 +1,187 @@
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+import logging
+import re
+from datetime import date
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Dates are handled as month ordinals (year * 12 + month - 1) so that tenure
+# arithmetic is plain integer maths.
+PRESENT = "present"
+# Stand-ins for PRESENT, unreadable and missing dates in calculate_many's integer arrays
+PRESENT_CODE, UNPARSED, MISSING = -2, -1, -3
+PRESENT_WORDS = {"present", "current", "currently", "now", "today", "ongoing", "to date", "date"}
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+SEASONS = {"spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 1}
+
+DATE_PATTERNS = [
+    # Jan 2020, January 2020, Sept. 2019, Summer 2019
+    re.compile(r"^(?P<word>[a-z]+)\.?,?\s*(?P<year>\d{4})$"),
+    # 01/2020, 1/2020, 01-2020, 01.2020
+    re.compile(r"^(?P<month>\d{1,2})[/.\-](?P<year>\d{4})$"),
+    # 2020-01, 2020/01, 2020-01-15
+    re.compile(r"^(?P<year>\d{4})[/.\-](?P<month>\d{1,2})(?:[/.\-]\d{1,2})?$"),
+    # 01/15/2020
+    re.compile(r"^(?P<month>\d{1,2})[/.\-]\d{1,2}[/.\-](?P<year>\d{4})$"),
+    # 2020
+    re.compile(r"^(?P<year>\d{4})$"),
+]
+
+
+@lru_cache(maxsize=8192)
+def normalize_date(value):
+    """Return the month ordinal for a resume date string, PRESENT for
+    "Present"/"Current"/..., or None if it can't be read.
+
+    Results are memoised: the same few hundred date strings recur across
+    millions of resumes.
+    """
+    text = value.strip().lower()
+    if text in PRESENT_WORDS:
+        return PRESENT
+
+    for pattern in DATE_PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        year = int(match.group("year"))
+        groups = match.groupdict()
+        if groups.get("word") is not None:
+            month = MONTHS.get(groups["word"]) or SEASONS.get(groups["word"])
+        elif groups.get("month") is not None:
+            month = int(groups["month"])
+        else:
+            month = 1 # Only a year was given
+        if month is None or not 1 <= month <= 12 or not 1900 <= year <= 2100:
+            return None
+        return year * 12 + month - 1
+    return None
+
+
+def merged_months(intervals):
+    # Union length of [start, end) month intervals, so overlapping or
+    # concurrent jobs are only counted once.
+    total = 0
+    covered_until = None
+    for start, end in sorted(intervals):
+        if covered_until is None or start >= covered_until:
+            total += end - start
+            covered_until = end
+        elif end > covered_until:
+            total += end - covered_until
+            covered_until = end
+    return total
+
 
 class ExperienceCalculator:
-    def __init__(self):
-        pass
+    def __init__(self, as_of=None):
+        # as_of pins "today" (a date) for Present/ongoing roles; defaults to the real date
+        self.as_of = as_of
+        self.unparsed_dates = []
+
+    def current_month(self):
+        today = self.as_of or date.today()
+        return today.year * 12 + today.month - 1
+
+    def experience_intervals(self, experiences, current_month=None):
+        if current_month is None:
+            current_month = self.current_month()
+        intervals = []
 
-    def calculate_total_experience(self, experiences):
-        total_delta = relativedelta()
         for exp in experiences:
             start_date_str = exp.get("start_date")
             end_date_str = exp.get("end_date")
-            is_current = exp.get("is_current", False)
 
             if not start_date_str:
                 continue
 
-            try:
-                # Handle cases where only year is provided
-                if len(start_date_str) == 4 and start_date_str.isdigit():
-                    start_date = datetime.strptime(start_date_str, "%Y")
-                else:
-                    start_date = datetime.strptime(start_date_str, "%b %Y") # e.g., Jan 2020
-            except ValueError:
-                # Try another common format if "%b %Y" fails
-                try:
-                    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-                except ValueError:
-                    print(f"Warning: Could not parse start_date: {start_date_str}")
-                    continue
+            start = normalize_date(start_date_str)
+            if start is None or start == PRESENT:
+                self._unparsed(start_date_str, "start_date")
+                continue
 
-            if is_current:
-                end_date = datetime.now()
-            elif end_date_str:
-                try:
-                    if len(end_date_str) == 4 and end_date_str.isdigit():
-                        end_date = datetime.strptime(end_date_str, "%Y")
-                    else:
-                        end_date = datetime.strptime(end_date_str, "%b %Y")
-                except ValueError:
-                    # Try another common format if "%b %Y" fails
-                    try:
-                        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-                    except ValueError:
-                        print(f"Warning: Could not parse end_date: {end_date_str}")
-                        continue
+            if exp.get("is_current", False) or not end_date_str:
+                # Assume current if no end date and not marked as current (fallback)
+                end = current_month
             else:
-                end_date = datetime.now() # Assume current if no end date and not marked as current (fallback)
+                end = normalize_date(end_date_str)
+                if end == PRESENT:
+                    end = current_month
+                elif end is None:
+                    self._unparsed(end_date_str, "end_date")
+                    continue
+
+            if end > start:
+                intervals.append((start, end))
+        return intervals
+
+    def _unparsed(self, value, field):
+        logger.warning("Could not parse %s: %r", field, value)
+        self.unparsed_dates.append(value)
+
+    def calculate_total_experience(self, experiences):
+        self.unparsed_dates = []
+        months = merged_months(self.experience_intervals(experiences))
+        return round(months / 12, 2)
+
+    def calculate_many(self, experience_lists):
+        """Total years of experience for many resumes at once.
+
+        Each distinct date string is normalised once, and the filtering,
+        interval merging and summing run as numpy array operations over every
+        resume's jobs together, which is what makes analytics backfills cheap.
+        """
+        import numpy as np
+
+        self.unparsed_dates = []
+        current_month = self.current_month()
+        totals = np.zeros(len(experience_lists))
+        jobs = [exp for experiences in experience_lists for exp in experiences]
+        if not jobs:
+            return totals.tolist()
+
+        start_strs = [exp.get("start_date") or "" for exp in jobs]
+        end_strs = [exp.get("end_date") or "" for exp in jobs]
+        codes = {"": MISSING}
+        for value in set(start_strs).union(end_strs):
+            if value not in codes:
+                month = normalize_date(value)
+                codes[value] = UNPARSED if month is None else PRESENT_CODE if month == PRESENT else month
+
+        owners = np.repeat(np.arange(len(experience_lists)), [len(experiences) for experiences in experience_lists])
+        starts = np.array(list(map(codes.__getitem__, start_strs)), dtype=np.int64)
+        ends = np.array(list(map(codes.__getitem__, end_strs)), dtype=np.int64)
+        is_current = np.array([bool(exp.get("is_current", False)) for exp in jobs], dtype=bool)
+
+        ongoing = is_current | (ends == MISSING) | (ends == PRESENT_CODE)
+        ends = np.where(ongoing, current_month, ends)
+        bad_start = (starts == UNPARSED) | (starts == PRESENT_CODE)
+        bad_end = ends == UNPARSED
+        for field, bad, strs in (("start_date", bad_start, start_strs), ("end_date", bad_end & ~bad_start, end_strs)):
+            for i in np.flatnonzero(bad):
+                self._unparsed(strs[i], field)
+
+        keep = (starts >= 0) & (ends >= 0) & (ends > starts)
+        owners, starts, ends = owners[keep], starts[keep], ends[keep]
+        if len(owners):
+            # Sort by (resume, start). Offsetting every resume's months by a
+            # per-resume constant larger than any month ordinal lets a single
+            # running maximum stand in for a per-resume one.
+            order = np.lexsort((starts, owners))
+            owners, starts, ends = owners[order], starts[order], ends[order]
+            offset = owners * (int(ends.max()) + 1)
+            covered_until = np.maximum.accumulate(ends + offset) - offset
+            previous = np.concatenate(([-1], covered_until[:-1]))
+            previous[1:][owners[1:] != owners[:-1]] = -1
 
-            if start_date and end_date and end_date > start_date:
-                total_delta += relativedelta(end_date, start_date)
+            # Each interval adds only the months not already covered by an earlier one
+            added = np.clip(ends - np.maximum(starts, previous), 0, None)
+            totals = np.bincount(owners, weights=added, minlength=len(experience_lists))
 
-        # Convert total_delta to years. This is an approximation
-        # considering 12 months per year and 30 days per month for simplicity.
-        # relativedelta directly gives years, months, days.
-        total_years = total_delta.years + total_delta.months / 12 + total_delta.days / 365.25
-        return round(total_years, 2)
+        return np.round(totals / 12, 2).tolist()
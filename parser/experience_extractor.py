@@ -0,0 +1,210 @@
+import re
+
+from parser.taxonomy import get_matcher, in_list_context
+from parser.utils import iter_lines
+
+# Skill categories whose matches count as the technologies used in a job
+TECHNOLOGY_CATEGORIES = ("technical", "frameworks", "tools")
+
+# All patterns here match in linear time on any input: no quantified group can
+# match the same text in more than one way, and runs that a search could
+# restart inside (capitalised words before a location) are bounded.
+ROLE_WORDS = (
+    r"\b(?:Engineer|Developer|Manager|Analyst|Consultant|Contractor|Intern|Director|Architect"
+    r"|Scientist|Designer|Researcher|Fellow|Lecturer|Professor|Assistant)s?\b"
+)
+COMPANY_SUFFIXES = r"\b(?:Inc|Corp|Corporation|LLC|LLP|Ltd|Limited|GmbH|PLC)\b"
+MONTH = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?"
+    r"|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?|Spring|Summer|Fall|Autumn|Winter)"
+)
+MONTH_YEAR = rf"(?:(?:{MONTH})\.?,?\s*)?\d{{4}}|\d{{1,2}}/\d{{4}}"
+PRESENT = r"(?:Present|Current|Now|Today)\b"
+RANGE_SEPARATOR = r"\s*(?:-+|–|—|to)\s*"
+DATE_RANGE = rf"(?i:(?:{MONTH_YEAR}){RANGE_SEPARATOR}(?:{MONTH_YEAR}|{PRESENT}))"
+COUNTRIES = (
+    r"(?:USA|US|UK|United\ States|United\ Kingdom|Canada|India|Germany|France|Spain|Italy|Netherlands|Ireland"
+    r"|Australia|Singapore|Japan|China|Brazil|Mexico|Israel|Poland|Sweden|Switzerland|Remote)"
+)
+LOCATION = rf"(?<!\w)(?:[A-Z][a-z]+[\ \-]){{0,3}}[A-Z][a-z]+,\ (?:[A-Z]{{2}}|{COUNTRIES})\b|\bRemote\b"
+
+# Tags a (stripped) experience line in one search: a bullet, a line holding
+# only a date range, a structured header ("Role at Company", anything with
+# " | "), a bare title line (a role or company name on its own), or, with no
+# match, a continuation of the previous line.
+LINE_PATTERN = re.compile(rf"""
+      ^(?P<bullet>[-•*▪◦‣●–])
+    | ^(?P<dates>{DATE_RANGE})\s*$
+    | ^(?P<entry>(?=[^|]*\|)|\S+\ (?:at|@)\ \S)
+    | (?P<title>(?i:{ROLE_WORDS})|{COMPANY_SUFFIXES})
+""", re.VERBOSE)
+
+# Pulls the date range and the location out of an entry's header in a single
+# scan; whatever is left over is the role and the company. A range can only
+# start at a letter or digit that doesn't continue a word, which lets the scan
+# skip most positions without trying every month name.
+HEADER_PATTERN = re.compile(
+    rf"(?<![\w/])(?=[A-Za-z\d])(?P<dates>(?i:(?P<start>{MONTH_YEAR}){RANGE_SEPARATOR}(?P<end>{MONTH_YEAR}|{PRESENT})))|(?P<location>{LOCATION})"
+)
+PRESENT_PATTERN = re.compile(PRESENT, re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"(?<!\d)\d{4}(?!\d)")
+ROLE_PATTERN = re.compile(ROLE_WORDS, re.IGNORECASE)
+COMPANY_PATTERN = re.compile(COMPANY_SUFFIXES)
+# Splits "Role at Company", "Role @ Company" and "Role, Company"
+ROLE_COMPANY_SEPARATOR = re.compile(r" (?:at|@) |, ")
+
+
+class ExperienceExtractor:
+    """Splits an Experience section into job entries and extracts each one.
+
+    Every line is tagged once by LINE_PATTERN, which decides where entries
+    start; each entry's header is then read by HEADER_PATTERN. Its
+    technologies are the skill and tool spans inside it when the section's
+    annotations (parser.annotations) are given, and are otherwise matched
+    against the skill taxonomy here.
+    """
+
+    def __init__(self, experience_section_content, matcher=None, annotations=None):
+        self.experience_section_content = experience_section_content
+        self.matcher = matcher or get_matcher()
+        self.annotations = annotations
+
+    def extract(self):
+        return [self.parse_entry(*entry) for entry in self.entries()]
+
+    def entries(self):
+        # Yields (header_lines, description_lines, (start, end)) per job, the
+        # offsets bounding its lines in the section. A new entry starts
+        # at a header or title line once the current entry has bullets or a
+        # structured header already, and at a date line once it has bullets
+        # or dates; so "Role" / "Company" / "Dates" on separate lines, with
+        # the bullets after them, stay one entry.
+        header_lines, description_lines = [], []
+        has_entry_line = has_dates = False
+        start = end = 0
+
+        for line_start, line_end, line in iter_lines(self.experience_section_content):
+            if not line:
+                continue
+            if not header_lines and not description_lines:
+                start = line_start
+            match = LINE_PATTERN.search(line)
+            kind = match.lastgroup if match else None
+
+            if kind == "bullet" or (kind is None and description_lines):
+                description_lines.append(line)
+                end = line_end
+                continue
+
+            if kind in ("entry", "title"):
+                starts_entry = bool(description_lines) or has_entry_line
+            elif kind == "dates":
+                starts_entry = bool(description_lines) or has_dates
+            else:
+                starts_entry = False
+            if starts_entry:
+                yield header_lines, description_lines, (start, end)
+                header_lines, description_lines = [], []
+                has_entry_line = has_dates = False
+                start = line_start
+
+            header_lines.append(line)
+            end = line_end
+            has_entry_line = has_entry_line or kind == "entry"
+            has_dates = has_dates or kind == "dates"
+
+        if header_lines or description_lines:
+            yield header_lines, description_lines, (start, end)
+
+    def parse_entry(self, header_lines, description_lines, span=None):
+        header = " | ".join(header_lines)
+        start_date = end_date = location = None
+        is_current = False
+
+        # Dates and location in one scan; the text between them is kept for
+        # the role and company
+        leftovers = []
+        position = 0
+        for match in HEADER_PATTERN.finditer(header):
+            if match.lastgroup == "dates" and start_date is None:
+                start_date = match.group("start")
+                end = match.group("end")
+                if PRESENT_PATTERN.match(end):
+                    is_current = True
+                else:
+                    end_date = end
+            elif match.lastgroup == "location" and location is None:
+                location = match.group("location")
+            else:
+                continue
+            leftovers.append(header[position:match.start()])
+            position = match.end()
+        leftovers.append(header[position:])
+
+        if start_date is None:
+            # No range: fall back to bare years ("2018 2019", "2020 Present")
+            years = YEAR_PATTERN.findall(header)
+            if len(years) >= 2:
+                start_date, end_date = years[0], years[1]
+            elif len(years) == 1 and PRESENT_PATTERN.search(header):
+                start_date, is_current = years[0], True
+            if start_date is not None:
+                leftovers = [PRESENT_PATTERN.sub("", YEAR_PATTERN.sub("", chunk)) for chunk in leftovers]
+
+        role, company = self._role_and_company(leftovers)
+        description = "\n".join(description_lines)
+        return {
+            "company": company,
+            "role": role,
+            "location": location,
+            "start_date": start_date,
+            "end_date": end_date,
+            "is_current": is_current,
+            "description": description,
+            "technologies": self.technologies(header + "\n" + description, span),
+        }
+
+    @staticmethod
+    def _role_and_company(leftovers):
+        parts = [
+            part.strip(" ,;-–—()")
+            for chunk in leftovers
+            for part in chunk.split("|")
+        ]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None, None
+
+        # "Role at Company" / "Role, Company" in the first part wins over the
+        # next " | " part (usually a location or team) unless what follows
+        # the comma is just a suffix, as in "Foo, Inc."
+        split = [part.strip(" ,") for part in ROLE_COMPANY_SEPARATOR.split(parts[0], 1)]
+        if len(split) == 2 and all(split) and not COMPANY_PATTERN.fullmatch(split[1].rstrip(".")):
+            first, second = split
+        else:
+            first = parts[0]
+            second = parts[1] if len(parts) > 1 else None
+
+        if second is None:
+            return (first, None) if ROLE_PATTERN.search(first) else (None, first)
+        if not ROLE_PATTERN.search(first) and (COMPANY_PATTERN.search(first) or ROLE_PATTERN.search(second)):
+            return second, first  # "Company | Role"
+        return first, second
+
+    def technologies(self, text, span=None):
+        # Taxonomy matches in technical categories, first-seen order; read
+        # from the annotations when there are any, else matched in text
+        if self.annotations is not None and span is not None:
+            return technologies_within(self.annotations, *span)
+        return list(dict.fromkeys(
+            match.name for match in self.matcher.find(text)
+            if match.category in TECHNOLOGY_CATEGORIES and (not match.ambiguous or in_list_context(text, match.start, match.end))
+        ))
+
+
+def technologies_within(annotations, start, end):
+    # Names of the skill and tool spans in [start, end) that count as
+    # technologies, first-seen order
+    return list(dict.fromkeys(
+        span.value for span in annotations.within(start, end, "skill", "tool") if span.category in TECHNOLOGY_CATEGORIES
+    ))
@@ -0,0 +1,531 @@
+"""Embedded inverted index over parse results, for candidate search.
+
+Every indexed result is a document with a dense integer id. For each
+canonical skill (from the skills section and every role's technologies),
+role and company the index keeps a posting list: the sorted ids of the
+documents that have it. Each document's total_experience_years is kept too,
+along with the document ids ordered by it. A query such as
+
+    python AND (kubernetes OR k8s) AND NOT php
+
+with a tenure range is answered by intersecting, merging and subtracting
+posting lists as numpy arrays, then filtering on tenure. A query with only a
+tenure range is a binary search in the tenure order. Results are ranked by
+how many of the query's skills each candidate has, then by tenure.
+
+The index has two parts. The base is what was last saved: flat .npy files
+in a directory, loaded memory-mapped, so opening an index of a million
+candidates reads almost nothing until it is queried. The delta holds the
+documents added since, in compact arrays. Doc ids only grow, so a term's
+posting list is its base list followed by its delta list, still sorted.
+save() merges the delta into a new base. Re-adding a candidate id marks its
+old document deleted rather than rewriting any posting list.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from array import array
+
+import numpy as np
+
+from parser.serialization import dumps
+from parser.taxonomy import get_matcher
+
+FIELDS = ("skill", "role", "company")
+FORMAT_VERSION = 1
+
+# Query syntax: terms joined by AND, OR and NOT (any case), with parentheses.
+# Adjacent words form one term ("apache http server"), as does a quoted
+# phrase. "role:" and "company:" prefixes search those fields; anything else
+# is a skill, matched through the taxonomy's aliases ("k8s" is Kubernetes).
+QUERY_TOKEN = re.compile(r'\s*(?:(?P<paren>[()])|"(?P<quoted>[^"]*)"|(?P<word>[^\s()"]+))')
+OPERATORS = ("and", "or", "not")
+FIELD_PREFIX = re.compile(r"(?:role|company|skill):", re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    pass
+
+
+def normalize_term(value):
+    return " ".join(value.lower().split())
+
+
+def candidate_id(result):
+    # The id a result is indexed under when the caller gives none: the
+    # candidate's email or phone, so a re-parsed resume replaces its earlier
+    # entry, or else a hash of the result itself
+    info = result.get("personal_info") or {}
+    if info.get("email"):
+        return info["email"].lower()
+    if info.get("phone"):
+        return "".join(ch for ch in info["phone"] if ch.isdigit() or ch == "+")
+    return hashlib.sha256(dumps({key: value for key, value in result.items() if key != "profile"})).hexdigest()[:32]
+
+
+def result_terms(result):
+    """{field: set of terms} for one parse result."""
+    skills = {name for names in (result.get("skills") or {}).values() for name in names}
+    roles, companies = set(), set()
+    for entry in result.get("experience") or ():
+        skills.update(entry.get("technologies") or ())
+        if entry.get("role"):
+            roles.add(entry["role"])
+        if entry.get("company"):
+            companies.add(entry["company"])
+    return {
+        "skill": {normalize_term(name) for name in skills},
+        "role": {normalize_term(name) for name in roles},
+        "company": {normalize_term(name) for name in companies},
+    }
+
+
+def parse_query(query):
+    """The query as a tree of ("term", field, term), ("and", [...]),
+    ("or", [...]) and ("not", node). Raises QueryError."""
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = QUERY_TOKEN.match(query, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"unexpected {query[position:]!r} in query")
+        position = match.end()
+        if match.group("paren"):
+            tokens.append(match.group("paren"))
+        elif match.group("quoted") is not None:
+            tokens.append(("phrase", match.group("quoted")))
+        elif match.group("word").lower() in OPERATORS:
+            tokens.append(match.group("word").lower())
+        else:
+            tokens.append(("phrase", match.group("word")))
+    parser = _QueryParser(tokens)
+    tree = parser.parse_or()
+    if parser.position != len(tokens):
+        raise QueryError(f"unexpected {tokens[parser.position]!r} in query")
+    return tree
+
+
+class _QueryParser:
+    # or := and (OR and)*;  and := unary (AND? unary)*;  unary := NOT unary | ( or ) | term
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self._peek() == "or":
+            self.position += 1
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_unary()]
+        while self._peek() not in (None, "or", ")"):
+            if self._peek() == "and":
+                self.position += 1
+            nodes.append(self.parse_unary())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_unary(self):
+        token = self._peek()
+        if token == "not":
+            self.position += 1
+            return ("not", self.parse_unary())
+        if token == "(":
+            self.position += 1
+            node = self.parse_or()
+            if self._peek() != ")":
+                raise QueryError("missing ) in query")
+            self.position += 1
+            return node
+        if not isinstance(token, tuple):
+            raise QueryError(f"expected a term, found {token or 'the end of the query'!r}")
+        # Adjacent words make one term, up to a word with a field prefix
+        words = [token[1]]
+        self.position += 1
+        while isinstance(self._peek(), tuple) and not FIELD_PREFIX.match(self._peek()[1]):
+            words.append(self._peek()[1])
+            self.position += 1
+        return _term(" ".join(words))
+
+
+def _term(text):
+    field = "skill"
+    if FIELD_PREFIX.match(text):
+        prefix, _, text = text.partition(":")
+        field = prefix.lower()
+    term = normalize_term(text)
+    if not term:
+        raise QueryError("empty term in query")
+    if field == "skill":
+        # An alias names its canonical skill when it is the whole term
+        found = get_matcher().lookup(text)
+        if found is not None:
+            term = normalize_term(found[0])
+    return ("term", field, term)
+
+
+_EMPTY = np.empty(0, dtype=np.uint32)
+
+
+class CandidateIndex:
+    """Posting lists per skill, role and company, and a tenure order, over
+    indexed parse results. Safe to use from several threads."""
+
+    def __init__(self, path=None):
+        # path: the directory save() writes and load() reads
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._base_count = 0
+        self._base_terms = {field: {} for field in FIELDS}
+        self._base_postings = _EMPTY
+        self._base_tenure = np.empty(0, dtype=np.float32)
+        self._base_order = _EMPTY
+        self._base_sorted_tenure = np.empty(0, dtype=np.float32)
+        self._base_id_blob = np.empty(0, dtype=np.uint8)
+        self._base_id_offsets = np.zeros(1, dtype=np.int64)
+        self._delta_terms = {field: {} for field in FIELDS}
+        self._delta_tenure = array("f")
+        self._delta_ids = []
+        self._deleted = set()
+        self._docs_by_id = None
+        self._tenure_cache = None
+        self.unsaved = 0
+
+    @property
+    def size(self):
+        """Indexed candidates, not counting replaced or removed ones."""
+        with self._lock:
+            return self._base_count + len(self._delta_ids) - len(self._deleted)
+
+    def add(self, candidate_id, result):
+        """Index a parse result under candidate_id, replacing any earlier
+        result for that id."""
+        terms = result_terms(result)
+        self.add_terms(candidate_id, terms["skill"], terms["role"], terms["company"], result.get("total_experience_years") or 0.0)
+
+    def add_result(self, result, candidate=None):
+        """Index a complete parse result under candidate (by default
+        candidate_id(result)). Partial and field-limited results are
+        skipped; returns whether the result was indexed."""
+        if result.get("partial") or "skills" not in result or "experience" not in result or "total_experience_years" not in result:
+            return False
+        self.add(candidate or candidate_id(result), result)
+        return True
+
+    def add_terms(self, candidate_id, skills, roles, companies, years):
+        # Terms are expected normalised (normalize_term)
+        with self._lock:
+            self._forget(candidate_id)
+            doc = self._base_count + len(self._delta_ids)
+            for field, terms in (("skill", skills), ("role", roles), ("company", companies)):
+                postings = self._delta_terms[field]
+                for term in terms:
+                    posting = postings.get(term)
+                    if posting is None:
+                        posting = postings[term] = array("I")
+                    posting.append(doc)
+            self._delta_tenure.append(years)
+            self._delta_ids.append(candidate_id)
+            self._docs_by_id[candidate_id] = doc
+            self._tenure_cache = None
+            self.unsaved += 1
+
+    def remove(self, candidate_id):
+        with self._lock:
+            return self._forget(candidate_id)
+
+    def _forget(self, candidate_id):
+        if self._docs_by_id is None:
+            # Only replacing a candidate needs the id map, so a loaded index
+            # builds it on its first insert rather than on load
+            self._docs_by_id = {candidate: doc for doc, candidate in enumerate(self._base_candidates()) if doc not in self._deleted}
+        doc = self._docs_by_id.pop(candidate_id, None)
+        if doc is None:
+            return False
+        self._deleted.add(doc)
+        self.unsaved += 1
+        return True
+
+    def _base_candidates(self):
+        # Every saved candidate id, decoded in one pass
+        blob = self._base_id_blob.tobytes()
+        offsets = self._base_id_offsets.tolist()
+        return [blob[start:stop].decode("utf-8") for start, stop in zip(offsets, offsets[1:])]
+
+    def _candidate(self, doc):
+        if doc >= self._base_count:
+            return self._delta_ids[doc - self._base_count]
+        start, stop = self._base_id_offsets[doc], self._base_id_offsets[doc + 1]
+        return self._base_id_blob[start:stop].tobytes().decode("utf-8")
+
+    def _posting(self, field, term):
+        # Sorted doc ids having the term: the base list, then the delta's
+        span = self._base_terms[field].get(term)
+        base = self._base_postings[span[0]:span[1]] if span is not None else _EMPTY
+        delta = self._delta_terms[field].get(term)
+        if not delta:
+            return base
+        return np.concatenate((base, np.frombuffer(delta, dtype=np.uint32)))
+
+    def _tenure(self):
+        # Every document's tenure as one array, rebuilt after inserts
+        if self._tenure_cache is None:
+            delta = np.frombuffer(self._delta_tenure, dtype=np.float32) if self._delta_tenure else None
+            self._tenure_cache = self._base_tenure if delta is None else np.concatenate((self._base_tenure, delta))
+        return self._tenure_cache
+
+    def _evaluate(self, node):
+        # Sorted doc ids matching the node. Intersections binary-search the
+        # smaller list in the larger; unions and negations go through a mask
+        # over all documents, which costs less than re-sorting merged lists.
+        kind = node[0]
+        if kind == "term":
+            return self._posting(node[1], node[2])
+        if kind == "or":
+            mask = self._mask([self._evaluate(child) for child in node[1]])
+            return np.flatnonzero(mask).astype(np.uint32)
+        if kind == "not":
+            return np.flatnonzero(~self._mask([self._evaluate(node[1])])).astype(np.uint32)
+        positives = [self._evaluate(child) for child in node[1] if child[0] != "not"]
+        negatives = [self._evaluate(child[1]) for child in node[1] if child[0] == "not"]
+        if positives:
+            positives.sort(key=len)
+            docs = positives[0]
+            for posting in positives[1:]:
+                docs = _intersect(docs, posting, self._doc_count())
+        else:
+            docs = np.arange(self._doc_count(), dtype=np.uint32)
+        if negatives and len(docs):
+            docs = docs[~self._mask(negatives)[docs]]
+        return docs
+
+    def _doc_count(self):
+        return self._base_count + len(self._delta_ids)
+
+    def _mask(self, postings):
+        mask = np.zeros(self._doc_count(), dtype=bool)
+        for posting in postings:
+            mask[posting] = True
+        return mask
+
+    def _tenure_range(self, min_years, max_years):
+        # Doc ids with tenure in range: a slice of the base's tenure order,
+        # plus the matching delta documents
+        low = 0 if min_years is None else np.searchsorted(self._base_sorted_tenure, min_years, side="left")
+        high = len(self._base_order) if max_years is None else np.searchsorted(self._base_sorted_tenure, max_years, side="right")
+        docs = np.sort(self._base_order[low:high])
+        if self._delta_tenure:
+            tenure = np.frombuffer(self._delta_tenure, dtype=np.float32)
+            keep = np.ones(len(tenure), dtype=bool)
+            if min_years is not None:
+                keep &= tenure >= min_years
+            if max_years is not None:
+                keep &= tenure <= max_years
+            docs = np.concatenate((docs, np.flatnonzero(keep).astype(np.uint32) + self._base_count))
+        return docs
+
+    def search(self, query=None, min_years=None, max_years=None, role=None, company=None, k=10):
+        """{"total", "results": [{"candidate_id", "score", "total_experience_years"}]}
+        for the k best matches. query is a boolean skill query (see
+        parse_query); role and company add exact-match conditions. Raises
+        QueryError for a query that doesn't parse."""
+        clauses = [parse_query(query)] if query and query.strip() else []
+        clauses += [("term", field, normalize_term(value)) for field, value in (("role", role), ("company", company)) if value]
+        # Every match has the required skills; only the optional ones (under
+        # an OR) set candidates apart
+        required = {node for node in _required_terms(clauses) if node[1] == "skill"}
+        optional = [node for node in dict.fromkeys(_positive_terms(clauses)) if node[1] == "skill" and node not in required]
+        with self._lock:
+            tenure = self._tenure()
+            if clauses:
+                docs = self._evaluate(clauses[0] if len(clauses) == 1 else ("and", clauses)).astype(np.int64)
+                if min_years is not None or max_years is not None:
+                    years = tenure[docs]
+                    keep = np.ones(len(docs), dtype=bool)
+                    if min_years is not None:
+                        keep &= years >= np.float32(min_years)
+                    if max_years is not None:
+                        keep &= years <= np.float32(max_years)
+                    docs = docs[keep]
+            else:
+                docs = self._tenure_range(
+                    None if min_years is None else np.float32(min_years),
+                    None if max_years is None else np.float32(max_years),
+                ).astype(np.int64)
+            if self._deleted:
+                docs = docs[~np.isin(docs, np.fromiter(self._deleted, dtype=np.int64))]
+
+            scores = np.full(len(docs), len(required), dtype=np.int64)
+            for _, field, term in optional:
+                scores += self._mask([self._posting(field, term)])[docs]
+            years = tenure[docs]
+            # Most matched skills first, then longest tenure, then oldest
+            # entry. Only the candidates that can make the top k are sorted.
+            pick = np.arange(len(docs))
+            if len(docs) > k:
+                key = scores * 10000.0 + years
+                kth = np.partition(key, len(key) - k)[len(key) - k]
+                pick = np.flatnonzero(key >= kth)
+            top = pick[np.lexsort((docs[pick], -years[pick], -scores[pick]))][:k]
+            results = [
+                {"candidate_id": self._candidate(int(docs[i])), "score": int(scores[i]), "total_experience_years": round(float(years[i]), 2)}
+                for i in top
+            ]
+        return {"total": int(len(docs)), "results": results}
+
+    def save(self, path=None):
+        """Write the whole index to path (default: the index's own) as a new
+        base, replacing whatever was there, and continue from it."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("no path to save the index to")
+        with self._lock:
+            count = self._base_count + len(self._delta_ids)
+            tmp = f"{path}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+
+            terms, postings, offset = {field: {} for field in FIELDS}, [], 0
+            for field in FIELDS:
+                for term in sorted(set(self._base_terms[field]) | set(self._delta_terms[field])):
+                    posting = self._posting(field, term)
+                    terms[field][term] = [offset, offset + len(posting)]
+                    postings.append(posting)
+                    offset += len(posting)
+            tenure = np.ascontiguousarray(self._tenure(), dtype=np.float32)
+            order = np.argsort(tenure, kind="stable").astype(np.uint32)
+            ids = [candidate.encode("utf-8") for candidate in self._base_candidates() + self._delta_ids]
+            id_offsets = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum([len(candidate) for candidate in ids], out=id_offsets[1:])
+
+            np.save(os.path.join(tmp, "postings.npy"), np.concatenate(postings) if postings else _EMPTY)
+            np.save(os.path.join(tmp, "tenure.npy"), tenure)
+            np.save(os.path.join(tmp, "tenure_order.npy"), order)
+            np.save(os.path.join(tmp, "tenure_sorted.npy"), tenure[order])
+            np.save(os.path.join(tmp, "id_blob.npy"), np.frombuffer(b"".join(ids), dtype=np.uint8))
+            np.save(os.path.join(tmp, "id_offsets.npy"), id_offsets)
+            np.save(os.path.join(tmp, "deleted.npy"), np.array(sorted(self._deleted), dtype=np.int64))
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "docs": count, "terms": terms}, f)
+
+            old = f"{path}.old-{os.getpid()}"
+            if os.path.exists(path):
+                os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+            self._load(path)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index; its arrays are memory-mapped, not read."""
+        index = cls(path)
+        index._load(path)
+        return index
+
+    def _load(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported index format {meta.get('version')!r} in {path}")
+
+        def mapped(name):
+            # A plain array over the mapping; numpy's memmap subclass adds
+            # overhead to every indexing operation
+            return np.asarray(np.load(os.path.join(path, name), mmap_mode="r"))
+
+        with self._lock:
+            docs_by_id = self._docs_by_id
+            self._reset()
+            self._base_count = meta["docs"]
+            self._base_terms = {field: {term: tuple(span) for term, span in meta["terms"][field].items()} for field in FIELDS}
+            self._base_postings = mapped("postings.npy")
+            self._base_tenure = mapped("tenure.npy")
+            self._base_order = mapped("tenure_order.npy")
+            self._base_sorted_tenure = mapped("tenure_sorted.npy")
+            self._base_id_blob = mapped("id_blob.npy")
+            self._base_id_offsets = mapped("id_offsets.npy")
+            self._deleted = set(np.load(os.path.join(path, "deleted.npy")).tolist())
+            # After save() the id map is still right: doc ids don't change
+            self._docs_by_id = docs_by_id
+            self.path = path
+
+    def stats(self):
+        with self._lock:
+            return {
+                "candidates": self.size,
+                "saved": self._base_count,
+                "unsaved_changes": self.unsaved,
+                "terms": {field: len(set(self._base_terms[field]) | set(self._delta_terms[field])) for field in FIELDS},
+                "path": self.path,
+            }
+
+
+def _intersect(small, large, count):
+    # Sorted ids in both. Binary-searching each of small's ids in large wins
+    # while small is short; past that, marking large in a mask is cheaper.
+    if not len(small) or not len(large):
+        return _EMPTY
+    if len(small) * 32 > count:
+        mask = np.zeros(count, dtype=bool)
+        mask[large] = True
+        return small[mask[small]]
+    at = np.searchsorted(large, small)
+    at[at == len(large)] = 0
+    return small[large[at] == small]
+
+
+def _required_terms(nodes):
+    # The terms every match must have: those joined to the query by AND alone
+    for node in nodes:
+        if node[0] == "term":
+            yield node
+        elif node[0] == "and":
+            yield from _required_terms(node[1])
+
+
+def _positive_terms(nodes):
+    # The terms a query asks for (not under a NOT), for ranking
+    for node in nodes:
+        if node[0] == "term":
+            yield node
+        elif node[0] in ("and", "or"):
+            yield from _positive_terms(node[1])
+
+
+_index = None
+_index_configured = False
+
+
+def get_index():
+    # PARSER_INDEX_PATH is the directory the index is loaded from (if it
+    # exists) and saved to. Without it (or with PARSER_INDEX=off) there is no
+    # index and this returns None: an index held only in memory would grow
+    # with every resume the process parses and vanish on restart.
+    global _index, _index_configured
+    if not _index_configured:
+        path = os.environ.get("PARSER_INDEX_PATH") or None
+        if path is None or os.environ.get("PARSER_INDEX", "on").lower() in ("0", "off", "false", "no"):
+            _index = None
+        elif os.path.exists(os.path.join(path, "meta.json")):
+            _index = CandidateIndex.load(path)
+        else:
+            _index = CandidateIndex(path)
+        _index_configured = True
+    return _index
+
+
+def set_index(index):
+    global _index, _index_configured
+    _index, _index_configured = index, True
@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+
+# Callables invoked as hook(stage, seconds) after every parse stage, in
+# whichever process ran the parse. Use them to feed your own metrics.
+_stage_hooks = []
+
+
+def add_stage_hook(hook):
+    _stage_hooks.append(hook)
+
+
+def remove_stage_hook(hook):
+    _stage_hooks.remove(hook)
+
+
+class StageTimer:
+    """Times the stages of one parse and reports each to the stage hooks."""
+
+    def __init__(self):
+        self.stages = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            for hook in _stage_hooks:
+                hook(name, elapsed)
+
+    def profile(self, **extra):
+        profile = {
+            "stages": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+        }
+        profile.update(extra)
+        return profile
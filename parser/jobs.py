@@ -0,0 +1,304 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from parser.serialization import dumps, loads
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    fields TEXT,
+    callback_url TEXT,
+    callback TEXT,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    tenant TEXT NOT NULL,
+    state TEXT NOT NULL,
+    resume_text TEXT,
+    outcome BLOB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS job_items_by_job ON job_items (job_id, idx);
+CREATE INDEX IF NOT EXISTS job_items_by_tenant ON job_items (tenant, state, seq);
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant TEXT PRIMARY KEY,
+    queued INTEGER NOT NULL,
+    served INTEGER NOT NULL
+);
+"""
+
+
+class JobStore:
+    """Bulk parse jobs, queued in a local SQLite file.
+
+    A job is a list of resume texts submitted at once. Each text is an item
+    that moves from "queued" to "running" (claimed by a worker) to "done",
+    where its outcome ({"result", "error"}, as from parse_one) replaces the
+    text. An item whose parse was lost to the pool rather than to its
+    document is retried after a growing delay, up to a limit. Items are claimed a chunk at a time, always from the
+    tenant that was served longest ago, so one tenant's huge job can't hold
+    up everyone else's small ones.
+
+    The file is the queue: nothing is held only in memory, so a restart
+    loses no work. recover() puts items that were running when the process
+    stopped back in the queue. One process should drain a given file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _db(self):
+        # sqlite connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_items)")}
+            if "attempts" not in columns:  # a file from before retries
+                conn.execute("ALTER TABLE job_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE job_items ADD COLUMN not_before REAL")
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def _transaction(self):
+        return _Transaction(self._db(), self._lock)
+
+    def submit(self, resume_texts, tenant="default", fields=None, callback_url=None):
+        """Queue a job; returns its id."""
+        job_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (id, tenant, fields, callback_url, total, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, tenant, ",".join(fields) if fields is not None else None, callback_url, len(resume_texts), time.time()),
+            )
+            db.executemany(
+                "INSERT INTO job_items (job_id, idx, tenant, state, resume_text) VALUES (?, ?, ?, 'queued', ?)",
+                ((job_id, i, tenant, text) for i, text in enumerate(resume_texts)),
+            )
+            self._add_queued(db, tenant, len(resume_texts))
+            if not resume_texts:
+                db.execute("UPDATE jobs SET finished = ?, callback = ? WHERE id = ?", (time.time(), "pending" if callback_url else None, job_id))
+        return job_id
+
+    @staticmethod
+    def _add_queued(db, tenant, count):
+        db.execute(
+            "INSERT INTO tenants (tenant, queued, served) VALUES (?, ?, 0) "
+            "ON CONFLICT (tenant) DO UPDATE SET queued = queued + excluded.queued",
+            (tenant, count),
+        )
+
+    def claim(self, limit):
+        """Mark up to limit queued items running and return them as
+        {"job_id", "tenant", "fields", "items": [(index, resume_text), ...]}, or None
+        when nothing is queued. The items come from one job of the tenant
+        served longest ago, oldest first; items waiting out a retry delay
+        are skipped."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT tenant FROM tenants WHERE queued > 0 AND EXISTS (SELECT 1 FROM job_items WHERE job_items.tenant = tenants.tenant "
+                "AND state = 'queued' AND (not_before IS NULL OR not_before <= ?)) ORDER BY served, tenant LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            tenant = row[0]
+            rows = db.execute(
+                "SELECT seq, job_id, idx, resume_text FROM job_items WHERE tenant = ? AND state = 'queued' "
+                "AND (not_before IS NULL OR not_before <= ?) ORDER BY seq LIMIT ?",
+                (tenant, now, limit),
+            ).fetchall()
+            if not rows:  # the count is off; recount and try again later
+                db.execute("UPDATE tenants SET queued = 0 WHERE tenant = ?", (tenant,))
+                return None
+            job_id = rows[0][1]
+            rows = [row for row in rows if row[1] == job_id]
+            db.executemany("UPDATE job_items SET state = 'running' WHERE seq = ?", ((row[0],) for row in rows))
+            served = db.execute("SELECT COALESCE(MAX(served), 0) + 1 FROM tenants").fetchone()[0]
+            db.execute("UPDATE tenants SET queued = queued - ?, served = ? WHERE tenant = ?", (len(rows), served, tenant))
+            fields = db.execute("SELECT fields FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        return {
+            "job_id": job_id,
+            "tenant": tenant,
+            "fields": fields.split(",") if fields is not None else None,
+            "items": [(idx, text) for _, _, idx, text in rows],
+        }
+
+    def release(self, job_id, indexes):
+        # Claimed items that could not be run yet go back to the queue
+        with self._transaction() as db:
+            cursor = db.executemany(
+                "UPDATE job_items SET state = 'queued' WHERE job_id = ? AND idx = ? AND state = 'running'",
+                ((job_id, i) for i in indexes),
+            )
+            tenant = db.execute("SELECT tenant FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            self._add_queued(db, tenant, cursor.rowcount)
+
+    def retry(self, job_id, indexes, error, max_attempts, delay):
+        """Put claimed items whose parse failed for a reason other than the
+        document (a worker died, the pool shut down) back in the queue, not
+        to be claimed for delay * 2 ** (attempts - 1) seconds. Items that
+        have failed max_attempts times are stored as failed with error
+        instead. Returns True when that finished the job."""
+        given_up = {}
+        with self._transaction() as db:
+            requeued = 0
+            for i in indexes:
+                row = db.execute("SELECT attempts FROM job_items WHERE job_id = ? AND idx = ? AND state = 'running'", (job_id, i)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                if attempts >= max_attempts:
+                    given_up[i] = {"result": None, "error": f"gave up after {attempts} attempts: {error}"}
+                    continue
+                db.execute(
+                    "UPDATE job_items SET state = 'queued', attempts = ?, not_before = ? WHERE job_id = ? AND idx = ?",
+                    (attempts, time.time() + delay * 2 ** (attempts - 1), job_id, i),
+                )
+                requeued += 1
+            tenant = db.execute("SELECT tenant FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            self._add_queued(db, tenant, requeued)
+        return self.complete(job_id, given_up) if given_up else False
+
+    def complete(self, job_id, outcomes):
+        """Store {index: {"result", "error"}} for claimed items. Returns True
+        when that finished the job."""
+        completed = failed = 0
+        with self._transaction() as db:
+            for i, outcome in outcomes.items():
+                # An item stored already (it ran twice around a restart) isn't counted again
+                stored = db.execute(
+                    "UPDATE job_items SET state = 'done', outcome = ?, resume_text = NULL WHERE job_id = ? AND idx = ? AND state != 'done'",
+                    (dumps(outcome), job_id, i),
+                ).rowcount
+                if stored and outcome["error"] is None:
+                    completed += 1
+                elif stored:
+                    failed += 1
+            db.execute("UPDATE jobs SET completed = completed + ?, failed = failed + ? WHERE id = ?", (completed, failed, job_id))
+            cursor = db.execute(
+                "UPDATE jobs SET finished = ?, callback = CASE WHEN callback_url IS NULL THEN NULL ELSE 'pending' END "
+                "WHERE id = ? AND finished IS NULL AND completed + failed = total",
+                (time.time(), job_id),
+            )
+            return cursor.rowcount > 0
+
+    def recover(self):
+        """Requeue the items left running by a process that stopped. Returns
+        how many there were."""
+        with self._transaction() as db:
+            count = db.execute("UPDATE job_items SET state = 'queued' WHERE state = 'running'").rowcount
+            db.execute("UPDATE tenants SET queued = (SELECT COUNT(*) FROM job_items WHERE job_items.tenant = tenants.tenant AND state = 'queued')")
+        return count
+
+    def get(self, job_id):
+        """The job's status and progress, or None for an unknown id."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, tenant, total, completed, failed, created, finished, callback_url, callback FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, tenant, total, completed, failed, created, finished, callback_url, callback = row
+        processed = completed + failed
+        return {
+            "job_id": job_id,
+            "tenant": tenant,
+            "status": "done" if finished is not None else "running" if processed else "queued",
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "progress": round(processed / total, 4) if total else 1.0,
+            "created": created,
+            "finished": finished,
+            "callback": callback if callback_url else None,
+        }
+
+    def results(self, job_id, offset=0, limit=100):
+        """[{"index", "result", "error"}] for the finished items with indexes
+        in [offset, offset + limit), in order."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT idx, outcome FROM job_items WHERE job_id = ? AND idx >= ? AND idx < ? AND state = 'done' ORDER BY idx",
+                (job_id, offset, offset + limit),
+            ).fetchall()
+        return [dict(index=idx, **loads(outcome)) for idx, outcome in rows]
+
+    def pending_callbacks(self):
+        # [(job_id, callback_url)] for finished jobs whose callback hasn't
+        # been delivered yet, including ones left over from before a restart
+        with self._lock:
+            return self._db().execute("SELECT id, callback_url FROM jobs WHERE callback = 'pending' ORDER BY finished").fetchall()
+
+    def set_callback(self, job_id, state):
+        # "sent" or "failed"
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET callback = ? WHERE id = ?", (state, job_id))
+
+    def stats(self):
+        with self._lock:
+            db = self._db()
+            items = dict(db.execute("SELECT state, COUNT(*) FROM job_items WHERE state != 'done' GROUP BY state").fetchall())
+            jobs = db.execute("SELECT COUNT(*) FROM jobs WHERE finished IS NULL").fetchone()[0]
+        return {"unfinished_jobs": jobs, "queued_items": items.get("queued", 0), "running_items": items.get("running", 0)}
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE ... COMMIT under the store's lock, so a claim can't
+    # interleave with another claim from this process or any other
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+_store = None
+_store_configured = False
+
+
+def get_job_store():
+    # PARSER_JOBS_PATH is the queue's SQLite file. The job API is off, and
+    # this returns None, until it is set (or when it is "off").
+    global _store, _store_configured
+    if not _store_configured:
+        path = os.environ.get("PARSER_JOBS_PATH", "")
+        _store = JobStore(path) if path.lower() not in ("", "0", "off", "none") else None
+        _store_configured = True
+    return _store
+
+
+def set_job_store(store):
+    global _store, _store_configured
+    _store, _store_configured = store, True
@@ -0,0 +1,167 @@
+"""Typed parse results, mirroring schema/resume_schema.json.
+
+ResumeParser.parse() returns plain dicts of exactly this shape, because dicts
+are what the worker pool, the parse cache and the JSON encoder handle fastest.
+These classes are the typed contract for those dicts:
+- the API declares them as its response models;
+- schema() regenerates the schema file from them, and the tests keep the
+  schema, the models and parse() output in step;
+- ParseResult.from_dict() gives Python callers attribute access.
+"""
+import dataclasses
+import sys
+import typing
+from functools import lru_cache, partial
+from typing import Any, Dict, List, Optional
+
+# __slots__ keeps instances small; dataclasses only generate them from 3.10
+_model = partial(dataclasses.dataclass, slots=True) if sys.version_info >= (3, 10) else dataclasses.dataclass
+
+
+def _list():
+    return dataclasses.field(default_factory=list)
+
+
+@_model
+class PersonalInfo:
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    location: Optional[str] = None
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+    portfolio: Optional[str] = None
+
+
+@_model
+class Skills:
+    technical: List[str] = _list()
+    frameworks: List[str] = _list()
+    tools: List[str] = _list()
+    languages: List[str] = _list()
+    soft: List[str] = _list()
+
+
+@_model
+class Experience:
+    company: Optional[str] = None
+    role: Optional[str] = None
+    location: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    is_current: bool = False
+    description: Optional[str] = None
+    technologies: List[str] = _list()
+
+
+@_model
+class Education:
+    institution: Optional[str] = None
+    degree: Optional[str] = None
+    field: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+
+@_model
+class Project:
+    name: Optional[str] = None
+    description: Optional[str] = None
+    technologies: List[str] = _list()
+    url: Optional[str] = None
+
+
+@_model
+class Certification:
+    name: Optional[str] = None
+    issuer: Optional[str] = None
+    date: Optional[str] = None
+    url: Optional[str] = None
+
+
+@_model
+class Duplicate:
+    # Added by the API when near-duplicate detection (parser/dedup.py) ran
+    cluster_id: int
+    duplicate_of: Optional[str] = None
+    similarity: Optional[float] = None
+    changed_fields: Optional[List[str]] = None
+
+
+@_model
+class ParseResult:
+    # Every field is optional because parse(fields=[...]) returns only the
+    # selected ones. profile is present only when asked for, duplicate only
+    # from the API; neither is part of the schema.
+    personal_info: Optional[PersonalInfo] = None
+    summary: Optional[str] = None
+    skills: Optional[Skills] = None
+    experience: Optional[List[Experience]] = None
+    education: Optional[List[Education]] = None
+    projects: Optional[List[Project]] = None
+    certifications: Optional[List[Certification]] = None
+    total_experience_years: Optional[float] = None
+    confidence_score: Optional[float] = None
+    missing_fields: Optional[List[str]] = None
+    partial: bool = False
+    profile: Optional[Dict[str, Any]] = None
+    duplicate: Optional[Duplicate] = None
+
+    @classmethod
+    def from_dict(cls, result):
+        # Raises TypeError on any key the model doesn't have
+        return _from_value(cls, result)
+
+
+@_model
+class BatchItem:
+    # One entry of a batch: parse_many() and POST /parse-resumes/batch
+    index: int
+    result: Optional[ParseResult] = None
+    error: Optional[str] = None
+
+
+def _from_value(annotation, value):
+    if value is None:
+        return None
+    annotation = _unwrap_optional(annotation)
+    if dataclasses.is_dataclass(annotation):
+        hints = _type_hints(annotation)
+        # Unknown keys are passed on as they are, for the constructor to reject
+        return annotation(**{name: _from_value(hints.get(name), item) for name, item in value.items()})
+    if typing.get_origin(annotation) is list:
+        (item_type,) = typing.get_args(annotation)
+        return [_from_value(item_type, item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=None)
+def _type_hints(model):
+    return typing.get_type_hints(model)
+
+
+def _unwrap_optional(annotation):
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+_SCHEMA_TYPES = {str: "string", bool: "boolean", float: "number", int: "number"}
+
+
+def schema(model=ParseResult, exclude=("profile", "duplicate")):
+    """The example-shaped schema of a model, as in schema/resume_schema.json."""
+    return _schema_of(model, exclude)
+
+
+def _schema_of(annotation, exclude=()):
+    annotation = _unwrap_optional(annotation)
+    if dataclasses.is_dataclass(annotation):
+        hints = _type_hints(annotation)
+        return {field.name: _schema_of(hints[field.name]) for field in dataclasses.fields(annotation) if field.name not in exclude}
+    if typing.get_origin(annotation) is list:
+        (item_type,) = typing.get_args(annotation)
+        return [_schema_of(item_type)]
+    return _SCHEMA_TYPES.get(annotation, "object")
@@ -0,0 +1,137 @@
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "en_core_web_sm"
+# Noun chunks need the tagger, attribute ruler and parser; nothing we do reads
+# entities or lemmas, so those pipes are never even loaded.
+DEFAULT_EXCLUDE = ("ner", "lemmatizer")
+
+
+class RuleBackend:
+    """Regex-only backend. Never imports spaCy, so workers that use it start
+    fast and stay small."""
+
+    name = "rules"
+    # No \s* around the separators: on long whitespace runs that makes every
+    # position rescan the run. Parts are stripped instead.
+    SPLIT_PATTERN = re.compile(r"\b(?:and|or|with|using|including|such as)\b|[;:/()]", re.IGNORECASE)
+
+    def warm_up(self):
+        return self
+
+    def noun_phrases(self, text):
+        return [part.strip() for part in self.SPLIT_PATTERN.split(text) if part and not part.isspace()]
+
+    def noun_phrases_many(self, texts):
+        return [self.noun_phrases(text) for text in texts]
+
+
+class SpacyBackend:
+    """spaCy backend. The model is loaded on first use, not at import."""
+
+    name = "spacy"
+
+    def __init__(self, model=DEFAULT_MODEL, exclude=DEFAULT_EXCLUDE, batch_size=64):
+        self.model = model
+        self.exclude = tuple(exclude)
+        self.batch_size = batch_size
+        self._nlp = None
+
+    @property
+    def loaded(self):
+        return self._nlp is not None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            import spacy
+            try:
+                self._nlp = spacy.load(self.model, exclude=list(self.exclude))
+            except OSError as exc:
+                raise OSError(
+                    f"spaCy model '{self.model}' is not installed; "
+                    f"run `python -m spacy download {self.model}` or set PARSER_NLP_BACKEND=rules"
+                ) from exc
+        return self._nlp
+
+    def warm_up(self):
+        self.nlp
+        return self
+
+    def noun_phrases(self, text):
+        return self.noun_phrases_many([text])[0]
+
+    def noun_phrases_many(self, texts):
+        # One nlp.pipe call for the whole batch instead of one nlp() per text
+        return [
+            [chunk.text for chunk in doc.noun_chunks]
+            for doc in self.nlp.pipe(texts, batch_size=self.batch_size)
+        ]
+
+
+class AutoBackend:
+    """Uses spaCy when the model can be loaded, otherwise falls back to rules."""
+
+    def __init__(self, spacy_backend):
+        self._spacy = spacy_backend
+        self._active = None
+
+    @property
+    def name(self):
+        return self._resolve().name
+
+    def _resolve(self):
+        if self._active is None:
+            try:
+                self._active = self._spacy.warm_up()
+            except (ImportError, OSError) as exc:
+                logger.warning("spaCy unavailable (%s); falling back to rule-based NLP", exc)
+                self._active = RuleBackend()
+        return self._active
+
+    def warm_up(self):
+        self._resolve()
+        return self
+
+    def noun_phrases(self, text):
+        return self._resolve().noun_phrases(text)
+
+    def noun_phrases_many(self, texts):
+        return self._resolve().noun_phrases_many(texts)
+
+
+def create_backend(kind=None):
+    # PARSER_NLP_BACKEND: "auto" (default), "spacy" or "rules"
+    kind = (kind or os.environ.get("PARSER_NLP_BACKEND", "auto")).lower()
+    if kind == "rules":
+        return RuleBackend()
+
+    exclude = os.environ.get("PARSER_SPACY_EXCLUDE")
+    if exclude is None:
+        exclude = DEFAULT_EXCLUDE
+    else:
+        exclude = [pipe.strip() for pipe in exclude.split(",") if pipe.strip()]
+    spacy_backend = SpacyBackend(model=os.environ.get("PARSER_SPACY_MODEL", DEFAULT_MODEL), exclude=exclude)
+    if kind == "spacy":
+        return spacy_backend
+    if kind == "auto":
+        return AutoBackend(spacy_backend)
+    raise ValueError(f"Unknown NLP backend: {kind}")
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parser.batch import default_workers, init_worker, preload as preload_parent
+
+logger = logging.getLogger(__name__)
+
+# How long warm_up() waits for every worker to check in
+WARM_UP_TIMEOUT = 300
+
+_check_in_barrier = None
+
+
+def _init_pool_worker(barrier):
+    global _check_in_barrier
+    _check_in_barrier = barrier
+    init_worker()
+
+
+def _check_in():
+    # Warm-up probe. Holding each worker here until all of them have taken
+    # one means every worker takes exactly one, instead of the first worker
+    # to finish loading taking them all.
+    _check_in_barrier.wait(WARM_UP_TIMEOUT)
+    return os.getpid()
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class WorkerLost(PoolSaturated):
+    """A worker process died (killed, or out of memory) with this work in
+    it. The pool is being rebuilt; like PoolSaturated, worth a retry."""
+
+
+class ParsePool:
+    """Process pool with a bounded admission queue.
+
+    At most max_workers jobs run at once and at most max_queue more wait behind
+    them. Anything beyond that is refused with PoolSaturated instead of piling
+    up, so callers can shed load (the API turns it into a 503).
+
+    Workers start on the first submit, or up front with warm_up(). By default
+    each worker loads the NLP backend and taxonomy itself; with preload (or
+    PARSER_PRELOAD=1) they are loaded once here and the workers are forked
+    from this process, sharing that memory copy-on-write.
+
+    A worker that dies breaks its whole ProcessPoolExecutor. The broken one
+    is dropped, the work that was in it fails with WorkerLost, and the next
+    submit starts a new one. A pool that had been warmed up is not ready
+    again until the new workers have warmed up, which starts at once.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None, preload=None):
+        self.max_workers = max_workers or default_workers()
+        if max_queue is None:
+            max_queue = int(os.environ.get("PARSER_MAX_QUEUE", self.max_workers * 4))
+        self.max_queue = max_queue
+        if preload is None:
+            preload = os.environ.get("PARSER_PRELOAD", "").lower() in ("1", "true", "yes", "on")
+        if preload and "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("PARSER_PRELOAD needs fork(), which this platform lacks; workers will load models themselves")
+            preload = False
+        self.preload = preload
+        self.ready = False
+        self._warmed = False
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self):
+        return min(self._pending, self.max_workers)
+
+    @property
+    def queue_depth(self):
+        return max(0, self._pending - self.max_workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.preload:
+                # init_worker still runs in each worker, but finds everything loaded
+                preload_parent()
+                context = multiprocessing.get_context("fork")
+            else:
+                context = multiprocessing.get_context()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context,
+                initializer=_init_pool_worker, initargs=(context.Barrier(self.max_workers),),
+            )
+        return self._executor
+
+    def warm_up(self):
+        """Start every worker and wait until each has loaded the NLP backend
+        and taxonomy, so no request pays for it. Blocks; returns the worker
+        pids."""
+        # Past admission control: a pool already full of requests would
+        # refuse the probes, and it would never count as ready
+        futures = self._submit(_check_in, [()] * self.max_workers, admit=False)
+        pids = sorted(future.result() for future in futures)
+        self.ready = self._warmed = True
+        return pids
+
+    def _drop_broken(self, executor):
+        # Once per broken executor, whichever of its futures notices first
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.ready = False
+            rewarm = self._warmed
+        logger.error("A parse worker died; restarting the worker pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+        if rewarm:
+            threading.Thread(target=self._rewarm, name="parse-pool-rewarm", daemon=True).start()
+
+    def _rewarm(self):
+        try:
+            self.warm_up()
+        except Exception:
+            logger.exception("Worker pool warm-up after a restart failed")
+
+    def _release(self, future, executor):
+        with self._lock:
+            self._pending -= 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._drop_broken(executor)
+
+    def submit(self, fn, *args):
+        return self.submit_many(fn, [args])[0]
+
+    def submit_many(self, fn, arg_tuples):
+        return self._submit(fn, arg_tuples)
+
+    def _submit(self, fn, arg_tuples, admit=True):
+        # Admission is all-or-nothing so a batch never ends up half queued
+        arg_tuples = list(arg_tuples)
+        with self._lock:
+            if admit and self._pending + len(arg_tuples) > self.capacity:
+                raise PoolSaturated(f"parse queue is full ({self._pending}/{self.capacity})")
+            self._pending += len(arg_tuples)
+            executor = self._get_executor()
+
+        futures = []
+        for i, args in enumerate(arg_tuples):
+            try:
+                future = executor.submit(fn, *args)
+            except Exception as exc:
+                with self._lock:
+                    self._pending -= len(arg_tuples) - i
+                for submitted in futures:
+                    submitted.cancel()
+                if isinstance(exc, BrokenProcessPool):
+                    self._drop_broken(executor)
+                    raise WorkerLost("a parse worker died; the pool is restarting") from exc
+                raise
+            future.add_done_callback(lambda done, executor=executor: self._release(done, executor))
+            futures.append(future)
+        return futures
+
+    async def run(self, fn, *args):
+        try:
+            return await asyncio.wrap_future(self.submit(fn, *args))
+        except BrokenProcessPool as exc:
+            raise WorkerLost("a parse worker died; the pool is restarting") from exc
+
+    async def run_many(self, fn, arg_tuples):
+        futures = self.submit_many(fn, arg_tuples)
+        try:
+            return await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        except BrokenProcessPool as exc:
+            raise WorkerLost("a parse worker died; the pool is restarting") from exc
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "preload": self.preload,
+            "ready": self.ready,
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.ready = False
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
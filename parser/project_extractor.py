@@ -0,0 +1,80 @@
+import re
+
+from parser.annotations import annotate, text_without
+from parser.experience_extractor import technologies_within
+from parser.utils import BULLET_PATTERN, iter_lines
+
+# Between a project's name and the rest of its title line:
+# "Resume Parser | ...", "Chat App - ...", "Budget Tracker: ..."
+TITLE_SEPARATOR = re.compile(r"[ \t]+[|–—-][ \t]+|:[ \t]+")
+# "Tech: Python, React" and the like continue a project rather than name one
+LABEL_PATTERN = re.compile(
+    r"(?:Tech(?:nolog(?:y|ies))?|Stack|Tech[ \t]+Stack|Tools|Built[ \t]+with|Languages|Link|URL|Demo|Source|Role)[ \t]*:",
+    re.IGNORECASE,
+)
+# Left over around a name or description once a URL is cut out of it
+TRIM = " \t|,;:-–—"
+
+
+class ProjectExtractor:
+    """Splits a Projects section into projects and reads each one from the
+    URL and skill spans inside it (parser.annotations).
+
+    A project starts at a line that isn't a bullet, after a blank line or a
+    project that already has a description, or when the line reads as a
+    title ("Name - what it is", "Name | stack").
+    """
+
+    def __init__(self, projects_section_content, annotations=None):
+        self.projects_section_content = projects_section_content
+        self.annotations = annotate(projects_section_content) if annotations is None else annotations
+
+    def extract(self):
+        return [self.parse_entry(start, end) for start, end in self.entries()]
+
+    def entries(self):
+        # Yields (start, end) offsets of each project in the section
+        start = end = None
+        has_description = after_blank = False
+        for line_start, line_end, line in iter_lines(self.projects_section_content):
+            if not line:
+                after_blank = True
+                continue
+            if start is None:
+                starts_entry = True
+            elif BULLET_PATTERN.match(line) or LABEL_PATTERN.match(line):
+                starts_entry = False
+            else:
+                starts_entry = after_blank or has_description or TITLE_SEPARATOR.search(line) is not None
+            if starts_entry:
+                if start is not None:
+                    yield start, end
+                start, has_description = line_start, False
+            else:
+                has_description = True
+            end = line_end
+            after_blank = False
+        if start is not None:
+            yield start, end
+
+    def parse_entry(self, start, end):
+        text = self.projects_section_content
+        urls = self.annotations.within(start, end, "url")
+        lines = [(first, last) for first, last, line in iter_lines(text[start:end]) if line]
+        title_start, title_end = start + lines[0][0], start + lines[0][1]
+        bullet = BULLET_PATTERN.match(text, title_start, title_end)
+        if bullet:
+            title_start = bullet.end()
+
+        separator = TITLE_SEPARATOR.search(text, title_start, title_end)
+        name_end = separator.start() if separator else title_end
+        name = text_without(text, title_start, name_end, urls).strip(TRIM) or None
+        description = [text_without(text, separator.end(), title_end, urls).strip(TRIM)] if separator else []
+        description += [text_without(text, start + first, start + last, urls).strip(" \t") for first, last in lines[1:]]
+        description = "\n".join(line for line in description if line)
+        return {
+            "name": name,
+            "description": description or None,
+            "technologies": technologies_within(self.annotations, start, end),
+            "url": urls[0].value if urls else None,
+        }
@@ -1,264 +1,378 @@
-import re
 import json
-from parser.skill_extractor import SkillExtractor
-from parser.utils import split_into_sections
+import os
+import time
+from copy import deepcopy
+from parser.skill_extractor import SkillExtractor, SKILL_CATEGORIES
+from parser.utils import split_into_sections, find_header_end, changed_sections, HEADER_SECTION
+from parser.contact import extract_contact_info, header_is_sufficient, FIELDS as CONTACT_FIELDS
+from parser.cache import get_cache, cache_key
+from parser.instrumentation import StageTimer
 from parser.experience_calculator import ExperienceCalculator # Added import
+from parser.experience_extractor import ExperienceExtractor
+from parser.annotations import annotate
+from parser.education_extractor import EducationExtractor
+from parser.project_extractor import ProjectExtractor
+from parser.certification_extractor import CertificationExtractor
+
+# What missing_fields reports on, as "field" or "field.key" paths into the
+# result. confidence_score is the share of them that were found.
+EXPECTED_FIELDS = (
+    "personal_info.full_name", "personal_info.email", "personal_info.phone",
+    "summary", "skills", "experience", "education",
+)
+
+# The fields parse() returns, in output order, and what each needs computed
+# first. "sections" is the section split shared by most fields and
+# "annotations" the single annotation pass over the whole text
+# (parser.annotations) that the entry extractors read; neither is returned
+# itself. parse(fields=[...]) evaluates only the selected fields and their
+# dependencies.
+FIELD_DEPENDENCIES = {
+    "personal_info": (),
+    "summary": ("sections",),
+    "skills": ("sections",),
+    "experience": ("sections", "annotations"),
+    "education": ("sections", "annotations"),
+    "projects": ("sections", "annotations"),
+    "certifications": ("sections", "annotations"),
+    "total_experience_years": ("experience",),
+    "confidence_score": ("missing_fields",),
+    "missing_fields": tuple(dict.fromkeys(path.split(".")[0] for path in EXPECTED_FIELDS)),
+}
+FIELDS = tuple(FIELD_DEPENDENCIES)
+
+# Stage names (as timed and reported by parser.instrumentation) where they
+# differ from the field name
+STAGE_NAMES = {"sections": "split_sections", "annotations": "annotate", "total_experience_years": "total_experience"}
+
+
+# The sections each field is extracted from. parse_incremental() carries a
+# field over from the previous result when none of them changed. Fields not
+# listed here (and personal_info, see parse_incremental) are always recomputed;
+# they are derived from other fields and cheap. Annotations never cross a line,
+# so a section's spans depend on nothing outside it.
+FIELD_SECTIONS = {
+    "summary": ("summary",),
+    "skills": ("skills",),
+    "experience": ("experience",),
+    "education": ("education",),
+    "projects": ("projects",),
+    "certifications": ("certifications",),
+}
+
+# What a field is reported as when the time budget ran out before its stage
+EMPTY_VALUES = {
+    "personal_info": dict.fromkeys(CONTACT_FIELDS),
+    "summary": None,
+    "skills": {category: [] for category in SKILL_CATEGORIES},
+    "experience": [],
+    "education": [],
+    "projects": [],
+    "certifications": [],
+    "total_experience_years": 0,
+    "confidence_score": 0,
+    "missing_fields": [],
+}
+
+
+def default_max_chars():
+    # PARSER_MAX_CHARS caps how much of one document is parsed; 0 means no cap
+    return int(os.environ.get("PARSER_MAX_CHARS", "200000"))
+
+
+def default_time_budget():
+    # PARSER_TIME_BUDGET_MS is the wall-clock budget for one parse, in
+    # milliseconds; 0 means no budget
+    return float(os.environ.get("PARSER_TIME_BUDGET_MS", "2000")) / 1000
+
+
+def select_fields(fields):
+    # Validate a field selection and put it in output order; None means all
+    if fields is None:
+        return FIELDS
+    unknown = sorted(set(fields) - set(FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(name for name in FIELDS if name in fields)
+
+
+def select_result(result, fields):
+    # The given fields (in output order) of a complete result, plus its flags
+    selected = {name: result[name] for name in fields}
+    selected["partial"] = result.get("partial", False)
+    return selected
+
 
 class ResumeParser:
-    def __init__(self, resume_text):
+    """Parses one resume.
+
+    Input is bounded twice so no document can monopolise a worker. Text past
+    max_chars (default PARSER_MAX_CHARS) is dropped before parsing, and once
+    time_budget seconds (default PARSER_TIME_BUDGET_MS) have passed, the
+    remaining stages are skipped and their fields left empty. The budget is
+    checked between stages; within a stage, the linear-time patterns and the
+    size cap bound the work. Either way the result has "partial": true.
+    """
+
+    def __init__(self, resume_text, max_chars=None, time_budget=None):
+        self.max_chars = default_max_chars() if max_chars is None else max_chars
+        self.time_budget = default_time_budget() if time_budget is None else time_budget
+        self.input_chars = len(resume_text)
+        self.truncated = bool(self.max_chars) and len(resume_text) > self.max_chars
+        if self.truncated:
+            # Cut at a line break where there is one reasonably close
+            cut = resume_text.rfind("\n", 0, self.max_chars)
+            resume_text = resume_text[:cut if cut > self.max_chars // 2 else self.max_chars]
         self.resume_text = resume_text
-        self.sections = split_into_sections(resume_text)
+        self.partial = self.truncated
+        self._deadline = None
+        self._sections = None
+        self._annotations = None
         self.skill_extractor = None
+        # Skills extracted ahead of parse(), see extract_skills_many()
+        self._primed_skills = None
+        self._contact = None
+        self._values = {}
+        self.reused = []
         self.experience_calculator = ExperienceCalculator() # Initialize
 
-    def parse(self):
-        personal_info = self.extract_personal_info()
-        experiences = self.extract_experience() # Extract experiences first
-        total_experience_years = self.experience_calculator.calculate_total_experience(experiences) # Calculate total experience
-
-        return {
-            "personal_info": personal_info,
-            "summary": self.extract_summary(),
-            "skills": self.extract_skills(), # This line will be changed in the next commit
-            "experience": experiences, # Use the extracted experiences
-            "education": self.extract_education(),
-            "projects": self.extract_projects(),
-            "certifications": [],
-            "total_experience_years": total_experience_years, # Updated
-            "confidence_score": 0,
-            "missing_fields": []
-        }
+    @property
+    def sections(self):
+        # Split lazily so a cache hit in parse() never pays for it
+        if self._sections is None:
+            self._sections = split_into_sections(self.resume_text)
+        return self._sections
+
+    @property
+    def annotations(self):
+        # One annotation pass over the whole text, shared by every extractor
+        if self._annotations is None:
+            self._annotations = annotate(self.resume_text)
+        return self._annotations
+
+    def parse(self, use_cache=True, profile=False, fields=None):
+        # Every stage is timed and reported to the hooks in
+        # parser.instrumentation. With profile=True the per-stage breakdown is
+        # also returned under result["profile"].
+        fields = select_fields(fields)
+        timer = StageTimer()
+
+        # Identical text (after normalisation) parsed by the same parser code
+        # and taxonomy always gives the same result, so serve repeats from the
+        # parse cache (see parser.cache). Only complete results are stored; a
+        # field selection is served by slicing one. A truncated document is
+        # never looked up: its key would be that of the truncated text.
+        cache = get_cache() if use_cache and not self.truncated else None
+        result = None
+        if cache is not None:
+            with timer.stage("cache_lookup"):
+                key = cache_key(self.resume_text, self.experience_calculator.current_month())
+                result = cache.get(key)
+        cache_hit = result is not None
+
+        if result is None:
+            result = self._parse(timer, fields)
+            # Partial results depend on load (and the budgets), so aren't kept
+            if cache is not None and fields == FIELDS and not result["partial"]:
+                cache.put(key, result)
+        elif fields != FIELDS:
+            result = select_result(result, fields)
+
+        if profile:
+            result["profile"] = timer.profile(cache_hit=cache_hit, input_chars=self.input_chars)
+        return result
+
+    def parse_incremental(self, previous_text, previous_result, profile=False):
+        """Re-parse an edited resume, reusing what didn't change.
+
+        Both texts are split into sections and compared; fields whose sections
+        are unchanged are copied from previous_result (a complete, non-partial
+        result for previous_text) and only the rest are extracted. Editing a
+        bullet under Experience re-runs the experience stage, not skills. The
+        result is the same as a full parse() of the new text. The names of the
+        fields carried over are left in self.reused.
+        """
+        timer = StageTimer()
+        self.reused = []
+        if previous_result and not previous_result.get("partial") and not self.truncated:
+            previous = ResumeParser(previous_text, max_chars=self.max_chars, time_budget=0)
+            with timer.stage("diff_sections"):
+                changed = changed_sections(previous.sections, self.sections)
+                # Without a Skills section, skills are read from the whole text
+                reusable = [
+                    name for name, sections in FIELD_SECTIONS.items()
+                    if name in previous_result and changed.isdisjoint(sections)
+                    and (name != "skills" or "skills" in self.sections)
+                ]
+                # The contact scan only reads past the header block when the
+                # header lacks a field, so otherwise only the header matters
+                if ("personal_info" in previous_result and HEADER_SECTION not in changed
+                        and header_is_sufficient(previous.sections.header)):
+                    reusable.insert(0, "personal_info")
+            for name in reusable:
+                self._values[name] = deepcopy(previous_result[name])
+            self.reused = reusable
+
+        result = self._parse(timer)
+        if profile:
+            result["profile"] = timer.profile(cache_hit=False, input_chars=self.input_chars, reused=self.reused)
+        return result
+
+    def _parse(self, timer, fields=FIELDS):
+        if self.time_budget:
+            self._deadline = time.perf_counter() + self.time_budget
+        result = {name: self._evaluate(name, timer) for name in fields}
+        result["partial"] = self.partial
+        return result
+
+    def _evaluate(self, name, timer):
+        # Each field is computed at most once per parser, after its dependencies
+        if name not in self._values:
+            for dependency in FIELD_DEPENDENCIES.get(name, ()):
+                self._evaluate(dependency, timer)
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                self.partial = True
+                self._values[name] = self._empty(name)
+            else:
+                with timer.stage(STAGE_NAMES.get(name, name)):
+                    self._values[name] = getattr(self, "_compute_" + name)()
+        return self._values[name]
+
+    @staticmethod
+    def _empty(name):
+        # What a stage skipped for want of time leaves behind
+        if name == "sections":
+            return split_into_sections("")
+        if name == "annotations":
+            return annotate("")
+        return deepcopy(EMPTY_VALUES[name])
+
+    def _compute_sections(self):
+        return self.sections
+
+    def _compute_annotations(self):
+        return self.annotations
+
+    def _compute_personal_info(self):
+        return self.extract_personal_info()
+
+    def _compute_summary(self):
+        return self.extract_summary()
+
+    def _compute_skills(self):
+        return self._primed_skills if self._primed_skills is not None else self.extract_skills()
+
+    def _compute_experience(self):
+        return self.extract_experience()
+
+    def _compute_education(self):
+        return self.extract_education()
+
+    def _compute_projects(self):
+        return self.extract_projects()
+
+    def _compute_certifications(self):
+        return self.extract_certifications()
+
+    def _compute_total_experience_years(self):
+        return self.experience_calculator.calculate_total_experience(self._values["experience"])
+
+    def _compute_confidence_score(self):
+        return round(1 - len(self._values["missing_fields"]) / len(EXPECTED_FIELDS), 2)
+
+    def _compute_missing_fields(self):
+        missing = []
+        for path in EXPECTED_FIELDS:
+            name, _, key = path.partition(".")
+            value = self._values[name]
+            if key:
+                value = value.get(key)
+            elif isinstance(value, dict):  # skills: found if any category is non-empty
+                value = any(value.values())
+            if not value:
+                missing.append(path)
+        return missing
+
+    @classmethod
+    def parse_many(cls, resume_texts, workers=None, chunksize=8):
+        # Fan a batch out across worker processes; see parser.batch for details.
+        from parser.batch import parse_many
+        return parse_many(resume_texts, workers=workers, chunksize=chunksize)
 
     def extract_personal_info(self):
-        name = self.extract_name()
-        email = self.extract_email()
-        phone = self.extract_phone()
-        location = self.extract_location()
-        linkedin = self.extract_linkedin()
-        github = self.extract_github()
-        portfolio = self.extract_portfolio()
-
-        return {
-            "full_name": name,
-            "email": email,
-            "phone": phone,
-            "location": location,
-            "linkedin": linkedin,
-            "github": github,
-            "portfolio": portfolio
-        }
+        # All contact fields come from one pass over the text (see parser.contact)
+        return dict(self._contact_info())
+
+    def _contact_info(self):
+        if self._contact is None:
+            self._contact = extract_contact_info(self.resume_text, find_header_end(self.resume_text))
+        return self._contact
 
     def extract_name(self):
-        # This is a simple regex, a more robust solution would be to use NLP
-        text = self.resume_text.strip()
-        match = re.search(r"([A-Z][a-z]+(?: [A-Z][a-z]+)+)", text)
-        return match.group(0) if match else None
+        return self._contact_info()["full_name"]
 
     def extract_email(self):
-        match = re.search(r"[\w\.-]+@[\w\.-]+", self.resume_text)
-        return match.group(0) if match else None
+        return self._contact_info()["email"]
 
     def extract_phone(self):
-        match = re.search(r"\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}", self.resume_text)
-        return match.group(0) if match else None
+        return self._contact_info()["phone"]
 
     def extract_location(self):
-        # This is a very basic regex and will need to be improved
-        match = re.search(r"((?:[A-Z][a-z]+(?: )?)+, [A-Z]{2})", self.resume_text)
-        return match.group(0) if match else None
+        return self._contact_info()["location"]
 
     def extract_linkedin(self):
-        match = re.search(r"linkedin\.com/in/[\w-]+", self.resume_text)
-        return match.group(0) if match else None
+        return self._contact_info()["linkedin"]
 
     def extract_github(self):
-        match = re.search(r"github\.com/[\w-]+", self.resume_text)
-        return match.group(0) if match else None
+        return self._contact_info()["github"]
 
     def extract_portfolio(self):
-        # Look for a URL that is not linkedin or github
-        match = re.search(r"(https?://[^\s/$.?#].[^\s]*)", self.resume_text)
-        if match:
-            url = match.group(0)
-            if "linkedin.com" not in url and "github.com" not in url:
-                return url
-        return None
+        return self._contact_info()["portfolio"]
 
     def extract_summary(self):
-        # Find the "Summary" section in the pre-processed sections
-        for title, content in self.sections.items():
-            if title.lower() == "summary":
-                return content.strip()
-        return None
+        # Sections are keyed by normalised name, so "Profile" or "Objective"
+        # headers land here too (see parser.utils.SECTION_ALIASES)
+        return self.sections.get("summary")
 
     def extract_skills(self):
-        skills_section_content = ""
-        for title, content in self.sections.items():
-            if title.lower() == "skills":
-                skills_section_content = content
-                break
-        
-        self.skill_extractor = SkillExtractor(skills_section_content)
+        if "skills" not in self.sections:
+            # No Skills section: every skill and tool named anywhere in the
+            # text, as found by the annotation pass
+            skills = {category: [] for category in SKILL_CATEGORIES}
+            for span in self.annotations.within(0, len(self.resume_text), "skill", "tool"):
+                skills.setdefault(span.category, []).append(span.value)
+            return {category: list(dict.fromkeys(names)) for category, names in skills.items()}
+        self.skill_extractor = SkillExtractor(self.sections["skills"])
         return self.skill_extractor.extract_skills()
 
+    @staticmethod
+    def extract_skills_many(parsers):
+        """Extract the Skills sections of many parsers in one
+        SkillExtractor.extract_many call, so the prose in all of them goes
+        through the NLP backend as one nlp.pipe batch. Each parser's next
+        parse() uses its share instead of extracting it again."""
+        parsers = [parser for parser in parsers if "skills" in parser.sections]
+        found = SkillExtractor.extract_many([parser.sections["skills"] for parser in parsers])
+        for parser, skills in zip(parsers, found):
+            parser._primed_skills = skills
+
     def extract_experience(self):
-        experience_section_content = ""
-        for title, content in self.sections.items():
-            if title.lower() == "experience":
-                experience_section_content = content
-                break
-
-        experiences = []
-        if not experience_section_content:
-            return experiences
-
-        # Split into individual job entries more robustly
-        # Look for lines that start with a potential job title or company name.
-        # This is a heuristic and might need refinement for various resume formats.
-        lines = experience_section_content.split('\n')
-        job_entries_raw = []
-        current_job_entry = []
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Heuristic: A new job entry often starts with a line containing
-            # a role (e.g., Software Engineer) or a company name (e.g., Acme Inc.)
-            # and often includes a date or date range on the same or next line.
-            # For simplicity, let's assume a new job entry starts with a line
-            # that is not a bullet point description.
-            # Or, a line that contains " at " or " | " which often separates role and company.
-            if (re.search(r'\b(?:Engineer|Developer|Manager|Analyst)\b', line, re.IGNORECASE) or
-                re.search(r'\b(?:Inc\.|Corp\.|LLC|Ltd\.)\b', line) or
-                re.search(r'^\S+(?: at |\s*\|\s*)\S+', line)): # Starts with something then ' at ' or ' | '
-                if current_job_entry:
-                    job_entries_raw.append("\n".join(current_job_entry))
-                current_job_entry = [line]
-            else:
-                current_job_entry.append(line)
-        
-        if current_job_entry:
-            job_entries_raw.append("\n".join(current_job_entry))
-
-        for entry_text in job_entries_raw:
-            job_details = self._parse_job_entry(entry_text)
-            if job_details:
-                experiences.append(job_details)
-        
-        return experiences
-
-    def _parse_job_entry(self, entry_text):
-        company = None
-        role = None
-        location = None
-        start_date = None
-        end_date = None
-        is_current = False
-        description = []
-        technologies = []
-
-        lines = entry_text.split('\n')
-        header_lines = []
-        description_lines = []
-
-        # Separate header lines from description lines (usually bullet points)
-        for line in lines:
-            if line.strip().startswith('-'):
-                description_lines.append(line.strip())
-            else:
-                header_lines.append(line.strip())
-
-        header = " ".join(header_lines)
-
-        # Extract Role and Company
-        # Pattern: Role at Company | Location | Dates
-        # Pattern: Company | Role | Location | Dates
-        role_company_match = re.search(r"^(.*?)(?: at | @ | in | \| )(.*?)(?: \| (.*?))?(?: \| (.*?))?$", header)
-        if role_company_match:
-            part1 = role_company_match.group(1).strip()
-            part2 = role_company_match.group(2).strip()
-
-            # Heuristics to determine role and company
-            if re.search(r'\b(?:Engineer|Developer|Manager|Analyst)\b', part1, re.IGNORECASE) or 'Software' in part1:
-                role = part1
-                company = part2
-            elif re.search(r'\b(?:Inc\.|Corp\.|LLC|Ltd\.)\b', part1):
-                company = part1
-                role = part2
-            else: # Default: assume role then company
-                role = part1
-                company = part2
-        else: # Try simpler approach if complex regex fails
-            # Attempt to find role and company using common delimiters
-            parts = [p.strip() for p in header.split('|') if p.strip()]
-            if len(parts) >= 2:
-                # Assuming the first two parts are likely role and company or vice versa
-                if re.search(r'\b(?:Engineer|Developer|Manager|Analyst)\b', parts[0], re.IGNORECASE):
-                    role = parts[0]
-                    company = parts[1] if len(parts) > 1 else None
-                elif re.search(r'\b(?:Inc\.|Corp\.|LLC|Ltd\.)\b', parts[0]):
-                    company = parts[0]
-                    role = parts[1] if len(parts) > 1 else None
-                else: # Fallback
-                    role = parts[0]
-                    company = parts[1] if len(parts) > 1 else None
-            elif len(parts) == 1:
-                # If only one part, try to identify if it's a role or company
-                if re.search(r'\b(?:Engineer|Developer|Manager|Analyst)\b', parts[0], re.IGNORECASE):
-                    role = parts[0]
-                else:
-                    company = parts[0]
-
-
-        # Extract Dates
-        date_range_match = re.search(r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}\s*-\s*(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)?\s*\d{4}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}\s*-\s*Present", header, re.IGNORECASE)
-        if date_range_match:
-            date_range = date_range_match.group(0)
-            if 'Present' in date_range:
-                is_current = True
-                parts = date_range.split('-')
-                start_date = parts[0].strip()
-                end_date = None # As it's current
-            else:
-                parts = date_range.split('-')
-                start_date = parts[0].strip()
-                end_date = parts[1].strip()
-        else: # Simpler date extraction
-            # Try to find two four-digit years, possibly with months
-            date_match_simple = re.findall(r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)?\s*(\d{4})", header, re.IGNORECASE)
-            if len(date_match_simple) >= 2:
-                start_date = date_match_simple[0]
-                end_date = date_match_simple[1]
-            elif len(date_match_simple) == 1 and 'Present' in header:
-                start_date = date_match_simple[0]
-                is_current = True
-
-
-        # Extract Location
-        # Look for patterns like "City, ST" or "City, Country"
-        location_match = re.search(r"([A-Z][a-z]+(?: [A-Z][a-z]+)*, (?:[A-Z]{2}|\b\w+\b))", header)
-        if location_match:
-            location = location_match.group(0)
-
-        # Technologies will be extracted later
-        
-        return {
-            "company": company,
-            "role": role,
-            "location": location,
-            "start_date": start_date,
-            "end_date": end_date,
-            "is_current": is_current,
-            "description": "\n".join(description_lines),
-            "technologies": technologies
-        }
+        # One classifying pass over the lines, then one scan per entry header
+        # (see parser.experience_extractor)
+        return self._extract_section("experience", ExperienceExtractor)
 
     def extract_education(self):
-        # Placeholder
-        return []
+        return self._extract_section("education", EducationExtractor)
 
     def extract_projects(self):
-        # Placeholder
-        return []
\ No newline at end of file
+        return self._extract_section("projects", ProjectExtractor)
+
+    def extract_certifications(self):
+        return self._extract_section("certifications", CertificationExtractor)
+
+    def _extract_section(self, key, extractor):
+        # Entry extractors read the section's text and the annotation spans
+        # that fall inside it; none of them scans the text for entities again
+        if key not in self.sections:
+            return []
+        return extractor(self.sections[key], annotations=self.annotations.section(self.sections, key)).extract()
\ No newline at end of file
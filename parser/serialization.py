@@ -0,0 +1,35 @@
+"""JSON encoding for results on the hot paths: API responses, the parse cache
+and the CLI's NDJSON output.
+
+orjson, when installed, writes dicts and dataclasses straight to bytes,
+several times faster than the json module and without building intermediate
+copies. Without it the json module is used; the JSON is the same.
+"""
+import dataclasses
+import json
+
+try:
+    import orjson
+except ImportError:  # optional; pip install orjson
+    orjson = None
+
+
+def _default(obj):
+    # Dataclasses (parser.models) for the json fallback; orjson handles them natively
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialise to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    # Accepts bytes or str
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,37 +1,49 @@
 import re
-import spacy
+from parser.nlp import get_backend
+from parser.taxonomy import get_matcher
 
-# Load a pre-trained spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Downloading spaCy model 'en_core_web_sm'...")
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+SKILL_CATEGORIES = ["technical", "frameworks", "tools", "languages", "soft"]
+ACRONYMS = ["AWS", "GCP", "SQL", "HTML", "CSS", "API", "C++", "C#"]
+FILLER_PATTERN = re.compile(r"\b(?:and|or)\b", re.IGNORECASE)
+
+# Skills sections are usually comma/bullet lists. A list item longer than this
+# is treated as prose ("Built services in Python and Go using Docker") and gets
+# split into noun phrases by the NLP backend before categorisation.
+MAX_LIST_ITEM_WORDS = 4
 
 class SkillExtractor:
-    def __init__(self, skills_section_content):
+    def __init__(self, skills_section_content, backend=None, matcher=None):
         self.skills_section_content = skills_section_content
-        # Define keywords for categorization (can be expanded)
-        self.technical_keywords = ["python", "java", "c++", "c#", "javascript", "typescript", "golang", "ruby", "php", "swift", "kotlin", "html", "css", "sql", "nosql", "bash", "shell", "r", "matlab", "scala", "go", "rust"]
-        self.framework_keywords = ["react", "angular", "vue", "django", "flask", "spring", "spring boot", "node.js", "express.js", "ruby on rails", "asp.net", "laravel", "symfony", "tensorflow", "pytorch", "keras", "scikit-learn", "numpy", "pandas"]
-        self.tool_keywords = ["docker", "kubernetes", "aws", "azure", "gcp", "git", "jenkins", "jira", "confluence", "trello", "webpack", "babel", "maven", "gradle", "terraform", "ansible", "kubernetes", "vscode", "intellij", "pycharm", "jira"]
-        self.language_keywords = ["english", "spanish", "french", "german", "mandarin", "japanese"]
-        self.soft_skill_keywords = ["communication", "teamwork", "leadership", "problem-solving", "adaptability", "creativity", "time management", "critical thinking", "interpersonal", "collaboration", "client management", "project management"]
+        self.backend = backend
+        # Skill names, aliases and categories come from the shared taxonomy
+        # (parser/data/skills_taxonomy.json), compiled once per process.
+        self.matcher = matcher or get_matcher()
+
+    @classmethod
+    def extract_many(cls, skills_sections, backend=None, matcher=None):
+        # Batch entry point: prose from every section goes through the NLP
+        # backend in a single noun_phrases_many (nlp.pipe) call.
+        matcher = matcher or get_matcher()
+        extractors = [cls(content, backend=backend, matcher=matcher) for content in skills_sections]
+        phrase_lists = [extractor.split_phrases() for extractor in extractors]
+
+        prose = [phrase for phrases in phrase_lists for phrase in phrases if len(phrase.split()) > MAX_LIST_ITEM_WORDS]
+        if prose:
+            backend = backend or get_backend()
+            noun_phrases = dict(zip(prose, backend.noun_phrases_many(prose)))
+            phrase_lists = [
+                [part for phrase in phrases for part in noun_phrases.get(phrase, [phrase])]
+                for phrases in phrase_lists
+            ]
 
+        return [extractor.categorize(phrases) for extractor, phrases in zip(extractors, phrase_lists)]
 
     def extract_skills(self):
-        skills = {
-            "technical": [],
-            "frameworks": [],
-            "tools": [],
-            "languages": [],
-            "soft": []
-        }
-        
+        return self.extract_many([self.skills_section_content], backend=self.backend, matcher=self.matcher)[0]
+
+    def split_phrases(self):
         if not self.skills_section_content:
-            return skills
+            return []
 
         # Pre-process content: split by lines, strip whitespace, remove leading hyphens
         cleaned_lines = []
@@ -44,50 +56,36 @@ class SkillExtractor:
         
         preprocessed_content = ", ".join(cleaned_lines) # Join back for consistent splitting
 
-        doc = nlp(preprocessed_content.lower()) # Process the skills section content
-
         # Split by comma or newline for now, to keep "Problem-Solving" together
         potential_skills = re.split(r'[,\n]', preprocessed_content)
-        extracted_skill_phrases = [skill.strip() for skill in potential_skills if skill.strip()]
+        return [skill.strip() for skill in potential_skills if skill.strip()]
+
+    def categorize(self, extracted_skill_phrases):
+        skills = {category: [] for category in SKILL_CATEGORIES}
 
         for skill_phrase in extracted_skill_phrases:
-            skill_phrase_lower = skill_phrase.lower()
-            
-            categorized = False
+            matches = self.matcher.find(skill_phrase)
+            for match in matches:
+                skills.setdefault(match.category, []).append(match.name)
+            if matches:
+                continue
 
-            # Check for exact matches or strong inclusions
-            # Prioritize soft skills, then specific technical categories
-            if any(kw == skill_phrase_lower for kw in self.soft_skill_keywords): # Exact match for soft skills
-                skills["soft"].append(skill_phrase)
-                categorized = True
-            elif any(kw in skill_phrase_lower for kw in self.framework_keywords):
-                skills["frameworks"].append(skill_phrase)
-                categorized = True
-            elif any(kw in skill_phrase_lower for kw in self.tool_keywords):
-                skills["tools"].append(skill_phrase)
-                categorized = True
-            elif any(kw in skill_phrase_lower for kw in self.technical_keywords):
-                skills["technical"].append(skill_phrase)
-                categorized = True
-            elif any(kw in skill_phrase_lower for kw in self.language_keywords): # Languages typically less common in skills section
-                skills["languages"].append(skill_phrase)
-                categorized = True
-            
-            # If not categorized by specific keywords, add to technical as a general bucket
-            if not categorized and skill_phrase:
-                 # Avoid adding very short or generic words that are not skills
-                if len(skill_phrase) > 2 and "and" not in skill_phrase_lower and "or" not in skill_phrase_lower:
-                    skills["technical"].append(skill_phrase)
-            
-            # Remove duplicates and clean up lists
-            ACRONYMS = ["AWS", "GCP", "SQL", "HTML", "CSS", "API", "C++", "C#"]
-            for category in skills:
-                cleaned_skills = []
-                for s in skills[category]:
-                    if s.upper() in ACRONYMS:
-                        cleaned_skills.append(s.upper()) # Keep acronyms uppercase
-                    else:
-                        cleaned_skills.append(s.title()) # Capitalize other skills
-                skills[category] = list(set(cleaned_skills))
-        
-        return skills
+            # A list item that is a skill on its own ("go", "spring") counts
+            # in any case; only prose needs the taxonomy's casing
+            found = self.matcher.lookup(skill_phrase)
+            if found is not None:
+                name, category = found
+                skills.setdefault(category, []).append(name)
+            # If nothing in the taxonomy matched, add to technical as a general
+            # bucket, avoiding very short or generic words that are not skills
+            elif len(skill_phrase) > 2 and not FILLER_PATTERN.search(skill_phrase):
+                skills["technical"].append(self._display_name(skill_phrase))
+
+        # Remove duplicates, keeping first-seen order
+        return {category: list(dict.fromkeys(names)) for category, names in skills.items()}
+
+    @staticmethod
+    def _display_name(skill_phrase):
+        if skill_phrase.upper() in ACRONYMS:
+            return skill_phrase.upper() # Keep acronyms uppercase
+        return skill_phrase.title() # Capitalize other skills
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills_taxonomy.json")
+
+# A token is a run of word characters, "+" or "#", optionally joined by "." or
+# "-" (so "C++", "C#", "Node.js", "scikit-learn" and "Problem-Solving" are each
+# one token). Matching whole tokens is what stops "r" matching inside "React".
+TOKEN_PATTERN = re.compile(r"[\w+#]+(?:[.\-][\w+#]+)*")
+
+# ambiguous: the surface matched is also an ordinary word (see SkillMatcher)
+SkillMatch = namedtuple("SkillMatch", ["name", "category", "start", "end", "ambiguous"], defaults=(False,))
+
+_END = None  # trie key marking "a skill ends here"; real tokens are never None
+# Trie key for the surfaces ending here that only match as written:
+# {(token, ...) as written: (name, category)}
+_CASED = 0
+
+
+def tokenize(text):
+    return [(m.group().lower(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+class SkillMatcher:
+    """Token trie over every skill name and alias in a taxonomy.
+
+    find() walks the text once, taking the longest skill that starts at each
+    token, so the cost is linear in the text and independent of how many
+    skills the taxonomy holds.
+
+    Matching ignores case, except for the surfaces an entry lists as
+    "ambiguous": names and aliases that are also ordinary words ("Go",
+    "Spring", "C"). Those only match written exactly as listed, so "go to
+    market" names no skill, and their matches are flagged ambiguous: text
+    outside a Skills section only counts them in a list (in_list_context()).
+    """
+
+    def __init__(self, taxonomy):
+        self.version = str(taxonomy.get("version", "unversioned"))
+        self.fingerprint = hashlib.sha256(json.dumps(taxonomy, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.categories = list(taxonomy["categories"])
+        self._trie = {}
+        self.size = 0
+
+        for category, entries in taxonomy["categories"].items():
+            for entry in entries:
+                if isinstance(entry, str):
+                    name, aliases, ambiguous = entry, [], []
+                else:
+                    name, aliases, ambiguous = entry["name"], entry.get("aliases", []), entry.get("ambiguous", [])
+                cased = {surface.lower() for surface in ambiguous}
+                for surface in [name] + list(aliases):
+                    if surface.lower() not in cased:
+                        self._add(surface, (name, category))
+                for surface in ambiguous:
+                    self._add(surface, (name, category), cased=True)
+                self.size += 1
+
+    def _add(self, surface, value, cased=False):
+        node = self._trie
+        for token, _, _ in tokenize(surface):
+            node = node.setdefault(token, {})
+        if node is self._trie:
+            return
+        # First definition wins if two entries share a surface form
+        if cased:
+            node.setdefault(_CASED, {}).setdefault(tuple(TOKEN_PATTERN.findall(surface)), value)
+        else:
+            node.setdefault(_END, value)
+
+    def find(self, text):
+        found = list(TOKEN_PATTERN.finditer(text))
+        written = [match.group() for match in found]
+        return [
+            SkillMatch(name, category, found[start].start(), found[end - 1].end(), ambiguous)
+            for start, end, (name, category), ambiguous in self._longest(_lowered(written), written)
+        ]
+
+    def match_tokens(self, tokens, written):
+        # [(first, stop, (name, category), ambiguous)]: token index ranges of
+        # the skills in a list of lower-cased tokens, with the same tokens as
+        # written alongside (see parser.annotations)
+        return self._longest(tokens, written)
+
+    def names(self, text):
+        # (name, category) of each match, without offsets: tokenising with
+        # findall() is several times faster than find()
+        written = TOKEN_PATTERN.findall(text)
+        return [value for _, _, value, _ in self._longest(_lowered(written), written)]
+
+    def lookup(self, phrase):
+        """(name, category) when the whole phrase is one skill's name or
+        alias in any case, ambiguous ones included, else None. For a phrase
+        that is known to be a skill list item."""
+        node = self._trie
+        for token, _, _ in tokenize(phrase):
+            node = node.get(token)
+            if node is None:
+                return None
+        if node is self._trie:
+            return None
+        if _END in node:
+            return node[_END]
+        return next(iter(node[_CASED].values())) if _CASED in node else None
+
+    def _longest(self, tokens, written):
+        # [(start, end, value, ambiguous)] for the longest skill starting at
+        # each token, resuming after the end of every match
+        matches = []
+        trie = self._trie
+        count = len(tokens)
+        i = 0
+        while i < count:
+            node = trie.get(tokens[i])
+            if node is None:  # most tokens start no skill at all
+                i += 1
+                continue
+            best = None
+            j = i
+            while True:
+                if _END in node:
+                    best = (j + 1, node[_END], False)
+                elif _CASED in node:
+                    value = node[_CASED].get(tuple(written[i:j + 1]))
+                    if value is not None:
+                        best = (j + 1, value, True)
+                j += 1
+                if j == count:
+                    break
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+            if best is None:
+                i += 1
+                continue
+            matches.append((i, *best))
+            i = best[0]
+        return matches
+
+
+def _lowered(tokens):
+    # Lower-casing every token in one call is much cheaper than one call each
+    return "\n".join(tokens).lower().split("\n") if tokens else []
+
+
+# A skill named in a list: nothing but a separator (or the line's start or
+# end) on either side of it within its line
+_LIST_BEFORE = ",|;/:(*\u2022\u00b7"
+_LIST_AFTER = ",|;/)."
+
+
+def in_list_context(text, start, end):
+    """Whether text[start:end] stands as an item of a comma/pipe-style list
+    ("Go, Rust | Docker") or alone on its line (after any bullet)."""
+    before = text[text.rfind("\n", 0, start) + 1:start].rstrip(" \t")
+    newline = text.find("\n", end)
+    after = text[end:newline if newline >= 0 else len(text)].lstrip(" \t")
+    before_ok = not before.lstrip("-*\u2022\u00b7 \t") or before[-1] in _LIST_BEFORE
+    after_ok = not after or after[0] in _LIST_AFTER
+    return before_ok and after_ok
+
+
+def load_taxonomy(path=None):
+    with open(path or taxonomy_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def taxonomy_path():
+    return os.environ.get("PARSER_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+
+
+# The matcher is built once per process and shared. If the taxonomy file
+# changes on disk it is rebuilt on the next lookup (checked at most every
+# PARSER_TAXONOMY_CHECK_INTERVAL seconds), so every worker picks up a new
+# taxonomy without a restart. reload_taxonomy() forces it immediately.
+_matcher = None
+_matcher_mtime = None
+_matcher_path = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _check_interval():
+    return float(os.environ.get("PARSER_TAXONOMY_CHECK_INTERVAL", "30"))
+
+
+def reload_taxonomy(path=None):
+    global _matcher, _matcher_mtime, _matcher_path, _last_check
+    path = path or taxonomy_path()
+    with _lock:
+        mtime = os.path.getmtime(path)
+        matcher = SkillMatcher(load_taxonomy(path))
+        _matcher, _matcher_mtime, _matcher_path = matcher, mtime, path
+        _last_check = time.monotonic()
+    return matcher
+
+
+def get_matcher():
+    global _last_check
+    if _matcher is None:
+        return reload_taxonomy()
+
+    now = time.monotonic()
+    if now - _last_check >= _check_interval():
+        _last_check = now
+        try:
+            changed = os.path.getmtime(_matcher_path) != _matcher_mtime
+        except OSError:
+            changed = False
+        if changed:
+            return reload_taxonomy(_matcher_path)
+    return _matcher
@@ -1,45 +1,178 @@
 import re
+from collections.abc import Mapping
+
+# Section headers, keyed by the normalised name the parser looks sections up
+# by. Every alias (matched case-insensitively, optionally followed by a colon)
+# maps to that key, so "Work History" and "Professional Experience" both land
+# in sections["experience"].
+SECTION_ALIASES = {
+    "summary": ["Summary", "Professional Summary", "Profile", "About Me", "Objective", "Career Objective"],
+    "experience": [
+        "Experience", "Work Experience", "Professional Experience", "Work History",
+        "Employment History", "Employment", "Career History", "Relevant Experience",
+    ],
+    "education": ["Education", "Academic Background", "Education and Training"],
+    "skills": ["Skills", "Technical Skills", "Core Skills", "Key Skills", "Core Competencies", "Skills and Tools"],
+    "projects": ["Projects", "Personal Projects", "Selected Projects", "Key Projects"],
+    "certifications": ["Certifications", "Certificates", "Licenses and Certifications", "Licenses & Certifications"],
+    "awards": ["Awards", "Honors", "Honors and Awards", "Achievements"],
+    "publications": ["Publications"],
+    "interests": ["Interests", "Hobbies"],
+    "volunteer_experience": ["Volunteer Experience", "Volunteering", "Volunteer Work"],
+}
+# Kept for callers that only need the canonical titles
+SECTION_TITLES = [aliases[0] for aliases in SECTION_ALIASES.values()]
+
+_ALIAS_KEYS = {
+    " ".join(alias.lower().split()): key
+    for key, aliases in SECTION_ALIASES.items()
+    for alias in aliases
+}
+# One precompiled pattern for every alias, longest first. Only spaces and tabs
+# are allowed around a header, so no match can run across lines and the scan
+# stays linear in the length of the text.
+SECTION_HEADER_PATTERN = re.compile(
+    r"^[ \t]*("
+    + "|".join(re.escape(alias).replace(r"\ ", r"[ \t]+") for alias in sorted(_ALIAS_KEYS, key=len, reverse=True))
+    + r")[ \t]*:?[ \t\r]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# Joins the blocks of a section that appears more than once
+BLOCK_SEPARATOR = "\n\n"
+
+# A list bullet at the start of a line, with the space after it
+BULLET_PATTERN = re.compile(r"[-•*▪◦‣●–][ \t]*")
+
+MAIN_SECTION = "__main__"
+# Pseudo-section for the block before the first header (name, contact
+# details), as reported by changed_sections()
+HEADER_SECTION = "__header__"
+
+
+def section_key(title):
+    # Normalised key for a header as written ("  Work   HISTORY:" -> "experience")
+    return _ALIAS_KEYS.get(" ".join(title.lower().rstrip(":").split()))
+
+
+def find_header_end(resume_text):
+    # The header block (name, contact details) is everything before the first
+    # section header.
+    match = SECTION_HEADER_PATTERN.search(resume_text)
+    return match.start() if match else len(resume_text)
+
+
+def iter_lines(text):
+    # (start, end, line) for every line of text, line stripped of surrounding
+    # whitespace and start/end the offsets of what is left; blank lines come
+    # through as ""
+    position = 0
+    for raw in text.split("\n"):
+        line = raw.strip()
+        start = position + len(raw) - len(raw.lstrip()) if line else position
+        yield start, start + len(line), line
+        position += len(raw) + 1
+
+
+def split_fields(text, start, end, separator):
+    # (start, end) of each non-blank stretch of text[start:end] between
+    # matches of the separator pattern, stripped of whitespace
+    fields = []
+    for match in separator.finditer(text, start, end):
+        fields.append(_strip_span(text, start, match.start()))
+        start = match.end()
+    fields.append(_strip_span(text, start, end))
+    return [(first, last) for first, last in fields if first < last]
+
+
+def _strip_span(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class Sections(Mapping):
+    """Sections of one resume, keyed by normalised section name.
+
+    Only (start, end) spans into the original text are recorded; a section's
+    content is sliced out the first time it is looked up. A section that
+    appears more than once (two "Experience" blocks, say) keeps every span and
+    its content is the blocks joined by a blank line, in document order.
+    """
+
+    def __init__(self, text, spans, titles=None, header_end=None):
+        self.text = text
+        self.spans = spans
+        self.titles = titles or {}
+        self.header_end = len(text) if header_end is None else header_end
+        self._content = {}
+
+    def __getitem__(self, key):
+        content = self._content.get(key)
+        if content is None:
+            spans = self.spans[key]
+            content = self._content[key] = BLOCK_SEPARATOR.join(self.text[start:end] for start, end in spans)
+        return content
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    @property
+    def header(self):
+        # Everything before the first section header
+        return self.text[:self.header_end]
+
+    def span(self, key):
+        # (start, end) of the first block of a section, or None
+        spans = self.spans.get(key)
+        return spans[0] if spans else None
+
+    def __repr__(self):
+        return f"Sections({dict(self.spans)!r})"
+
 
 def split_into_sections(resume_text):
-    # This regex looks for common section headers followed by a newline,
-    # or the start of the string. It captures the header and the content.
-    # It assumes sections are separated by at least two newlines or a header.
-    sections = {}
-    # A list of common section headers
-    section_titles = [
-        "Summary", "Experience", "Education", "Skills", "Projects",
-        "Certifications", "Awards", "Publications", "Interests", "Volunteer Experience"
-    ]
-    # Create a regex pattern to match any of the section titles
-    pattern = r"^\s*(" + "|".join(section_titles) + r")\s*$"
-
-    # Split the resume text by these section titles
-    # re.split will include the delimiters (section titles) if they are captured
-    # in the pattern. So we need to handle them.
-
-    # First, normalize newlines
-    resume_text = resume_text.replace('\r\n', '\n')
-
-    # Find all section headers and their start positions
-    matches = []
-    for match in re.finditer(pattern, resume_text, re.MULTILINE | re.IGNORECASE):
-        matches.append((match.group(1), match.start(), match.end()))
-
-    if not matches:
-        # If no explicit sections are found, treat the whole text as one section
-        sections["__main__"] = resume_text.strip()
-        return sections
-
-    # Add a dummy end for the last section
-    matches.append(("__END__", len(resume_text), len(resume_text)))
-
-    for i in range(len(matches) - 1):
-        title = matches[i][0].strip()
-        start = matches[i][2] # Start after the title
-        end = matches[i+1][1] # End before the next title
-
-        content = resume_text[start:end].strip()
-        if content:
-            sections[title] = content
-    
-    return sections
+    # A single pass of the precompiled header pattern. Each section runs from
+    # the end of its header line to the start of the next header; empty ones
+    # are dropped. Without any recognised header, the whole text is returned
+    # as the MAIN_SECTION section.
+    spans = {}
+    titles = {}
+    previous = None
+    header_end = None
+    for match in SECTION_HEADER_PATTERN.finditer(resume_text):
+        if previous is not None:
+            _add_span(resume_text, spans, previous[0], previous[1], match.start())
+        else:
+            header_end = match.start()
+        key = section_key(match.group(1))
+        titles.setdefault(key, match.group(1).strip())
+        previous = (key, match.end())
+
+    if previous is None:
+        start, end = _strip_span(resume_text, 0, len(resume_text))
+        return Sections(resume_text, {MAIN_SECTION: [(start, end)]})
+
+    _add_span(resume_text, spans, previous[0], previous[1], len(resume_text))
+    return Sections(resume_text, spans, {key: titles[key] for key in spans}, header_end)
+
+
+def changed_sections(old, new):
+    """Keys of the sections whose content differs between two Sections,
+    including HEADER_SECTION if the header block changed. A section that
+    was added or removed counts as changed."""
+    changed = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+    if old.header.strip() != new.header.strip():
+        changed.add(HEADER_SECTION)
+    return changed
+
+
+def _add_span(text, spans, key, start, end):
+    start, end = _strip_span(text, start, end)
+    if start < end:
+        spans.setdefault(key, []).append((start, end))
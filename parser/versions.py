@@ -0,0 +1,50 @@
+import os
+
+from parser.cache import ParseCache, cache_key
+
+
+class VersionStore:
+    """Recently parsed resumes (text and result), keyed by version id, so an
+    edited resume can be re-parsed incrementally against an earlier version.
+
+    Version ids are content addressed: the same text parsed by the same parser
+    code and taxonomy always gets the same id, and a parser or taxonomy change
+    retires every old id. Storage is a ParseCache, so it is an in-memory LRU
+    with an optional SQLite file shared between processes.
+    """
+
+    def __init__(self, max_entries=256, path=None):
+        self._entries = ParseCache(max_entries, path)
+
+    @staticmethod
+    def version_id(resume_text):
+        return cache_key(resume_text)[:32]
+
+    def put(self, resume_text, result):
+        version_id = self.version_id(resume_text)
+        self._entries.put(version_id, {"resume_text": resume_text, "result": result})
+        return version_id
+
+    def get(self, version_id):
+        # {"resume_text", "result"} for a known version, otherwise None
+        return self._entries.get(version_id)
+
+    def stats(self):
+        return self._entries.stats()
+
+
+_store = None
+_store_configured = False
+
+
+def get_version_store():
+    # PARSER_VERSION_STORE_SIZE bounds the in-memory LRU (0 turns it off) and
+    # PARSER_VERSION_STORE_PATH adds a shared SQLite file. With neither,
+    # versions aren't kept and this returns None.
+    global _store, _store_configured
+    if not _store_configured:
+        max_entries = int(os.environ.get("PARSER_VERSION_STORE_SIZE", "256"))
+        path = os.environ.get("PARSER_VERSION_STORE_PATH") or None
+        _store = VersionStore(max_entries, path) if max_entries > 0 or path else None
+        _store_configured = True
+    return _store
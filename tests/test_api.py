@@ -0,0 +1,313 @@
+import unittest
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("PARSER_WORKERS", "1")
+
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+_data_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault("PARSER_JOBS_PATH", os.path.join(_data_dir.name, "jobs.sqlite"))
+os.environ.setdefault("PARSER_INDEX_PATH", os.path.join(_data_dir.name, "index"))
+os.environ.setdefault("PARSER_CALLBACK_HOSTS", "127.0.0.1")
+os.environ.setdefault("PARSER_DEDUP", "on")
+
+from fastapi.testclient import TestClient
+from api.jobs import CallbackURLError, JobRunner, check_callback_url
+from api.main import app, cache, pool, warm_up_state
+from api.uploads import UploadError, _UploadWriter, receive_upload
+from benchmarks.synthetic import generate_resume
+from benchmarks.uploads import build_docx, multipart_request
+from parser.jobs import JobStore
+from parser.pool import WorkerLost
+
+RESUME = """Jane Roe
+Austin, TX | jane@example.com
+
+Skills
+Python, Docker
+"""
+
+class TestApi(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    @classmethod
+    def tearDownClass(cls):
+        pool.shutdown()
+
+    def test_profile_header_and_metrics(self):
+        plain = self.client.post("/parse-resume", json={"resume_text": RESUME + "\nInterests\nChess"})
+        self.assertEqual(plain.status_code, 200)
+        self.assertNotIn("profile", plain.json())
+
+        profiled = self.client.post("/parse-resume", json={"resume_text": RESUME}, headers={"X-Parse-Profile": "1"})
+        self.assertIn("skills", profiled.json()["profile"]["stages"])
+
+        metrics = self.client.get("/metrics").text
+        self.assertIn('resume_parser_requests_total{endpoint="/parse-resume",method="POST",status="200"}', metrics)
+        self.assertIn('resume_parser_stage_seconds_count{stage="skills"}', metrics)
+        self.assertIn("resume_parser_input_chars_count", metrics)
+        self.assertIn("resume_parser_pool_queue_depth", metrics)
+
+    def test_fields_query_parameter(self):
+        response = self.client.post("/parse-resume?fields=personal_info,skills", json={"resume_text": RESUME})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"personal_info", "skills", "partial"})
+        self.assertEqual(response.json()["personal_info"]["email"], "jane@example.com")
+
+        batch = self.client.post("/parse-resumes/batch?fields=skills", json={"resume_texts": [RESUME]})
+        self.assertEqual(list(batch.json()["results"][0]["result"]), ["skills", "partial"])
+
+        self.assertEqual(self.client.post("/parse-resume?fields=salary", json={"resume_text": RESUME}).status_code, 422)
+
+    def test_incremental_parse(self):
+        first = self.client.post("/parse-resume/incremental", json={"resume_text": RESUME + "\nSummary\nFirst draft"}).json()
+        self.assertIsNotNone(first["version_id"])
+        self.assertIsNone(first["base_version_id"])
+
+        second = self.client.post("/parse-resume/incremental", json={
+            "resume_text": RESUME + "\nSummary\nSecond draft",
+            "base_version_id": first["version_id"],
+        }).json()
+        self.assertEqual(second["base_version_id"], first["version_id"])
+        self.assertIn("skills", second["reused"])
+        self.assertEqual(second["result"]["summary"], "Second draft")
+
+        unknown = self.client.post("/parse-resume/incremental", json={"resume_text": RESUME + "\nInterests\nGo", "base_version_id": "nope"}).json()
+        self.assertIsNone(unknown["base_version_id"])
+        self.assertEqual(unknown["result"]["skills"]["tools"], ["Docker"])
+
+    def test_cache_hit_sends_stored_bytes(self):
+        body = {"resume_text": RESUME + "\nSummary\nCached"}
+        first = self.client.post("/parse-resume", json=body)
+        hits = self.client.get("/stats").json()["cache"]["hits"]
+        second = self.client.post("/parse-resume", json=body)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers["content-type"], "application/json")
+        self.assertEqual(self.client.get("/stats").json()["cache"]["hits"], hits + 1)
+        self.assertEqual(second.json()["missing_fields"], ["personal_info.phone", "experience", "education"])
+
+    def test_near_duplicates_share_a_cluster(self):
+        resume = generate_resume(11, jobs=3)
+        date = resume.split("\nExperience\n")[1].split("\n")[0].split(" | ")[-1][:8]
+        first = self.client.post("/parse-resume", json={"resume_text": resume})
+        self.assertNotIn("duplicate", first.json())
+
+        copy = resume.replace(date, "Feb 2001", 1)
+        second = self.client.post("/parse-resume", json={"resume_text": copy})
+        duplicate = second.json()["duplicate"]
+        self.assertEqual(second.headers["x-duplicate-cluster"], first.headers["x-duplicate-cluster"])
+        self.assertEqual(duplicate["cluster_id"], int(first.headers["x-duplicate-cluster"]))
+        self.assertIn("experience", duplicate["changed_fields"])
+        self.assertGreaterEqual(duplicate["similarity"], 0.9)
+
+        batch = self.client.post("/parse-resumes/batch", json={"resume_texts": [copy.replace("Feb 2001", "Mar 2001")]}).json()
+        self.assertEqual(batch["results"][0]["result"]["duplicate"]["cluster_id"], duplicate["cluster_id"])
+        self.assertGreaterEqual(self.client.get("/stats").json()["dedup"]["near_duplicates"], 2)
+
+    def test_file_upload(self):
+        text = self.client.post("/parse-resume/file", files={"file": ("cv.txt", RESUME.encode("utf-8"), "text/plain")})
+        self.assertEqual(text.status_code, 200)
+        self.assertEqual(text.json()["skills"]["tools"], ["Docker"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cv.docx")
+            build_docx(path, pages=1)
+            with open(path, "rb") as f:
+                docx = self.client.post("/parse-resume/file?fields=personal_info", files={"file": ("cv.docx", f)})
+        self.assertEqual(docx.status_code, 200)
+        self.assertIsNotNone(docx.json()["personal_info"]["email"])
+
+        self.assertEqual(self.client.post("/parse-resume/file", files={"other": ("cv.txt", b"x")}).status_code, 422)
+        self.assertEqual(self.client.post("/parse-resume/file", json={"resume_text": RESUME}).status_code, 415)
+        self.assertEqual(self.client.post("/parse-resume/file", files={"file": ("cv.pdf", b"not a pdf")}).status_code, 415)
+
+    def test_upload_cut_off_at_size_cap(self):
+        # No Content-Length, so the cap is enforced while streaming
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cv.txt")
+            with open(path, "wb") as f:
+                f.write(b"x" * 200_000)
+            with self.assertRaises(UploadError) as raised:
+                asyncio.run(receive_upload(multipart_request(path, "cv.txt"), max_bytes=100_000, directory=directory))
+            self.assertEqual(raised.exception.status_code, 413)
+            self.assertEqual(os.listdir(directory), ["cv.txt"])  # the partial upload is gone
+
+    def test_upload_is_written_off_the_event_loop(self):
+        threads = []
+        on_part_data = _UploadWriter.on_part_data
+
+        def record_thread(writer, *args):
+            threads.append(threading.get_ident())
+            return on_part_data(writer, *args)
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(_UploadWriter, "on_part_data", record_thread):
+            path = os.path.join(directory, "cv.txt")
+            with open(path, "w") as f:
+                f.write(RESUME)
+            upload = asyncio.run(receive_upload(multipart_request(path, "cv.txt"), directory=directory))
+            upload.remove()
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_cache_is_used_off_the_event_loop(self):
+        on_loop = []
+
+        def record_loop(method):
+            def wrapper(*args):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(method.__name__)
+                except RuntimeError:
+                    pass
+                return method(*args)
+            return wrapper
+
+        with mock.patch.object(cache, "get", record_loop(cache.get)), mock.patch.object(cache, "put", record_loop(cache.put)), \
+                mock.patch.object(cache, "get_payload", record_loop(cache.get_payload)):
+            texts = [generate_resume(31), generate_resume(32)]
+            for _ in range(2):
+                self.assertEqual(self.client.post("/parse-resume", json={"resume_text": texts[0]}).status_code, 200)
+                self.assertEqual(self.client.post("/parse-resumes/batch?fields=skills", json={"resume_texts": texts}).status_code, 200)
+                self.assertEqual(self.client.post("/parse-resume/incremental", json={"resume_text": texts[1]}).status_code, 200)
+        self.assertEqual(on_loop, [])
+
+    def test_ready_after_warm_up(self):
+        # Entering the client runs the lifespan, which warms the pool
+        with TestClient(app) as client:
+            self.assertEqual(client.get("/").status_code, 200)
+            deadline = time.monotonic() + 30
+            ready = client.get("/ready")
+            while ready.status_code == 503 and time.monotonic() < deadline:
+                self.assertIn("Retry-After", ready.headers)
+                time.sleep(0.05)
+                ready = client.get("/ready")
+            self.assertEqual(ready.status_code, 200)
+            self.assertEqual(ready.json()["workers"], pool.max_workers)
+            self.assertIn("resume_parser_pool_ready 1", client.get("/metrics").text)
+
+    def test_search_finds_parsed_resumes(self):
+        resume = RESUME.replace("Python, Docker", "Python, Kubernetes, Erlang")
+        self.client.post("/parse-resume", json={"resume_text": resume}, headers={"X-Candidate-Id": "cand-42"})
+        found = self.client.get("/search", params={"q": "erlang AND k8s", "max_years": 1}).json()
+        self.assertEqual([hit["candidate_id"] for hit in found["results"]], ["cand-42"])
+        self.assertEqual(self.client.get("/search", params={"q": "erlang AND NOT python"}).json()["total"], 0)
+        self.assertEqual(self.client.get("/search", params={"q": "(erlang"}).status_code, 422)
+
+    def test_job_runs_in_background(self):
+        received = []
+
+        class Callback(BaseHTTPRequestHandler):
+            def do_POST(self):
+                received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Callback)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with TestClient(app) as client:
+                created = client.post(
+                    "/jobs?fields=skills",
+                    json={"resume_texts": [RESUME] * 3, "callback_url": f"http://127.0.0.1:{server.server_port}/done"},
+                    headers={"X-Tenant-Id": "acme"},
+                )
+                self.assertEqual(created.status_code, 202)
+                job_id = created.json()["job_id"]
+                self.assertEqual(created.json()["tenant"], "acme")
+
+                deadline = time.monotonic() + 30
+                job = client.get(f"/jobs/{job_id}").json()
+                while (job["status"] != "done" or not received) and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    job = client.get(f"/jobs/{job_id}").json()
+                self.assertEqual((job["status"], job["completed"], job["progress"]), ("done", 3, 1.0))
+
+                page = client.get(f"/jobs/{job_id}?offset=1&limit=1").json()
+                self.assertEqual([item["index"] for item in page["results"]], [1])
+                self.assertEqual(page["results"][0]["result"]["skills"]["tools"], ["Docker"])
+                self.assertEqual(page["next_offset"], 2)
+                self.assertEqual(received[0]["job_id"], job_id)
+
+                self.assertEqual(client.get("/jobs/nope").status_code, 404)
+                for url in ("ftp://x", "http://169.254.169.254/latest/meta-data", "http://127.0.0.1:bad/"):
+                    self.assertEqual(client.post("/jobs", json={"resume_texts": [], "callback_url": url}).status_code, 422)
+        finally:
+            server.shutdown()
+
+    def test_job_chunk_lost_to_a_dead_worker_is_retried(self):
+        class DyingPool:
+            max_workers = 1
+            calls = 0
+
+            async def run(self, fn, *args):
+                self.calls += 1
+                if self.calls == 1:
+                    raise WorkerLost("a worker died")
+                return fn(*args)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobStore(os.path.join(tmp, "jobs.sqlite"))
+            job_id = store.submit([generate_resume(23)])
+            runner = JobRunner(store, DyingPool(), poll_seconds=0.05, retry_seconds=0.1)
+
+            async def drain():
+                runner.start()
+                deadline = time.monotonic() + 10
+                while store.get(job_id)["status"] != "done" and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                await runner.stop()
+
+            asyncio.run(drain())
+            job = store.get(job_id)
+            self.assertEqual((job["status"], job["completed"], job["failed"]), ("done", 1, 0))
+            self.assertEqual(runner.pool.calls, 2)
+
+    def test_ready_while_starting_under_load(self):
+        # Start the app with the pool's admission queue already full
+        saved = dict(warm_up_state)
+        pool.ready = False
+        busy = [pool.submit(time.sleep, 0.3) for _ in range(pool.capacity)]
+        try:
+            with TestClient(app) as client:
+                self.assertEqual(client.post("/parse-resume", json={"resume_text": RESUME + "\nUnder load"}).status_code, 503)
+                deadline = time.monotonic() + 60
+                ready = client.get("/ready")
+                while ready.status_code != 200 and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    ready = client.get("/ready")
+                self.assertEqual(ready.status_code, 200, ready.text)
+                self.assertIsNone(warm_up_state["error"])
+        finally:
+            for future in busy:
+                future.result()
+            warm_up_state.update(saved)
+
+    def test_callback_urls_must_be_public(self):
+        with mock.patch.dict(os.environ, PARSER_CALLBACK_HOSTS=""):
+            for url in ("http://localhost/hook", "http://10.1.2.3/hook", "http://169.254.169.254/latest",
+                        "http://[::1]/hook", "http://[::ffff:127.0.0.1]/hook", "https://0.0.0.0/"):
+                with self.subTest(url=url), self.assertRaises(CallbackURLError):
+                    check_callback_url(url)
+            check_callback_url("https://93.184.215.14/hook")
+        with mock.patch.dict(os.environ, PARSER_CALLBACK_HOSTS="hooks.internal, .example.com"):
+            check_callback_url("http://hooks.internal/done")
+            check_callback_url("https://api.example.com/done")
+            with self.assertRaises(CallbackURLError):
+                check_callback_url("https://example.com.evil.io/done")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_resume, PAGE_CHARS
+from benchmarks.run import compare
+from benchmarks.pathological import PAYLOADS, growth, pathological_resume, time_parse
+from benchmarks.startup import process_memory
+from benchmarks.dedup import run_index
+from parser.batch import init_worker
+from parser.resume_parser import ResumeParser
+
+class TestSyntheticResumes(unittest.TestCase):
+
+    def test_generator_is_seeded(self):
+        self.assertEqual(generate_resume(7), generate_resume(7))
+        self.assertNotEqual(generate_resume(7), generate_resume(8))
+
+    def test_generator_size_knobs(self):
+        text = generate_resume(1, jobs=4, skills=10, pages=3)
+        self.assertGreater(len(text), 2.5 * PAGE_CHARS)
+        parsed = ResumeParser(text).parse(use_cache=False)
+        self.assertIsNotNone(parsed["personal_info"]["email"])
+        self.assertTrue(any(parsed["skills"].values()))
+
+class TestPathologicalInputs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        init_worker()  # load the NLP backend and taxonomy outside the timings
+
+    def test_adversarial_inputs_parse_in_linear_time(self):
+        # Growth compares the parse time at two sizes, so it holds on a slow
+        # or busy machine: ~1 when linear, ~4 (the size ratio) when quadratic
+        for name in PAYLOADS:
+            with self.subTest(payload=name):
+                timings = [(chars, time_parse(pathological_resume(name, chars), repeat=3)) for chars in (10000, 40000)]
+                self.assertLess(growth(timings), 2.5)
+
+class TestRegressionCheck(unittest.TestCase):
+
+    def test_flags_stages_over_threshold(self):
+        baseline = {"stages": {"parse": {"median_ms": 1.0}, "extract_skills": {"median_ms": 0.5}}}
+        current = {"stages": {"parse": {"median_ms": 1.05}, "extract_skills": {"median_ms": 0.7}}}
+        rows = {row[0]: row[4] for row in compare(current, baseline, threshold=10)}
+        self.assertEqual(rows, {"parse": False, "extract_skills": True})
+
+class TestStartupBenchmark(unittest.TestCase):
+
+    @unittest.skipUnless(os.path.exists("/proc/self/status"), "needs /proc")
+    def test_reads_process_memory(self):
+        memory = process_memory(os.getpid())
+        self.assertGreater(memory["rss_kb"], 0)
+
+class TestDedupBenchmark(unittest.TestCase):
+
+    def test_planted_near_duplicates_are_found(self):
+        results = run_index(4000, capacity=1000, duplicate_rate=0.3, window=500)
+        self.assertGreater(results["recall"], 0.95)
+        self.assertEqual(results["false_matches"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,42 @@
 import unittest
 import sys
 import os
+import time
+import subprocess
+import asyncio
+import json
+import tempfile
+from unittest import mock
+from datetime import date
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from parser.resume_parser import ResumeParser
+from parser.pool import ParsePool, PoolSaturated, WorkerLost
+from parser.skill_extractor import SkillExtractor
+from parser.nlp import RuleBackend
+from parser import taxonomy
+from parser.cache import ParseCache, cache_key, set_cache
+from parser.jobs import JobStore
+import parser.index as index_module
+from parser.index import CandidateIndex, QueryError, parse_query
+from parser.dedup import DuplicateDetector, DuplicateIndex, document_id, signature, similarity
+from parser.batch import parse_chunk, parse_file, parse_many, parse_text
+from parser.versions import VersionStore
+from parser import cli
+from parser.instrumentation import add_stage_hook, remove_stage_hook
+from parser.metrics import Histogram
+from parser.experience_calculator import ExperienceCalculator, normalize_date
+from parser.experience_extractor import ExperienceExtractor
+from parser.annotations import annotate
+from parser.education_extractor import EducationExtractor
+from parser.project_extractor import ProjectExtractor
+from parser.certification_extractor import CertificationExtractor
+from parser.utils import split_into_sections, changed_sections
+from parser import models, serialization
+from parser.documents import DocumentError, UnsupportedDocument, detect_format, extract_text
+from benchmarks.synthetic import generate_resume
+from benchmarks.uploads import build_docx, build_pdf
 
 class TestResumeParser(unittest.TestCase):
 
@@ -65,10 +97,892 @@ Bachelor of Science in Computer Science, University of Example | Sep 2015 - May
         self.assertEqual(personal_info["github"], "github.com/johndoe")
 
     def test_calculate_total_experience(self):
+        self.parser.experience_calculator = ExperienceCalculator(as_of=date(2026, 3, 1))
         parsed_data = self.parser.parse()
         total_experience = parsed_data["total_experience_years"]
         self.assertGreater(total_experience, 7.5, "Total experience should be greater than 7.5 years")
         self.assertLess(total_experience, 7.65, "Total experience should be less than 7.65 years")
 
+    def test_parse_selected_fields(self):
+        parser = ResumeParser(self.resume_text)
+        result = parser.parse(use_cache=False, profile=True, fields=["total_experience_years", "personal_info"])
+        profile = result.pop("profile")
+        self.assertEqual(list(result), ["personal_info", "total_experience_years", "partial"])
+        self.assertEqual(set(profile["stages"]), {"personal_info", "split_sections", "annotate", "experience", "total_experience"})
+        self.assertEqual(parser.parse(use_cache=False, fields=["experience"])["experience"], parser._values["experience"])
+        with self.assertRaises(ValueError):
+            parser.parse(fields=["salary"])
+
+    def test_selected_fields_sliced_from_cached_result(self):
+        cache = ParseCache()
+        set_cache(cache)
+        try:
+            ResumeParser(self.resume_text).parse(fields=["skills"])
+            self.assertEqual(cache.stats()["entries"], 0)  # partial results are never stored
+            full = ResumeParser(self.resume_text).parse()
+            sliced = ResumeParser(self.resume_text).parse(fields=["skills"])
+            self.assertEqual(sliced, {"skills": full["skills"], "partial": False})
+            self.assertEqual(cache.hits, 1)
+        finally:
+            set_cache(None)
+
+    def test_size_and_time_budgets(self):
+        truncated = ResumeParser(self.resume_text + "\nInterests\n" + "Chess " * 1000, max_chars=len(self.resume_text) + 100)
+        result = truncated.parse(use_cache=False)
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["personal_info"]["full_name"], "John Doe")
+        self.assertLessEqual(len(truncated.resume_text), len(self.resume_text) + 100)
+
+        out_of_time = ResumeParser(self.resume_text, time_budget=1e-9).parse(use_cache=False)
+        self.assertTrue(out_of_time["partial"])
+        self.assertEqual(out_of_time["experience"], [])
+        self.assertEqual(set(out_of_time["skills"]), {"technical", "frameworks", "tools", "languages", "soft"})
+
+        self.assertFalse(ResumeParser(self.resume_text).parse(use_cache=False)["partial"])
+
+    def test_parse_many(self):
+        results = ResumeParser.parse_many([self.resume_text, None, self.resume_text], workers=2)
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[0]["result"]["personal_info"]["full_name"], "John Doe")
+        self.assertIsNone(results[1]["result"])
+        self.assertIsNotNone(results[1]["error"])
+        self.assertEqual(results[2]["result"], results[0]["result"])
+
+        # A generator is read a window of chunks at a time, in order
+        texts = (f"Jane Roe\nj{i}@example.com\nSkills\nPython" for i in range(7))
+        results = parse_many(texts, workers=2, chunksize=2, window=2)
+        self.assertEqual([r["result"]["personal_info"]["email"] for r in results], [f"j{i}@example.com" for i in range(7)])
+
+class TestExperienceCalculator(unittest.TestCase):
+
+    def test_normalize_date_formats(self):
+        self.assertEqual(normalize_date("Jan 2020"), 2020 * 12)
+        self.assertEqual(normalize_date("January 2020"), 2020 * 12)
+        self.assertEqual(normalize_date("01/2020"), 2020 * 12)
+        self.assertEqual(normalize_date("2020-01"), 2020 * 12)
+        self.assertEqual(normalize_date("Summer 2019"), 2019 * 12 + 5)
+        self.assertEqual(normalize_date("Current"), "present")
+        self.assertIsNone(normalize_date("sometime"))
+
+    def test_overlapping_jobs_count_once(self):
+        calculator = ExperienceCalculator(as_of=date(2024, 1, 1))
+        experiences = [
+            {"start_date": "Jan 2020", "end_date": "Jan 2022"},
+            {"start_date": "2021-01", "end_date": "01/2023"},  # overlaps the first by a year
+            {"start_date": "Jan 2023", "is_current": True},
+            {"start_date": "Someday", "end_date": "2020"},
+        ]
+        self.assertEqual(calculator.calculate_total_experience(experiences), 4.0)
+        self.assertEqual(calculator.unparsed_dates, ["Someday"])
+
+    def test_calculate_many_matches_single(self):
+        calculator = ExperienceCalculator(as_of=date(2024, 1, 1))
+        batches = [
+            [{"start_date": "Jan 2020", "end_date": "Jan 2022"}, {"start_date": "Jun 2021", "end_date": "Jun 2022"}],
+            [],
+            [{"start_date": "2015", "end_date": "2016"}, {"start_date": "Mar 2018", "end_date": "Present"}],
+            [{"start_date": "Feb 2019", "end_date": "Feb 2019"}],
+        ]
+        self.assertEqual(calculator.calculate_many(batches), [calculator.calculate_total_experience(b) for b in batches])
+
+class TestExperienceExtractor(unittest.TestCase):
+
+    def test_header_on_one_line(self):
+        [entry] = ExperienceExtractor(
+            "Software Engineer, Acme Inc. | New York, NY | Jan 2020 - Present\n"
+            "- Built services in Python and Docker.\n"
+        ).extract()
+        self.assertEqual(entry["role"], "Software Engineer")
+        self.assertEqual(entry["company"], "Acme Inc.")
+        self.assertEqual(entry["location"], "New York, NY")
+        self.assertEqual((entry["start_date"], entry["end_date"], entry["is_current"]), ("Jan 2020", None, True))
+        self.assertEqual(entry["technologies"], ["Python", "Docker"])
+
+    def test_header_split_across_lines(self):
+        entries = ExperienceExtractor(
+            "Globex Corp\n"
+            "Data Analyst\n"
+            "March 2017 to June 2019\n"
+            "• Reporting in SQL\n"
+            "  continued on a second line\n"
+            "Consultant at Initech\n"
+            "2015 2016\n"
+        ).extract()
+        self.assertEqual(len(entries), 2)
+        self.assertEqual((entries[0]["role"], entries[0]["company"]), ("Data Analyst", "Globex Corp"))
+        self.assertEqual((entries[0]["start_date"], entries[0]["end_date"]), ("March 2017", "June 2019"))
+        self.assertEqual(entries[0]["description"], "• Reporting in SQL\ncontinued on a second line")
+        self.assertEqual((entries[1]["role"], entries[1]["company"]), ("Consultant", "Initech"))
+        self.assertEqual((entries[1]["start_date"], entries[1]["end_date"]), ("2015", "2016"))
+
+    def test_company_before_role(self):
+        [entry] = ExperienceExtractor("Initech LLC | Backend Developer | 01/2019 - 12/2020").extract()
+        self.assertEqual((entry["role"], entry["company"]), ("Backend Developer", "Initech LLC"))
+        self.assertEqual((entry["start_date"], entry["end_date"]), ("01/2019", "12/2020"))
+
+class TestAnnotations(unittest.TestCase):
+
+    def test_spans_from_one_pass(self):
+        text = (
+            "B.S. in Physics, State Technical University | Sep 2015 - Present\n"
+            "Built APIs in Python and Docker at Acme Inc. (github.com/jane/api), Boston, MA\n"
+            "Machine\nLearning"
+        )
+        spans = [(span.kind, span.value, span.category) for span in annotate(text).within(0, len(text))]
+        self.assertEqual(spans, [
+            ("degree", "B.S.", None), ("org", "State Technical University", None),
+            ("date", "Sep 2015", "start"), ("date", "Present", "end"),
+            ("skill", "Python", "technical"), ("tool", "Docker", "tools"),
+            ("org", "Acme Inc.", None), ("url", "github.com/jane/api", None),
+        ])
+
+    def test_section_offsets(self):
+        text = "Projects\nAlpha: React\n\nSkills\nGo\n\nProjects\nBeta | Flask\n"
+        parser = ResumeParser(text)
+        content = parser.sections["projects"]
+        spans = parser.annotations.section(parser.sections, "projects").within(0, len(content), "skill")
+        self.assertEqual([content[span.start:span.end] for span in spans], ["React", "Flask"])
+
+
+class TestEntryExtractors(unittest.TestCase):
+
+    def test_education(self):
+        entries = EducationExtractor(
+            "Bachelor of Science in Computer Science, University of Example | Sep 2015 - May 2019\n\n"
+            "MIT\n"
+            "MS in Data Science, 2021\n"
+            "- Thesis on graph search\n"
+        ).extract()
+        self.assertEqual(entries, [
+            {"institution": "University of Example", "degree": "Bachelor of Science", "field": "Computer Science",
+             "start_date": "Sep 2015", "end_date": "May 2019"},
+            {"institution": "MIT", "degree": "MS", "field": "Data Science", "start_date": None, "end_date": "2021"},
+        ])
+
+    def test_projects(self):
+        projects = ProjectExtractor(
+            "Resume Parser | Python, FastAPI | github.com/jane/resume-parser\n"
+            "- Runs extraction in Docker workers\n"
+            "Chat App - real-time chat in React (https://chat.example.com)\n\n"
+            "Budget Tracker\n"
+            "A small Flask app.\n"
+        ).extract()
+        self.assertEqual([project["name"] for project in projects], ["Resume Parser", "Chat App", "Budget Tracker"])
+        self.assertEqual(projects[0]["technologies"], ["Python", "FastAPI", "Docker"])
+        self.assertEqual(projects[0]["url"], "github.com/jane/resume-parser")
+        self.assertEqual(projects[1]["description"], "real-time chat in React")
+        self.assertEqual(projects[1]["url"], "https://chat.example.com")
+        self.assertEqual(projects[2]["description"], "A small Flask app.")
+
+    def test_certifications(self):
+        certifications = CertificationExtractor(
+            "- AWS Certified Solutions Architect – Associate, Amazon Web Services, 2022\n"
+            "- Oracle Certified Professional\n"
+            "  Issued by Oracle Corp, Jan 2019\n"
+            "  Credential ID 12345\n"
+        ).extract()
+        self.assertEqual(certifications, [
+            {"name": "AWS Certified Solutions Architect – Associate", "issuer": "Amazon Web Services", "date": "2022", "url": None},
+            {"name": "Oracle Certified Professional", "issuer": "Oracle Corp", "date": "Jan 2019", "url": None},
+        ])
+
+    def test_parse_fills_entries_from_annotations(self):
+        text = (
+            "Jane Roe\n\nExperience\nEngineer at Foo Inc | Jan 2020 - Present\n- Tech: Go, Kubernetes\n\n"
+            "Education\nBSc, Physics, State Technical University, 2019\n\n"
+            "Certifications\nCKA | The Linux Foundation | 2021\n"
+        )
+        result = ResumeParser(text).parse(use_cache=False)
+        self.assertEqual(result["experience"][0]["technologies"], ["Go", "Kubernetes"])
+        self.assertEqual(result["education"][0]["institution"], "State Technical University")
+        self.assertEqual(result["certifications"][0]["issuer"], "The Linux Foundation")
+        # No Skills section: skills come from the whole text
+        self.assertEqual(result["skills"]["tools"], ["Kubernetes"])
+        self.assertIn("Go", result["skills"]["technical"])
+
+    def test_prose_words_are_not_skills(self):
+        text = (
+            "Jane Roe\n\nExperience\nMarketing Lead at Foo Inc | Jan 2020 - Present\n"
+            "- Led go to market for plan C and drove R and D\n"
+            "- Led Go to market for the spring launch with express shipping\n"
+        )
+        result = ResumeParser(text).parse(use_cache=False)
+        self.assertEqual(result["skills"], {category: [] for category in result["skills"]})
+        self.assertEqual(result["experience"][0]["technologies"], [])
+        # The same names as list items are skills
+        listed = ResumeParser(text + "- Stack: C, R | Spring\n").parse(use_cache=False)
+        self.assertEqual(listed["experience"][0]["technologies"], ["C", "R", "Spring"])
+        extractor = ExperienceExtractor("Engineer at Foo Inc | 2020 - 2021\n- Wrote plan C in Go and R")
+        self.assertEqual(extractor.extract()[0]["technologies"], [])
+
+class TestResultSchema(unittest.TestCase):
+
+    SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema", "resume_schema.json")
+    TYPES = {"string": str, "number": (int, float), "boolean": bool}
+
+    def assertConforms(self, value, shape, path="result"):
+        # null is allowed anywhere a scalar or object is
+        if isinstance(shape, dict):
+            if value is None:
+                return
+            self.assertIsInstance(value, dict, path)
+            self.assertLessEqual(set(value), set(shape), path)
+            for key, item in value.items():
+                self.assertConforms(item, shape[key], f"{path}.{key}")
+        elif isinstance(shape, list):
+            self.assertIsInstance(value, list, path)
+            for i, item in enumerate(value):
+                self.assertConforms(item, shape[0], f"{path}[{i}]")
+        elif value is not None:
+            self.assertIsInstance(value, self.TYPES[shape], path)
+            self.assertFalse(shape == "number" and isinstance(value, bool), path)
+
+    def test_models_match_schema_file(self):
+        with open(self.SCHEMA_PATH) as f:
+            self.assertEqual(models.schema(), json.load(f))
+
+    def test_parse_output_conforms(self):
+        with open(self.SCHEMA_PATH) as f:
+            shape = json.load(f)
+        result = ResumeParser(generate_resume(3, jobs=4)).parse(use_cache=False)
+        self.assertEqual(set(result), set(shape))
+        self.assertConforms(result, shape)
+
+        typed = models.ParseResult.from_dict(result)
+        self.assertEqual(typed.experience[0].role, result["experience"][0]["role"])
+        self.assertEqual(serialization.loads(serialization.dumps(typed)), dict(result, profile=None, duplicate=None))
+        with self.assertRaises(TypeError):
+            models.ParseResult.from_dict({"salary": 1})
+
+    def test_missing_fields_and_confidence(self):
+        result = ResumeParser("Jane Roe\njane@example.com\n\nSkills\nPython").parse(use_cache=False)
+        self.assertEqual(result["missing_fields"], ["personal_info.phone", "summary", "experience", "education"])
+        self.assertEqual(result["confidence_score"], 0.43)
+        self.assertEqual(ResumeParser("x").parse(use_cache=False, fields=["confidence_score"]), {"confidence_score": 0.0, "partial": False})
+
+    def test_json_fallback_matches_orjson(self):
+        result = ResumeParser(generate_resume(4)).parse(use_cache=False)
+        encoded = serialization.dumps(result)
+        original, serialization.orjson = serialization.orjson, None
+        try:
+            self.assertEqual(json.loads(serialization.dumps(result)), json.loads(encoded))
+            self.assertEqual(serialization.dumps(models.Skills(technical=["Python"]))[:13], b'{"technical":')
+        finally:
+            serialization.orjson = original
+
+class TestDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _path(self, name, content=None):
+        path = os.path.join(self.directory.name, name)
+        if content is not None:
+            with open(path, "wb") as f:
+                f.write(content)
+        return path
+
+    def test_plain_text(self):
+        path = self._path("cv.txt", "\ufeffJane Roe\nSkills\nPython, Café\n".encode("utf-8"))
+        self.assertEqual(detect_format(path, "cv.txt"), "txt")
+        self.assertEqual(extract_text(path, max_chars=0), "Jane Roe\nSkills\nPython, Café\n")
+        self.assertEqual(extract_text(path, max_chars=8), "Jane Roe")
+        self.assertEqual(extract_text(self._path("empty.txt", b"")), "")
+
+    def test_docx(self):
+        path = self._path("cv.docx")
+        build_docx(path, pages=2)
+        self.assertEqual(detect_format(path, "upload.bin"), "docx")
+        text = extract_text(path)
+        self.assertIn("Experience", text.splitlines())
+        parsed = ResumeParser(text).parse(use_cache=False)
+        self.assertIsNotNone(parsed["personal_info"]["email"])
+        self.assertTrue(parsed["experience"])
+        self.assertEqual(len(extract_text(path, max_chars=100)), 100)
+
+    def test_pdf(self):
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            self.skipTest("pypdf is not installed")
+        path = self._path("cv.pdf")
+        build_pdf(path, pages=2)
+        self.assertEqual(detect_format(path), "pdf")
+        self.assertIn("Experience", extract_text(path))
+
+    def test_extraction_shares_the_time_budget(self):
+        path = self._path("cv.docx")
+        build_docx(path, pages=2)
+        self.assertEqual(len(extract_text(path, deadline=0).splitlines()), 1)
+        with mock.patch.dict(os.environ, PARSER_TIME_BUDGET_MS="0.001"):
+            self.assertTrue(parse_file(path, "cv.docx")["partial"])
+        self.assertFalse(parse_file(path, "cv.docx")["partial"])
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(UnsupportedDocument):
+            detect_format(self._path("cv.pdf", b"just text"), "cv.pdf")
+        with self.assertRaises(DocumentError):
+            extract_text(self._path("sheet.xlsx", b"PK\x03\x04 not really a zip"), "docx")
+
+class TestSectionSplitter(unittest.TestCase):
+
+    def test_aliases_and_duplicates(self):
+        text = (
+            "Jane Doe\n\n"
+            "Professional Experience\n"
+            "Engineer at Foo Inc | Jan 2020 - Present\n\n"
+            "TECHNICAL SKILLS:\n"
+            "Python, SQL\n\n"
+            "Work History\n"
+            "Analyst at Bar LLC | Jan 2018 - Dec 2019\n"
+        )
+        sections = split_into_sections(text)
+        self.assertEqual(list(sections), ["experience", "skills"])
+        self.assertEqual(sections["skills"], "Python, SQL")
+        self.assertEqual(
+            sections["experience"],
+            "Engineer at Foo Inc | Jan 2020 - Present\n\nAnalyst at Bar LLC | Jan 2018 - Dec 2019",
+        )
+        start, end = sections.span("skills")
+        self.assertEqual(text[start:end], "Python, SQL")
+        self.assertEqual(len(sections.spans["experience"]), 2)
+        self.assertEqual(len(ResumeParser(text).extract_experience()), 2)
+
+    def test_no_headers(self):
+        sections = split_into_sections("  just some text\nwithout headers  ")
+        self.assertEqual(dict(sections), {"__main__": "just some text\nwithout headers"})
+
+    def test_header_words_inside_lines_are_ignored(self):
+        sections = split_into_sections("Skills\nExperience with Python\nEducation matters\n")
+        self.assertEqual(dict(sections), {"skills": "Experience with Python\nEducation matters"})
+
+class TestIncrementalParse(unittest.TestCase):
+
+    def setUp(self):
+        self.text = (
+            "Jane Doe\nAustin, TX | 512-555-0100 | jane@example.com\n\n"
+            "Skills\nPython, Docker\n\n"
+            "Experience\nSoftware Engineer at Foo Inc | Jan 2020 - Present\n- Built things\n"
+        )
+        self.result = ResumeParser(self.text).parse(use_cache=False)
+
+    def test_changed_sections(self):
+        edited = self.text.replace("Built things", "Built more things").replace("Jane Doe", "Jane Q. Doe")
+        self.assertEqual(changed_sections(split_into_sections(self.text), split_into_sections(edited)), {"__header__", "experience"})
+
+    def test_only_changed_sections_rerun(self):
+        edited = self.text.replace("Built things", "Built many things\n- Led a team")
+        parser = ResumeParser(edited)
+        result = parser.parse_incremental(self.text, self.result, profile=True)
+        stages = result.pop("profile")["stages"]
+        self.assertIn("skills", parser.reused)
+        self.assertIn("personal_info", parser.reused)
+        self.assertNotIn("experience", parser.reused)
+        self.assertNotIn("skills", stages)
+        self.assertIn("experience", stages)
+        self.assertEqual(result, ResumeParser(edited).parse(use_cache=False))
+
+    def test_header_and_partial_base(self):
+        edited = self.text.replace("jane@example.com", "jane.doe@example.com")
+        parser = ResumeParser(edited)
+        self.assertEqual(parser.parse_incremental(self.text, self.result)["personal_info"]["email"], "jane.doe@example.com")
+        self.assertNotIn("personal_info", parser.reused)
+
+        parser = ResumeParser(edited)
+        parser.parse_incremental(self.text, dict(self.result, partial=True))
+        self.assertEqual(parser.reused, [])
+
+    def test_version_store_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "versions.sqlite")
+            version_id = VersionStore(path=path).put(self.text, self.result)
+            self.assertEqual(version_id, VersionStore.version_id(self.text))
+            self.assertIsNone(VersionStore(path=path).get("unknown"))
+
+            # Another process (a fresh store on the same file) fetches the version
+            previous = VersionStore(path=path).get(version_id)
+            self.assertEqual(previous, {"resume_text": self.text, "result": self.result})
+            edited = self.text.replace("Python, Docker", "Python, Docker, Go")
+            parser = ResumeParser(edited)
+            result = parser.parse_incremental(previous["resume_text"], previous["result"])
+            self.assertIn("experience", parser.reused)
+            self.assertNotIn("skills", parser.reused)
+            self.assertEqual(result, ResumeParser(edited).parse(use_cache=False))
+
+class TestContactScanner(unittest.TestCase):
+
+    def test_portfolio_after_profile_links(self):
+        text = (
+            "Jane Q. Public\n"
+            "Austin, TX | (512) 555-0100 | https://www.linkedin.com/in/janeq | https://janeq.dev\n\n"
+            "Experience\n"
+            "Engineer at Foo Inc | Jan 2020 - Present\n"
+            "- Shipped https://foo.com/launch\n"
+        )
+        info = ResumeParser(text).extract_personal_info()
+        self.assertEqual(info["full_name"], "Jane Q. Public")
+        self.assertEqual(info["location"], "Austin, TX")
+        self.assertEqual(info["linkedin"], "linkedin.com/in/janeq")
+        self.assertEqual(info["portfolio"], "https://janeq.dev")
+        self.assertIsNone(info["email"])
+
+class TestSkillExtractor(unittest.TestCase):
+
+    def test_prose_is_split_into_phrases(self):
+        skills = SkillExtractor("Built services with Django and Docker", backend=RuleBackend()).extract_skills()
+        self.assertIn("Django", skills["frameworks"])
+        self.assertIn("Docker", skills["tools"])
+
+    def test_extract_many(self):
+        results = SkillExtractor.extract_many(["Python, Git", "", "React"], backend=RuleBackend())
+        self.assertEqual(len(results), 3)
+        self.assertIn("Git", results[0]["tools"])
+        self.assertEqual(results[1]["technical"], [])
+        self.assertIn("React", results[2]["frameworks"])
+
+    def test_chunks_extract_skills_in_one_batch(self):
+        texts = [
+            "Jane Roe\nSkills\nPython, built services with Django and Docker",
+            "John Doe\nExperience\nEngineer at Foo Inc | 2020 - 2021",
+            "Ana Diaz\nSkills\nReact, Git",
+            None,
+        ]
+        with mock.patch.object(SkillExtractor, "extract_many", wraps=SkillExtractor.extract_many) as extract_many:
+            outcomes = parse_chunk(texts, use_cache=False)
+        extract_many.assert_called_once()
+        for text, outcome in zip(texts[:3], outcomes):
+            self.assertEqual(outcome["result"], ResumeParser(text).parse(use_cache=False))
+        self.assertIsNotNone(outcomes[3]["error"])
+
+    def test_rules_backend_never_imports_spacy(self):
+        code = (
+            "import sys; from parser.resume_parser import ResumeParser; "
+            "ResumeParser('Skills\\nPython, Docker, built tooling in Go and Rust for CI').parse(); "
+            "assert 'spacy' not in sys.modules"
+        )
+        env = dict(os.environ, PARSER_NLP_BACKEND="rules")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
+
+class TestSkillMatcher(unittest.TestCase):
+
+    def test_matches_whole_tokens_and_aliases(self):
+        matches = taxonomy.get_matcher().find("React, golang, k8s, Ruby on Rails, Spring Boot")
+        self.assertEqual(
+            [(m.name, m.category) for m in matches],
+            [("React", "frameworks"), ("Go", "technical"), ("Kubernetes", "tools"),
+             ("Ruby on Rails", "frameworks"), ("Spring Boot", "frameworks")],
+        )
+        self.assertEqual(taxonomy.get_matcher().find("Argo, Redshift"), [])
+
+    def test_ambiguous_surfaces_only_match_as_written(self):
+        matcher = taxonomy.get_matcher()
+        prose = "we go to the spring fair, rust the shell and express a swift c or r opinion in excel"
+        self.assertEqual(matcher.find(prose), [])
+        self.assertEqual(matcher.names("5 ml of ink; ML models"), [("Machine Learning", "technical")])
+        found = matcher.find("Go, Rust | Spring, Express, C")
+        self.assertEqual([m.name for m in found], ["Go", "Rust", "Spring", "Express.js", "C"])
+        self.assertTrue(all(m.ambiguous for m in found))
+        self.assertFalse(matcher.find("golang")[0].ambiguous)
+        # A whole list item is a skill in any case
+        self.assertEqual(matcher.lookup("go"), ("Go", "technical"))
+        self.assertIsNone(matcher.lookup("go fast"))
+        self.assertEqual(SkillExtractor("go, spring\nexpress").extract_skills()["frameworks"], ["Spring", "Express.js"])
+
+    def test_reload_taxonomy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "taxonomy.json")
+            with open(path, "w") as f:
+                json.dump({"version": "test", "categories": {"tools": [{"name": "Argo CD", "aliases": ["argocd"]}]}}, f)
+            try:
+                matcher = taxonomy.reload_taxonomy(path)
+                self.assertEqual(matcher.version, "test")
+                self.assertEqual(taxonomy.get_matcher().find("ArgoCD")[0].name, "Argo CD")
+            finally:
+                taxonomy.reload_taxonomy(taxonomy.DEFAULT_TAXONOMY_PATH)
+
+class TestParseCache(unittest.TestCase):
+
+    def test_lru_and_sqlite_tiers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            cache = ParseCache(max_entries=1, path=path)
+            cache.put("a", {"n": 1})
+            cache.put("b", {"n": 2})
+            self.assertEqual(cache.evictions, 1)
+            self.assertEqual(cache.get("b"), {"n": 2})
+            self.assertEqual(cache.get("a"), {"n": 1})  # evicted from memory, still on disk
+            self.assertIsNone(cache.get("c"))
+            self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (1, 1, 1))
+
+            other_process = ParseCache(max_entries=1, path=path)
+            self.assertEqual(other_process.get("b"), {"n": 2})
+
+    def test_key_tracks_text_and_taxonomy(self):
+        self.assertEqual(cache_key("John Doe\r\nPython  \n"), cache_key("John Doe\nPython"))
+        self.assertNotEqual(cache_key("John Doe"), cache_key("Jane Doe"))
+
+        before = cache_key("John Doe")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "taxonomy.json")
+            with open(path, "w") as f:
+                json.dump({"version": "test", "categories": {"tools": ["Argo CD"]}}, f)
+            try:
+                taxonomy.reload_taxonomy(path)
+                self.assertNotEqual(cache_key("John Doe"), before)
+            finally:
+                taxonomy.reload_taxonomy(taxonomy.DEFAULT_TAXONOMY_PATH)
+
+class TestJobStore(unittest.TestCase):
+
+    def test_tenants_take_turns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobStore(os.path.join(tmp, "jobs.sqlite"))
+            big = store.submit(["a"] * 6, tenant="big")
+            small = store.submit(["b"] * 2, tenant="small", fields=["skills"])
+            claims = [store.claim(2) for _ in range(4)]
+            self.assertEqual([claim["job_id"] for claim in claims], [big, small, big, big])
+            self.assertEqual(claims[1]["fields"], ["skills"])
+            self.assertEqual(claims[1]["items"], [(0, "b"), (1, "b")])
+
+            self.assertFalse(store.complete(small, {0: {"result": {"n": 0}, "error": None}}))
+            self.assertTrue(store.complete(small, {1: {"result": None, "error": "ValueError: bad"}}))
+            job = store.get(small)
+            self.assertEqual((job["status"], job["completed"], job["failed"], job["progress"]), ("done", 1, 1, 1.0))
+            self.assertEqual(store.results(small, offset=1), [{"index": 1, "result": None, "error": "ValueError: bad"}])
+            self.assertEqual(store.get(big)["status"], "queued")
+
+    def test_restart_requeues_running_items(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "jobs.sqlite")
+            store = JobStore(path)
+            job_id = store.submit(["a", "b", "c"], callback_url="http://localhost/done")
+            store.claim(2)
+            self.assertEqual(JobStore(path).claim(2)["items"], [(2, "c")])  # the file is the queue
+
+            restarted = JobStore(path)
+            self.assertEqual(restarted.recover(), 3)
+            claim = restarted.claim(10)
+            self.assertEqual([index for index, _ in claim["items"]], [0, 1, 2])
+            restarted.complete(job_id, {i: {"result": {}, "error": None} for i in range(3)})
+            self.assertEqual(restarted.pending_callbacks(), [(job_id, "http://localhost/done")])
+
+    def test_items_lost_to_the_pool_are_retried_then_failed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobStore(os.path.join(tmp, "jobs.sqlite"))
+            job_id = store.submit(["a", "b"])
+            store.claim(2)
+            self.assertFalse(store.retry(job_id, [0, 1], "WorkerLost: died", max_attempts=2, delay=60))
+            self.assertIsNone(store.claim(2))  # waiting out the delay
+            self.assertEqual(store.get(job_id)["failed"], 0)
+
+            with store._transaction() as db:
+                db.execute("UPDATE job_items SET not_before = 0")
+            self.assertEqual(store.claim(2)["items"], [(0, "a"), (1, "b")])
+            self.assertTrue(store.retry(job_id, [0, 1], "WorkerLost: died", max_attempts=2, delay=60))
+            job = store.get(job_id)
+            self.assertEqual((job["status"], job["failed"]), ("done", 2))
+            self.assertEqual(store.results(job_id)[0]["error"], "gave up after 2 attempts: WorkerLost: died")
+
+class TestCandidateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CandidateIndex()
+        self.index.add_terms("ana", {"python", "kubernetes"}, {"backend developer"}, {"hooli"}, 6.0)
+        self.index.add_terms("ben", {"python", "php"}, {"data analyst"}, {"acme inc."}, 9.0)
+        self.index.add_terms("cy", {"python", "kubernetes", "go"}, set(), set(), 2.5)
+
+    def ids(self, **query):
+        return [hit["candidate_id"] for hit in self.index.search(**query)["results"]]
+
+    def test_query_syntax(self):
+        self.assertEqual(parse_query('k8s role:"Data  Analyst"'), ("and", [("term", "skill", "kubernetes"), ("term", "role", "data analyst")]))
+        self.assertEqual(parse_query("Apache HTTP Server or not go"),
+                         ("or", [("term", "skill", "apache http server"), ("not", ("term", "skill", "go"))]))
+        for bad in ("python AND", "(python", "python )", "role:"):
+            with self.assertRaises(QueryError):
+                parse_query(bad)
+
+    def test_boolean_queries_with_tenure_and_ranking(self):
+        self.assertEqual(self.ids(query="python AND k8s", min_years=5), ["ana"])
+        self.assertEqual(self.ids(query="python AND NOT php"), ["ana", "cy"])
+        # More of the optional skills first, then longer tenure
+        self.assertEqual(self.ids(query="go OR kubernetes OR php"), ["cy", "ben", "ana"])
+        self.assertEqual(self.ids(min_years=2, max_years=6), ["ana", "cy"])
+        self.assertEqual(self.ids(query="python", company="Acme Inc."), ["ben"])
+        self.assertEqual(self.index.search(query="python", k=1)["total"], 3)
+
+    def test_saved_index_is_mapped_and_takes_inserts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.index.save(os.path.join(tmp, "index"))
+            loaded = CandidateIndex.load(os.path.join(tmp, "index"))
+            self.assertEqual(self.ids(query="python"), [hit["candidate_id"] for hit in loaded.search(query="python")["results"]])
+
+            loaded.add_terms("ana", {"go"}, set(), set(), 7.0)  # replaces the saved entry
+            self.assertEqual(loaded.search(query="kubernetes")["total"], 1)
+            self.assertEqual([hit["candidate_id"] for hit in loaded.search(query="go")["results"]], ["ana", "cy"])
+            loaded.save()
+            self.assertEqual(CandidateIndex.load(os.path.join(tmp, "index")).stats()["candidates"], 3)
+
+    def test_indexes_complete_results_only(self):
+        result = ResumeParser(generate_resume(3)).parse(use_cache=False)
+        self.assertTrue(self.index.add_result(result))
+        self.assertFalse(self.index.add_result(dict(result, partial=True)))
+        skill = next(name for names in result["skills"].values() for name in names)
+        self.assertIn(result["personal_info"]["email"], self.ids(query=f'"{skill}"'))
+
+    def test_index_needs_a_path(self):
+        saved = index_module._index, index_module._index_configured
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for path, switch, enabled in (("", "on", False), (tmp, "on", True), (tmp, "off", False)):
+                    with self.subTest(path=path, switch=switch), \
+                            mock.patch.dict(os.environ, PARSER_INDEX_PATH=path, PARSER_INDEX=switch):
+                        index_module._index_configured = False
+                        self.assertEqual(index_module.get_index() is not None, enabled)
+        finally:
+            index_module._index, index_module._index_configured = saved
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.text = generate_resume(3, jobs=4)
+        # A reformatted phone number and one moved date
+        self.copy = self.text.replace("764-439-4141", "(764) 439 4141").replace("Nov 2023", "Oct 2023")
+
+    def test_signatures(self):
+        self.assertNotEqual(self.text, self.copy)
+        self.assertGreater(similarity(signature(self.text), signature(self.copy)), 0.9)
+        self.assertLess(similarity(signature(self.text), signature(generate_resume(4, jobs=4))), 0.5)
+        self.assertIsNone(signature(" -- \n"))
+
+    def test_rolling_index(self):
+        index = DuplicateIndex(capacity=2, threshold=0.9)
+        first = index.add(signature(self.text), "a")
+        index.add(signature(generate_resume(5)), "b")
+        self.assertEqual(index.clusters[index.query(signature(self.copy))[0]], first)
+        index.add(signature(generate_resume(6)), "c")  # overwrites "a"
+        self.assertIsNone(index.query(signature(self.copy)))
+        self.assertEqual(index.stats(), {"documents": 2, "capacity": 2, "inserted": 3})
+
+    def test_reparses_only_what_differs(self):
+        detector = DuplicateDetector(capacity=16)
+        first = detector.check(self.text)
+        detector.record(self.text, first, ResumeParser(self.text).parse(use_cache=False))
+        match = detector.check(self.copy)
+        self.assertEqual(match.cluster_id, first.cluster_id)
+        self.assertIsNotNone(match.base)
+
+        (outcome,) = parse_chunk([self.copy], False, False, None, [match.base])
+        self.assertEqual(outcome["result"], ResumeParser(self.copy).parse(use_cache=False))
+        report = detector.record(self.copy, match, outcome["result"])
+        self.assertEqual(report["changed_fields"], ["personal_info", "experience"])
+        self.assertEqual(report["duplicate_of"], document_id(self.text))
+        self.assertIsNone(detector.record(self.text, detector.check(self.text), outcome["result"]))
+
+    def test_indexed_after_a_parse_and_per_tenant(self):
+        detector = DuplicateDetector(capacity=16)
+        first = detector.check(self.text, "acme")
+        self.assertIsNone(first.cluster_id)
+        self.assertIsNone(detector.check(self.copy, "acme").duplicate_of)  # the first never parsed
+
+        detector.record(self.text, first, ResumeParser(self.text).parse(use_cache=False))
+        self.assertEqual(detector.check(self.copy, "acme").duplicate_of, document_id(self.text))
+        other = detector.check(self.copy, "globex")
+        self.assertEqual((other.duplicate_of, other.base), (None, None))
+        self.assertIsNone(detector.check(self.copy).duplicate_of)
+
+    def test_reuse_mode_never_carries_personal_info(self):
+        detector = DuplicateDetector(capacity=16, mode="reuse")
+        detector.record(self.text, detector.check(self.text), ResumeParser(self.text).parse(use_cache=False))
+        # Same sections, someone else's header
+        other = self.text.replace("Wei Kim", "Ana Diaz", 1).replace("weikim@example.com", "ana@example.org")
+        match = detector.check(other)
+        base = detector.parse_base(match)
+        self.assertNotIn("personal_info", base["result"])
+        self.assertIn("personal_info", match.base["result"])
+
+        (outcome,) = parse_chunk([other], False, False, None, [base])
+        self.assertEqual(outcome["result"], ResumeParser(other).parse(use_cache=False))
+        self.assertEqual(outcome["result"]["personal_info"]["email"], "ana@example.org")
+        self.assertEqual(detector.record(other, match, outcome["result"])["changed_fields"], ["personal_info"])
+        self.assertEqual(detector.stats()["near_duplicates"], 1)
+
+    def test_documents_outlast_the_month(self):
+        detector = DuplicateDetector(capacity=16)
+        detector.record(self.text, detector.check(self.text), ResumeParser(self.text).parse(use_cache=False))
+        with mock.patch("parser.versions.cache_key", lambda text: cache_key(text, current_month=0)):
+            # An exact re-upload is still the same document
+            self.assertIsNone(detector.check(self.text).duplicate_of)
+            # A near-duplicate still joins the cluster, but last month's result is not reused
+            match = detector.check(self.copy)
+            self.assertEqual(match.duplicate_of, document_id(self.text))
+            self.assertIsNone(match.base)
+        self.assertEqual(detector.stats()["near_duplicates"], 1)
+
+class TestCli(unittest.TestCase):
+
+    def test_jsonl_to_ndjson_with_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.jsonl")
+            output = os.path.join(tmp, "out.ndjson")
+            checkpoint = os.path.join(tmp, "checkpoint.json")
+            with open(source, "w") as f:
+                for i in range(5):
+                    f.write(json.dumps({"id": f"r{i}", "resume_text": f"Person Number{i}\nSkills\nPython"}) + "\n")
+                f.write(json.dumps({"id": "bad"}) + "\n")
+
+            # Pretend an earlier run finished two records and crashed mid-write
+            with open(output, "w") as f:
+                f.write(json.dumps({"id": "r0"}) + "\n" + json.dumps({"id": "r1"}) + "\n")
+                offset = f.tell()
+                f.write('{"id": "r2", "res')
+            cli.write_checkpoint(checkpoint, {"completed": 2, "output_offset": offset})
+
+            cli.main([source, "-o", output, "-w", "1", "--checkpoint", checkpoint, "--checkpoint-every", "1"])
+
+            with open(output) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([r["id"] for r in records], ["r0", "r1", "r2", "r3", "r4", "bad"])
+            self.assertEqual(records[2]["result"]["skills"]["technical"], ["Python"])
+            self.assertIn("elapsed_ms", records[2])
+            self.assertIsNotNone(records[5]["error"])
+            self.assertEqual(cli.read_checkpoint(checkpoint)["completed"], 6)
+
+    def test_resume_seeks_to_the_checkpointed_position(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.jsonl")
+            output = os.path.join(tmp, "out.ndjson")
+            checkpoint = os.path.join(tmp, "checkpoint.json")
+            done = '{"id": "r0", "resume_text": "Jane Roe"}\n\n'
+            with open(source, "w") as f:
+                f.write(done + '"Ana Diaz\\nSkills\\nGo"\n{"id": "r3", "resume_text": "John Doe"}\n')
+            # The position, not the count, says where to carry on
+            cli.write_checkpoint(checkpoint, {"completed": 1, "output_offset": 0, "input_offset": len(done), "input_line": 2})
+
+            cli.main([source, "-o", output, "-w", "1", "--checkpoint", checkpoint])
+
+            with open(output) as f:
+                self.assertEqual([json.loads(line)["id"] for line in f], [3, "r3"])
+            self.assertEqual(cli.read_checkpoint(checkpoint), {
+                "completed": 3, "output_offset": os.path.getsize(output), "input_offset": os.path.getsize(source), "input_line": 4,
+            })
+
+            directory = os.path.join(tmp, "resumes")
+            os.makedirs(os.path.join(directory, "sub"))
+            for name in ("a.txt", "b.txt", os.path.join("sub", "c.txt")):
+                with open(os.path.join(directory, name), "w") as f:
+                    f.write("Jane Roe\nSkills\nPython")
+            cli.write_checkpoint(checkpoint, {"completed": 1, "output_offset": 0, "input_offset": 1})
+            cli.main([directory, "-o", output, "-w", "1", "--checkpoint", checkpoint])
+            with open(output) as f:
+                self.assertEqual([json.loads(line)["id"] for line in f], ["b.txt", os.path.join("sub", "c.txt")])
+            self.assertEqual(cli.read_checkpoint(checkpoint)["input_offset"], 3)
+
+    def test_bad_lines_get_an_error_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.jsonl")
+            output = os.path.join(tmp, "out.ndjson")
+            checkpoint = os.path.join(tmp, "checkpoint.json")
+            with open(source, "w") as f:
+                f.write('{"id": "r0", "resume_text": "Jane Roe\\nSkills\\nPython"}\n')
+                f.write('{"id": "r1", "resume_text": \n')
+                f.write("[1, 2]\n")
+                f.write('{"id": "r3", "resume_text": "John Doe"}\n')
+
+            cli.main([source, "-o", output, "-w", "1", "--checkpoint", checkpoint])
+
+            with open(output) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([r["id"] for r in records], ["r0", 2, 3, "r3"])
+            self.assertIn("not valid JSON", records[1]["error"])
+            self.assertIn("JSON list", records[2]["error"])
+            self.assertIsNone(records[3]["error"])
+            self.assertEqual(cli.read_checkpoint(checkpoint)["completed"], 4)
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_profile_and_stage_hooks(self):
+        seen = []
+        hook = lambda stage, seconds: seen.append(stage)
+        add_stage_hook(hook)
+        try:
+            result = ResumeParser("Jane Roe\nSkills\nPython").parse(use_cache=False, profile=True)
+        finally:
+            remove_stage_hook(hook)
+        self.assertIn("skills", result["profile"]["stages"])
+        self.assertFalse(result["profile"]["cache_hit"])
+        self.assertEqual(set(seen), set(result["profile"]["stages"]))
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1))
+        histogram.observe(0.05, stage="skills")
+        histogram.observe(0.5, stage="skills")
+        lines = histogram.render().splitlines()
+        self.assertIn('stage_seconds_bucket{stage="skills",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="skills",le="+Inf"} 2', lines)
+        self.assertIn('stage_seconds_count{stage="skills"} 2', lines)
+
+class TestParsePool(unittest.TestCase):
+
+    def test_rejects_work_beyond_queue(self):
+        pool = ParsePool(max_workers=1, max_queue=1)
+        try:
+            running = pool.submit(time.sleep, 0.5)
+            queued = pool.submit(time.sleep, 0)
+            with self.assertRaises(PoolSaturated):
+                pool.submit(time.sleep, 0)
+            self.assertEqual(pool.stats()["in_flight"], 1)
+            self.assertEqual(pool.stats()["queue_depth"], 1)
+            running.result()
+            queued.result()
+            time.sleep(0.05)
+            self.assertEqual(pool.stats()["queue_depth"], 0)
+        finally:
+            pool.shutdown()
+
+    def test_warm_up_under_a_full_queue(self):
+        pool = ParsePool(max_workers=1, max_queue=1)
+        try:
+            busy = [pool.submit(time.sleep, 0.2), pool.submit(time.sleep, 0)]
+            with self.assertRaises(PoolSaturated):
+                pool.submit(time.sleep, 0)
+            self.assertEqual(len(pool.warm_up()), 1)
+            self.assertTrue(all(future.done() for future in busy))
+            time.sleep(0.05)
+            self.assertEqual(pool.stats()["queue_depth"], 0)
+        finally:
+            pool.shutdown()
+
+    def test_replaces_a_pool_whose_worker_died(self):
+        pool = ParsePool(max_workers=1)
+        try:
+            pool.warm_up()
+            with self.assertRaises(WorkerLost):
+                asyncio.run(pool.run(os._exit, 1))
+            self.assertEqual(pool.submit(parse_text, "Jane Roe\nSkills\nPython", False).result()["skills"]["technical"], ["Python"])
+            deadline = time.monotonic() + 60
+            while not pool.ready and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertTrue(pool.ready)
+            self.assertEqual(pool.stats()["in_flight"], 0)
+        finally:
+            pool.shutdown()
+
+    def test_warm_up_starts_every_worker(self):
+        for preload in (False, True):
+            with self.subTest(preload=preload):
+                pool = ParsePool(max_workers=2, preload=preload)
+                try:
+                    self.assertFalse(pool.ready)
+                    pids = pool.warm_up()
+                    self.assertEqual(len(set(pids)), 2)
+                    self.assertTrue(pool.stats()["ready"])
+                    self.assertIn(pool.submit(os.getpid).result(), pids)
+                finally:
+                    pool.shutdown()
+                self.assertFalse(pool.ready)
+
 if __name__ == '__main__':
     unittest.main()